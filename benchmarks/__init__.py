@@ -0,0 +1 @@
+#!python3
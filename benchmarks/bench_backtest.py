@@ -0,0 +1,52 @@
+#!python3
+"""
+1か月分のBTC_JPYの約定履歴(合成データ)でバックテストの処理時間を計測します。
+
+    python -m benchmarks.bench_backtest
+"""
+import time
+from decimal import Decimal
+
+from gmocoin.common.dto import Symbol, SalesSide, ExecutionType, TimeInForce
+from gmocoin.private.backtest import Backtester
+from .payloads import trades_frame
+
+
+def spread_strategy(client, now) -> None:
+    """
+    最新の約定価格の上下に指値を出し、建玉があれば利益確定の指値で決済する戦略です。
+    """
+    last = client.last_price(Symbol.BTC_JPY)
+    if last is None or len(client.live_orders(Symbol.BTC_JPY)) > 0:
+        return
+    if len(client.open_positions(Symbol.BTC_JPY)) == 0:
+        client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS,
+                     size='0.01', price=str(last - Decimal(1000)))
+    else:
+        client.close_bulk_order(Symbol.BTC_JPY, SalesSide.SELL, ExecutionType.LIMIT, TimeInForce.FAS,
+                                size='0.01', price=str(last + Decimal(1000)))
+
+
+def main(days: int = 30, trades_per_day: int = 50000, interval: float = 60.0) -> None:
+    """
+    バックテストを実行し、処理時間と結果を表示します。
+
+    Args:
+        days:
+            日数
+        trades_per_day:
+            1日当りの約定件数
+        interval:
+            戦略を呼び出す間隔秒数
+    """
+    trades = trades_frame(days=days, trades_per_day=trades_per_day)
+    started = time.perf_counter()
+    result = Backtester(spread_strategy, interval=interval, maker_fee='-0.0001').run(trades)
+    elapsed = time.perf_counter() - started
+    print(f'{result.trade_count} trades, {len(result.executions)} executions in {elapsed:.2f}s '
+          f'({result.trade_count / elapsed:,.0f} trades/s)')
+    print(f'realized {result.realized_pnl:.0f} unrealized {result.unrealized_pnl:.0f} fee {result.fee:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!python3
+"""
+板情報のスナップショット(合成データ)から特徴量を計算する時間を、Pythonのループとnumpyで比較します。
+
+    python -m benchmarks.bench_book_analytics
+"""
+import time
+
+import numpy as np
+
+from gmocoin.public.analytics import BookStack
+
+
+def synthetic_stack(snapshots: int, depth: int, seed: int = 0) -> BookStack:
+    """
+    仲値がランダムウォークする板の配列を生成します。
+    """
+    rng = np.random.default_rng(seed)
+    mid = 5000000 + np.cumsum(rng.normal(0, 500, snapshots))
+    steps = np.cumsum(rng.uniform(100, 1000, (snapshots, depth)), axis=1)
+    asks = np.stack([mid[:, None] + steps, rng.uniform(0.01, 2, (snapshots, depth))], axis=2)
+    bids = np.stack([mid[:, None] - steps, rng.uniform(0.01, 2, (snapshots, depth))], axis=2)
+    return BookStack(asks, bids)
+
+
+def loop_features(stack: BookStack, levels: int = 5) -> list:
+    """
+    スナップショットごとにPythonのループでマイクロプライスと数量の偏りを計算します。
+    """
+    result = []
+    for asks, bids in zip(stack.asks.tolist(), stack.bids.tolist()):
+        (ask, ask_size), (bid, bid_size) = asks[0], bids[0]
+        ask_total = sum(s for _, s in asks[:levels])
+        bid_total = sum(s for _, s in bids[:levels])
+        result.append(((ask * bid_size + bid * ask_size) / (ask_size + bid_size),
+                       (bid_total - ask_total) / (bid_total + ask_total)))
+    return result
+
+
+def main(snapshots: int = 100000, depth: int = 20) -> None:
+    """
+    処理時間を表示します。
+
+    Args:
+        snapshots:
+            スナップショット数
+        depth:
+            段数
+    """
+    stack = synthetic_stack(snapshots, depth)
+    started = time.perf_counter()
+    loop_features(stack)
+    print(f'python loop (microprice, imbalance) {time.perf_counter() - started:6.3f}s')
+    started = time.perf_counter()
+    stack.microprice(), stack.imbalance()
+    print(f'numpy (microprice, imbalance)       {time.perf_counter() - started:6.3f}s')
+    started = time.perf_counter()
+    stack.features()
+    print(f'numpy (all features)                {time.perf_counter() - started:6.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!python3
+"""
+板を1段ずつ消化するPythonのループと、estimate_impactで多数の注文数量の平均約定価格を見積もる時間を比較します。
+
+    python -m benchmarks.bench_impact
+"""
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from gmocoin.common.dto import SalesSide, Symbol
+from gmocoin.private.paper import _vwap
+from gmocoin.public.analytics import estimate_impact
+from gmocoin.public.dto import GetOrderBooksData, OrderData
+
+
+def main(depth: int = 200, candidates: int = 1000) -> None:
+    """
+    処理時間を表示します。
+
+    Args:
+        depth:
+            板の段数
+        candidates:
+            見積もる注文数量の数
+    """
+    rng = np.random.default_rng(0)
+    prices = 5000000 + np.cumsum(rng.integers(1, 1000, depth))
+    asks = [OrderData(price=Decimal(int(p)), size=Decimal(str(round(s, 4))))
+            for p, s in zip(prices, rng.uniform(0.001, 0.5, depth))]
+    book = GetOrderBooksData(asks=asks, bids=[], symbol=Symbol.BTC_JPY)
+    sizes = np.linspace(0.01, 20, candidates)
+
+    started = time.perf_counter()
+    for size in sizes:
+        _vwap(book.asks, Decimal(str(size)), partial=True)
+    print(f'python book walk {time.perf_counter() - started:8.4f}s')
+
+    started = time.perf_counter()
+    estimate_impact(book, SalesSide.BUY, sizes)
+    print(f'estimate_impact  {time.perf_counter() - started:8.4f}s (including book conversion)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+#!python3
+"""
+python -X importtimeでgmocoinのモジュールのimport時間を計測します。
+
+    python -m benchmarks.bench_import [module]
+"""
+import subprocess
+import sys
+
+
+def main(module: str = 'gmocoin.public.api', top: int = 15, repeat: int = 5) -> None:
+    """
+    import時間の中央値と、累積時間が大きいモジュールを表示します。
+
+    Args:
+        module:
+            計測するモジュール
+        top:
+            表示するモジュール数
+        repeat:
+            計測回数
+    """
+    results = []
+    for _ in range(repeat):
+        ret = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             capture_output=True, text=True, check=True)
+        times = {}
+        for line in ret.stderr.splitlines():
+            if line.startswith('import time:') and 'cumulative' not in line:
+                _, cumulative, name = line[len('import time:'):].split('|')
+                times[name.strip()] = int(cumulative)
+        results.append(times)
+
+    results.sort(key=lambda t: t[module])
+    median = results[len(results) // 2]
+    print(f'{module}: {median[module] / 1000:.1f}ms (median of {repeat})')
+    for name, us in sorted(median.items(), key=lambda i: -i[1])[1:top + 1]:
+        print(f'  {name:40s} {us / 1000:8.1f}ms')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
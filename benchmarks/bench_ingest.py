@@ -0,0 +1,73 @@
+#!python3
+"""
+1か月分のBTCの日次約定履歴ファイル(合成データ)の読み込み時間とメモリ使用量を計測します。
+
+    python -m benchmarks.bench_ingest
+"""
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from gmocoin.public.history import read_trades, csv_engine, TIMESTAMP_FORMAT
+from .payloads import trades_frame
+
+
+def write_daily_files(directory: str, days: int, trades_per_day: int) -> list:
+    """
+    日次ファイルの形式(symbol side size price timestamp)でgzip圧縮したCSVを書き出します。
+
+    Returns:
+        ファイルパスのリスト
+    """
+    df = trades_frame(symbol='BTC', days=days, trades_per_day=trades_per_day)
+    paths = []
+    for day, group in df.groupby(df['timestamp'].dt.date):
+        path = os.path.join(directory, f'{day:%Y%m%d}_BTC.csv.gz')
+        group.to_csv(path, index=False, compression='gzip', date_format=TIMESTAMP_FORMAT)
+        paths.append(path)
+    return paths
+
+
+def read_inferred(path: str) -> pd.DataFrame:
+    """
+    型を推定して読み込み、timestampを日時に変換します。
+    """
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    return df
+
+
+def measure(name: str, read, paths: list) -> None:
+    """
+    全ファイルを読み込んで連結し、処理時間とメモリ使用量を表示します。
+    """
+    started = time.perf_counter()
+    df = pd.concat([read(path) for path in paths], ignore_index=True)
+    elapsed = time.perf_counter() - started
+    memory = df.memory_usage(deep=True).sum() / 1024 / 1024
+    print(f'{name:<24} {elapsed:6.2f}s {len(df) / elapsed:12,.0f} rows/s {memory:8.1f} MiB')
+
+
+def main(days: int = 30, trades_per_day: int = 50000) -> None:
+    """
+    pd.read_csv(型推定)とread_trades(型指定)を比較します。
+
+    Args:
+        days:
+            日数
+        trades_per_day:
+            1日当りの約定件数
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_daily_files(directory, days, trades_per_day)
+        print(f'{len(paths)} files, {sum(os.path.getsize(p) for p in paths) / 1024 / 1024:.1f} MiB')
+        measure('pd.read_csv (inferred)', read_inferred, paths)
+        measure('read_trades (c)', lambda p: read_trades(p, engine='c'), paths)
+        if csv_engine() == 'pyarrow':
+            measure('read_trades (pyarrow)', lambda p: read_trades(p, engine='pyarrow'), paths)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+#!python3
+"""
+JSONバックエンドごとのデコード/エンコード速度を計測します。
+
+    python -m benchmarks.bench_json
+"""
+import json
+import timeit
+
+from gmocoin.common import json_backend
+from .payloads import orderbooks_payload
+
+
+def main(number: int = 2000) -> None:
+    """
+    板情報ペイロードで各バックエンドを計測し、標準ライブラリ比の倍率を表示します。
+
+    Args:
+        number:
+            計測回数
+    """
+    raw = json.dumps(orderbooks_payload()).encode('utf-8')
+    order_body = {'symbol': 'BTC_JPY', 'side': 'BUY', 'executionType': 'LIMIT',
+                  'timeInForce': 'FAS', 'size': '0.01', 'price': '5000000'}
+    print(f'orderbooks payload: {len(raw)} bytes, number={number}')
+
+    results = {}
+    for name in json_backend.available_backends():
+        backend = json_backend.set_backend(name)
+        loads_sec = timeit.timeit(lambda: backend.loads(raw), number=number)
+        dumps_sec = timeit.timeit(lambda: backend.dumps(order_body), number=number * 10)
+        results[name] = (loads_sec, dumps_sec)
+
+    base_loads, base_dumps = results['json']
+    for name, (loads_sec, dumps_sec) in results.items():
+        print(f'{name:10s} loads {loads_sec / number * 1e6:8.1f}us (x{base_loads / loads_sec:4.1f})  '
+              f'dumps {dumps_sec / (number * 10) * 1e6:6.2f}us (x{base_dumps / dumps_sec:4.1f})')
+
+    json_backend.set_backend()
+
+
+if __name__ == '__main__':
+    main()
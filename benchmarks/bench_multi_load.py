@@ -0,0 +1,54 @@
+#!python3
+"""
+複数銘柄の日次約定履歴ファイル(合成データ)の読み込み時間を、1プロセスとプロセスプールで比較します。
+
+    python -m benchmarks.bench_multi_load
+"""
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from gmocoin.common.dto import Symbol
+from gmocoin.public.history import TIMESTAMP_FORMAT
+from gmocoin.public.loader import HistoryLoader
+from .payloads import trades_frame
+
+
+SYMBOLS = [Symbol.BTC, Symbol.ETH, Symbol.XRP, Symbol.BTC_JPY, Symbol.ETH_JPY, Symbol.XRP_JPY]
+
+
+def main(days: int = 10, trades_per_day: int = 50000, max_workers: int = None) -> None:
+    """
+    1プロセスとプロセスプールでの読み込み時間を表示します。
+
+    Args:
+        days:
+            日数
+        trades_per_day:
+            1日当りの約定件数
+        max_workers:
+            プロセス数。指定しない場合はCPUコア数。
+    """
+    with tempfile.TemporaryDirectory() as root:
+        loader = HistoryLoader(root, max_workers=1)
+        for i, symbol in enumerate(SYMBOLS):
+            df = trades_frame(symbol=symbol.value, days=days, trades_per_day=trades_per_day, seed=i)
+            for day, group in df.groupby(df['timestamp'].dt.date):
+                path = loader.history.daily_path(symbol, day)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                group.to_csv(path, index=False, compression='gzip', date_format=TIMESTAMP_FORMAT)
+        start = date(2021, 3, 1)
+        end = start + timedelta(days=days)
+        rows = len(SYMBOLS) * days * trades_per_day
+
+        for workers in (1, max_workers or os.cpu_count()):
+            loader.max_workers = workers
+            started = time.perf_counter()
+            loader.load(SYMBOLS, start, end, download=False)
+            elapsed = time.perf_counter() - started
+            print(f'{workers:3} processes {elapsed:6.2f}s {rows / elapsed:12,.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
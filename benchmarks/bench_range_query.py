@@ -0,0 +1,59 @@
+#!python3
+"""
+30日分の日次約定履歴ファイル(合成データ)から毎日10:00～10:05の約定を取り出す時間を、
+全件読み込みと時間範囲の索引を使用した読み込みで比較します。
+
+    python -m benchmarks.bench_range_query
+"""
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from gmocoin.common.dto import Symbol
+from gmocoin.public.history import TradeHistory, TIMESTAMP_FORMAT
+from .payloads import trades_frame
+
+
+def main(days: int = 30, trades_per_day: int = 50000) -> None:
+    """
+    全件読み込みと索引を使用した読み込みの処理時間を表示します。
+
+    Args:
+        days:
+            日数
+        trades_per_day:
+            1日当りの約定件数
+    """
+    with tempfile.TemporaryDirectory() as root:
+        history = TradeHistory(root)
+        df = trades_frame(symbol='BTC', days=days, trades_per_day=trades_per_day)
+        for day, group in df.groupby(df['timestamp'].dt.date):
+            path = history.daily_path(Symbol.BTC, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            group.to_csv(path, index=False, compression='gzip', date_format=TIMESTAMP_FORMAT)
+        start = pd.Timestamp(df['timestamp'].iloc[0].date(), tz='UTC')
+        windows = [(start + pd.Timedelta(days=d, hours=10), start + pd.Timedelta(days=d, hours=10, minutes=5))
+                   for d in range(days)]
+
+        started = time.perf_counter()
+        full = history.load(Symbol.BTC)
+        mask = False
+        for begin, end in windows:
+            mask |= (full['timestamp'] >= begin) & (full['timestamp'] < end)
+        expected = full[mask]
+        print(f'full load      {time.perf_counter() - started:6.2f}s {len(expected)} rows')
+
+        started = time.perf_counter()
+        history.query(Symbol.BTC, windows)
+        print(f'index build    {time.perf_counter() - started:6.2f}s')
+
+        started = time.perf_counter()
+        result = history.query(Symbol.BTC, windows)
+        print(f'indexed query  {time.perf_counter() - started:6.2f}s {len(result)} rows')
+        assert len(result) == len(expected)
+
+
+if __name__ == '__main__':
+    main()
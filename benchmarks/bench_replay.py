@@ -0,0 +1,48 @@
+#!python3
+"""
+RecordingTransportで記録した通信をリプレイし、パブリックAPIのレスポンスのデコード時間を計測します。
+
+    python -m benchmarks.bench_replay traffic.jsonl.gz [speed]
+"""
+import sys
+import time
+from urllib.parse import urlparse
+
+from gmocoin.common.json_backend import response_json
+from gmocoin.common.transport import replay_paced
+from gmocoin.public.dto import GetStatusResSchema, GetTickerResSchema, GetOrderBooksResSchema, GetTradesResSchema
+
+
+SCHEMAS = {
+    'status': GetStatusResSchema,
+    'ticker': GetTickerResSchema,
+    'orderbooks': GetOrderBooksResSchema,
+    'trades': GetTradesResSchema,
+}
+
+
+def main(path: str, speed: float = 0.0) -> None:
+    """
+    記録したレスポンスをエンドポイントごとにデコードし、1件当たりの処理時間を表示します。
+
+    Args:
+        path:
+            記録ファイルパス
+        speed:
+            記録時の送信間隔の再現倍率。0の場合は待たずにデコードする。
+    """
+    elapsed = {}
+    for record, res in replay_paced(path, speed=speed or float('inf')):
+        Schema = SCHEMAS.get(urlparse(record['url']).path.rsplit('/', 1)[-1])
+        if Schema is None or record['status'] != 200:
+            continue
+        started = time.perf_counter()
+        Schema().load(response_json(res))
+        elapsed.setdefault(Schema.__name__, []).append(time.perf_counter() - started)
+
+    for name, values in sorted(elapsed.items()):
+        print(f'{name:24s} n={len(values):6d} avg {sum(values) / len(values) * 1e6:8.1f}us')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else 0.0)
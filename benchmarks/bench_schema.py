@@ -0,0 +1,48 @@
+#!python3
+"""
+スキーマを毎回生成する場合とキャッシュしたスキーマを使用する場合のデコード時間を計測します。
+
+    python -m benchmarks.bench_schema
+"""
+import timeit
+
+from gmocoin.common.annotation import get_schema
+from gmocoin.public.dto import GetStatusResSchema, GetTickerResSchema, GetOrderBooksResSchema, GetTradesResSchema
+from gmocoin.private.dto import GetMarginResSchema, GetAssetsResSchema, GetActiveOrdersResSchema, \
+    GetLatestExecutionsResSchema, GetPositionSummaryResSchema, PostOrderResSchema
+from .payloads import endpoint_payloads
+
+
+SCHEMAS = {
+    'status': GetStatusResSchema,
+    'ticker': GetTickerResSchema,
+    'orderbooks': GetOrderBooksResSchema,
+    'trades': GetTradesResSchema,
+    'margin': GetMarginResSchema,
+    'assets': GetAssetsResSchema,
+    'activeOrders': GetActiveOrdersResSchema,
+    'latestExecutions': GetLatestExecutionsResSchema,
+    'positionSummary': GetPositionSummaryResSchema,
+    'order': PostOrderResSchema,
+}
+
+
+def main(number: int = 200) -> None:
+    """
+    エンドポイントごとに1回当たりのデコード時間を表示します。
+
+    Args:
+        number:
+            計測回数
+    """
+    payloads = endpoint_payloads()
+    print(f'{"endpoint":18s} {"Schema()":>10s} {"cached":>10s}')
+    for name, Schema in SCHEMAS.items():
+        payload = payloads[name]
+        fresh = timeit.timeit(lambda: Schema().load(payload), number=number) / number
+        cached = timeit.timeit(lambda: get_schema(Schema).load(payload), number=number) / number
+        print(f'{name:18s} {fresh * 1e6:8.1f}us {cached * 1e6:8.1f}us (x{fresh / cached:4.2f})')
+
+
+if __name__ == '__main__':
+    main()
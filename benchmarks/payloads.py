@@ -0,0 +1,126 @@
+#!python3
+import random
+
+
+RESPONSE_TIME = '2021-03-01T12:34:56.789Z'
+
+
+def orderbooks_payload(symbol: str = 'BTC_JPY', depth: int = 200, seed: int = 0) -> dict:
+    """
+    get_orderbooksのレスポンスを模したペイロードを生成します。
+
+    Args:
+        symbol:
+            銘柄名
+        depth:
+            売り/買いそれぞれの板の段数
+        seed:
+            乱数シード
+
+    Returns:
+        dict
+    """
+    rnd = random.Random(seed)
+    mid = 5000000
+    asks = [{'price': str(mid + 100 * (i + 1)), 'size': f'{rnd.uniform(0.0001, 2):.4f}'} for i in range(depth)]
+    bids = [{'price': str(mid - 100 * (i + 1)), 'size': f'{rnd.uniform(0.0001, 2):.4f}'} for i in range(depth)]
+    return {
+        'status': 0,
+        'data': {'asks': asks, 'bids': bids, 'symbol': symbol},
+        'responsetime': RESPONSE_TIME,
+    }
+
+
+def trades_frame(symbol: str = 'BTC_JPY', days: int = 30, trades_per_day: int = 50000, seed: int = 0,
+                 start: str = '2021-03-01'):
+    """
+    日次の約定履歴ファイル(symbol side size price timestamp)を模したDataFrameを生成します。
+
+    Args:
+        symbol:
+            銘柄名
+        days:
+            日数
+        trades_per_day:
+            1日当りの約定件数
+        seed:
+            乱数シード
+        start:
+            開始日
+
+    Returns:
+        DataFrame
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    n = days * trades_per_day
+    offsets = np.sort(rng.integers(0, days * 86400 * 1000, n))
+    prices = np.round(5000000 + np.cumsum(rng.normal(0, 500, n)))
+    return pd.DataFrame({
+        'symbol': symbol,
+        'side': np.where(rng.random(n) < 0.5, 'BUY', 'SELL'),
+        'size': np.round(rng.uniform(0.0001, 0.5, n), 4),
+        'price': prices,
+        'timestamp': pd.Timestamp(start) + pd.to_timedelta(offsets, unit='ms'),
+    })
+
+
+def endpoint_payloads(rows: int = 100, seed: int = 0) -> dict:
+    """
+    各エンドポイントのレスポンスを模したペイロードを生成します。
+
+    Args:
+        rows:
+            一覧系のレスポンスの件数
+        seed:
+            乱数シード
+
+    Returns:
+        {エンドポイント名: dict}
+    """
+    rnd = random.Random(seed)
+    timestamp = '2021-03-01T12:34:56.789Z'
+
+    def response(data) -> dict:
+        return {'status': 0, 'data': data, 'responsetime': RESPONSE_TIME}
+
+    def price() -> str:
+        return str(5000000 + rnd.randint(-5000, 5000))
+
+    def size() -> str:
+        return f'{rnd.uniform(0.0001, 2):.4f}'
+
+    pagination = {'currentPage': 1, 'count': rows}
+    return {
+        'status': response({'status': 'OPEN'}),
+        'ticker': response([{'ask': price(), 'bid': price(), 'high': price(), 'last': price(), 'low': price(),
+                             'symbol': symbol, 'timestamp': timestamp, 'volume': size()}
+                            for symbol in ('BTC', 'ETH', 'BCH', 'LTC', 'XRP', 'BTC_JPY', 'ETH_JPY', 'BCH_JPY',
+                                           'LTC_JPY', 'XRP_JPY')]),
+        'orderbooks': orderbooks_payload(seed=seed),
+        'trades': response({'pagination': pagination,
+                            'list': [{'price': price(), 'side': rnd.choice(('BUY', 'SELL')), 'size': size(),
+                                      'timestamp': timestamp} for _ in range(rows)]}),
+        'margin': response({'actualProfitLoss': '68286188', 'availableAmount': '57262506', 'margin': '1021682',
+                            'marginCallStatus': 'NORMAL', 'marginRatio': '6683.6', 'profitLoss': '0'}),
+        'assets': response([{'amount': size(), 'available': size(), 'conversionRate': price(), 'symbol': symbol}
+                            for symbol in ('JPY', 'BTC', 'ETH', 'BCH', 'LTC', 'XRP')]),
+        'activeOrders': response({'pagination': pagination,
+                                  'list': [{'rootOrderId': i, 'orderId': i, 'symbol': 'BTC_JPY', 'side': 'BUY',
+                                            'orderType': 'NORMAL', 'executionType': 'LIMIT', 'settleType': 'OPEN',
+                                            'size': size(), 'executedSize': '0', 'price': price(),
+                                            'losscutPrice': '0', 'status': 'ORDERED', 'timeInForce': 'FAS',
+                                            'timestamp': timestamp} for i in range(rows)]}),
+        'latestExecutions': response({'pagination': pagination,
+                                      'list': [{'executionId': i, 'orderId': i, 'symbol': 'BTC_JPY', 'side': 'BUY',
+                                                'settleType': 'OPEN', 'size': size(), 'price': price(),
+                                                'lossGain': '0', 'fee': '0', 'timestamp': timestamp}
+                                               for i in range(rows)]}),
+        'positionSummary': response({'list': [{'averagePositionRate': price(), 'positionLossGain': '0',
+                                               'side': side, 'sumOrderQuantity': size(),
+                                               'sumPositionQuantity': size(), 'symbol': 'BTC_JPY'}
+                                              for side in ('BUY', 'SELL')]}),
+        'order': response(1234567),
+    }
@@ -0,0 +1,75 @@
+#!python3
+import argparse
+import json
+import sys
+from typing import List
+
+from .common.const import GMOConst
+from .common.dto import Symbol
+from .common.ratelimit import RateLimiter
+
+
+def _record(args: argparse.Namespace) -> int:
+    """
+    recordサブコマンドを実行します。
+    """
+    from .public.api import Client
+    from .public.recorder import MarketDataRecorder
+
+    recorder = MarketDataRecorder([Symbol(s) for s in args.symbols], args.out,
+                                  client=Client(rate_limiter=RateLimiter(args.rate)), interval=args.interval,
+                                  ticker=not args.no_ticker, orderbooks=not args.no_orderbooks,
+                                  trades=not args.no_trades, depth=args.depth, max_rows=args.max_rows,
+                                  flush_interval=args.flush_interval, format=args.format,
+                                  max_trade_pages=args.max_trade_pages)
+
+    def on_stats(report):
+        print(json.dumps(report), file=sys.stderr, flush=True)
+
+    try:
+        recorder.run(duration=args.duration, stats_interval=args.stats_interval, on_stats=on_stats)
+    except KeyboardInterrupt:
+        recorder.flush()
+    on_stats(recorder.report())
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    gmocoinコマンドのエントリーポイントです。
+
+    Args:
+        argv:
+            コマンドライン引数。指定しない場合はsys.argv。
+
+    Returns:
+        終了コード
+    """
+    parser = argparse.ArgumentParser(prog='gmocoin')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='銘柄レート・板情報・約定履歴をファイルに記録する')
+    record.add_argument('--symbols', nargs='+', required=True, choices=[s.value for s in Symbol])
+    record.add_argument('--out', required=True, help='出力先ディレクトリ')
+    record.add_argument('--interval', type=float, default=1.0, help='1巡あたりの最短間隔秒数')
+    record.add_argument('--depth', type=int, default=20, help='記録する板情報の段数')
+    record.add_argument('--no-ticker', action='store_true')
+    record.add_argument('--no-orderbooks', action='store_true')
+    record.add_argument('--no-trades', action='store_true')
+    record.add_argument('--format', choices=['parquet', 'csv'], default=None,
+                        help='指定しない場合はpyarrowがあればparquet')
+    record.add_argument('--duration', type=float, default=None, help='記録する秒数')
+    record.add_argument('--max-rows', type=int, default=50000, help='種別・銘柄ごとにバッファする最大行数')
+    record.add_argument('--flush-interval', type=float, default=60.0, help='ファイルに書き出す最長の間隔秒数')
+    record.add_argument('--max-trade-pages', type=int, default=10,
+                        help='1巡で遡る約定履歴の最大ページ数(遡りきれない場合は統計のgapsに記録する)')
+    record.add_argument('--stats-interval', type=float, default=60.0, help='統計を出力する間隔秒数')
+    record.add_argument('--rate', type=float, default=GMOConst.API_RATE_LIMIT, help='1秒あたりのリクエスト上限')
+    record.set_defaults(func=_record)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,22 +1,58 @@
 #!python3
-from functools import wraps
+from functools import wraps, lru_cache
 from time import sleep
-from requests import Response
+from marshmallow import fields
+from requests import Response, RequestException, Timeout
 
-from .exception import GmoCoinException
+from .exception import GmoCoinException, GmoCoinTimeoutException
+from .deadline import deadline, current_deadline, request_timeout
 from .dto import ErrorResponseResSchema
+from .json_backend import response_json
 
 
-def post_request(Schema, interval: float=0.5, retry_count: int=10):
+def _build_nested(schema) -> None:
+    """
+    Nestedフィールドのスキーマを生成します。
+    Nestedのスキーマは初回参照時に生成されるため、スレッド間で共有する前に生成しておく。
+    """
+    for field in schema.fields.values():
+        if isinstance(field, fields.Nested):
+            _build_nested(field.schema)
+
+
+@lru_cache(maxsize=None)
+def get_schema(Schema):
+    """
+    スキーマクラスのインスタンスを返します。
+    インスタンスはスキーマクラスごとに1度だけ生成し、以降は同じインスタンスを返す。
+    loadは状態を持たないため、複数スレッドから同時に使用できる。
+
+    Args:
+        Schema:
+            スキーマクラス
+    Returns:
+        Schemaのインスタンス
+    """
+    schema = Schema()
+    _build_nested(schema)
+    return schema
+
+
+def post_request(Schema, interval: float=0.5, retry_count: int=10, group: str='default'):
     """
     リクエスト後の処理を実施するラッパー関数。
         ステータス200のチェック
         1秒間のリクエスト上限を超えた場合のリトライをする
+        クライアントにレートリミッターが設定されている場合、リクエスト毎にトークンを取得する
+        クライアントにサーキットブレーカーが設定されている場合、OPEN中はリクエストせずに失敗する
+        キーワード引数timeout(省略時はクライアントの既定値)で、リトライを含む全体の期限を設定する
     Args:
         interval:
             リトライ間隔秒数
         retry_count:
             リトライ回数
+        group:
+            サーキットブレーカーのエンドポイントグループ名
     Returns:
         _decoratorの返り値
     """
@@ -44,29 +80,105 @@ def post_request(Schema, interval: float=0.5, retry_count: int=10):
                 funcの返り値
             """
 
+            # args[0]はクライアントのインスタンス
+            client = args[0] if len(args) > 0 else None
+            timeout = kwargs.pop('timeout', getattr(client, '_timeout', None))
+
+            with deadline(timeout):
+                return _request(client, *args, **kwargs)
+
+        def _request(client, *args, **kwargs):
+            """
+            サーキットブレーカーで送信可否を判定し、リクエストを実行します。
+
+            Args:
+                client:
+                    クライアントのインスタンス
+                *args, **kwargs:
+                    funcの引数
+            Returns:
+                funcの返り値
+            """
+            rate_limiter = getattr(client, '_rate_limiter', None)
+            circuit_breaker = getattr(client, '_circuit_breaker', None)
+
+            probing = False
+            if circuit_breaker is not None:
+                probing = circuit_breaker.before_request(group, transport=getattr(client, 'transport', None))
+            try:
+                return _attempt(client, rate_limiter, circuit_breaker, *args, **kwargs)
+            finally:
+                if probing:
+                    # HALF_OPENの試行が成功・失敗を記録せずに終わった場合はOPENに戻す
+                    circuit_breaker.release(group)
+
+        def _attempt(client, rate_limiter, circuit_breaker, *args, **kwargs):
+            """
+            リトライを含むリクエストを送信します。
+
+            Args:
+                client:
+                    クライアントのインスタンス
+                rate_limiter:
+                    レートリミッター
+                circuit_breaker:
+                    サーキットブレーカー
+                *args, **kwargs:
+                    funcの引数
+            Returns:
+                funcの返り値
+            """
             for i in range(retry_count):
+                if rate_limiter is not None:
+                    if not rate_limiter.acquire(timeout=request_timeout()):
+                        raise GmoCoinTimeoutException(current_deadline().timeout)
+
                 # funcの実行
-                ret = func(*args, **kwargs)
+                try:
+                    ret = func(*args, **kwargs)
+                except RequestException as err:
+                    if circuit_breaker is not None:
+                        circuit_breaker.record_failure(group)
+                    if isinstance(err, Timeout) and current_deadline() is not None:
+                        raise GmoCoinTimeoutException(current_deadline().timeout) from err
+                    raise
+
                 if type(ret) != Response:
                     return ret
 
                 if ret.status_code != 200:
+                    if circuit_breaker is not None and ret.status_code >= 500:
+                        circuit_breaker.record_failure(group)
                     raise GmoCoinException(ret.status_code)
 
-                res_json = ret.json()
+                res_json = response_json(ret)
 
                 if res_json['status'] != 0:
-                    if res_json['messages'][0]['message_code'] == 'ERR-5003':
+                    message_code = res_json['messages'][0]['message_code']
+                    if message_code == 'ERR-5003':
+                        remaining = request_timeout()
+                        if remaining is not None and remaining <= interval:
+                            # 期限までにリトライできないため、待たずに失敗する
+                            raise GmoCoinTimeoutException(current_deadline().timeout)
                         sleep(interval)
-                    else:
-                        raise GmoCoinException(ret.status_code, 
-                                               messageg=ErrorResponseResSchema().load(res_json))
+                        continue
+
+                    if circuit_breaker is not None:
+                        if message_code == 'ERR-5201':
+                            # メンテナンス中は全グループを即時にOPENにする
+                            circuit_breaker.trip()
+                        else:
+                            circuit_breaker.record_success(group)
+                    raise GmoCoinException(ret.status_code, 
+                                           messageg=get_schema(ErrorResponseResSchema).load(res_json))
                 else:
-                    return Schema().load(res_json)
+                    if circuit_breaker is not None:
+                        circuit_breaker.record_success(group)
+                    return get_schema(Schema).load(res_json)
 
             if res_json['status'] != 0:
                 raise GmoCoinException(ret.status_code, 
-                                       messageg=ErrorResponseResSchema().load(res_json))
+                                       messageg=get_schema(ErrorResponseResSchema).load(res_json))
 
         return wrapper
     return _decorator
\ No newline at end of file
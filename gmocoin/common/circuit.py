@@ -0,0 +1,252 @@
+#!python3
+import threading
+import time
+from enum import Enum
+
+from .exception import CircuitOpenException
+from .logging import get_logger
+
+
+logger = get_logger()
+
+
+class CircuitState(Enum):
+    """
+    サーキットブレーカーの状態を示します。
+    """
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+
+def get_status_probe(timeout: float = 5.0, transport=None) -> bool:
+    """
+    取引所の稼動状態を確認する既定のプローブ関数です。
+
+    Args:
+        timeout:
+            期限秒数
+        transport:
+            リクエストを送信するトランスポート。CircuitBreakerはリクエスト元のクライアントのトランスポートを渡す。
+
+    Returns:
+        取引所がOPENの場合はTrue
+    """
+    # MEMO: 循環importを避けるため、ここでimportする
+    from ..public.api import Client
+    from .dto import Status
+
+    return Client(timeout=timeout, transport=transport).get_status().data.status == Status.OPEN
+
+
+class _Circuit:
+    """
+    エンドポイントグループごとの状態を保持するクラスです。
+    """
+    def __init__(self) -> None:
+        """
+        コンストラクタです。
+        """
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+
+class CircuitBreaker:
+    '''
+    エンドポイントグループごとのサーキットブレーカークラスです。
+    連続失敗回数が閾値に達するか、メンテナンス中(ERR-5201)を検知するとOPENになり、
+    recovery_timeout秒の間はリクエストを送信せずにCircuitOpenExceptionを送出します。
+    経過後はHALF_OPENとなり、プローブ(既定はget_status)が成功した場合にCLOSEDへ戻ります。
+    全グループを対象にOPENにした場合は、まだ使用していないグループも同じ時刻にOPENになったものとして扱います。
+    '''
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 probe=get_status_probe, on_state_change=None, probe_timeout: float = 5.0) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            failure_threshold:
+                OPENにする連続失敗回数を設定します。
+            recovery_timeout:
+                OPENからHALF_OPENにするまでの秒数を設定します。
+            probe:
+                HALF_OPEN時に呼び出す関数を設定します。Trueを返した場合にCLOSEDへ戻す。
+                Noneの場合は最初のリクエストをそのまま試行する。
+            on_state_change:
+                状態変化時に(グループ名, 変化前の状態, 変化後の状態)で呼び出す関数を設定します。
+            probe_timeout:
+                既定のプローブ(get_status_probe)の期限秒数を設定します。
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe = probe
+        self.on_state_change = on_state_change
+        self.probe_timeout = probe_timeout
+        self._circuits = {}
+        # 全グループを対象にOPENにした時刻
+        self._tripped_at = None
+        self._lock = threading.RLock()
+
+    def _circuit(self, group: str) -> _Circuit:
+        """
+        グループの状態を返します。存在しない場合は作成します。ロック取得済みで呼び出すこと。
+        """
+        circuit = self._circuits.get(group)
+        if circuit is None:
+            circuit = self._circuits[group] = _Circuit()
+        if self._tripped_at is not None and circuit.opened_at < self._tripped_at:
+            # 全グループを対象にOPENにした後、初めて参照したグループ
+            self._transition(group, circuit, CircuitState.OPEN)
+            circuit.opened_at = self._tripped_at
+        return circuit
+
+    def _transition(self, group: str, circuit: _Circuit, state: CircuitState) -> None:
+        """
+        状態を変更し、フックを呼び出します。
+        """
+        old = circuit.state
+        if old == state:
+            return
+        circuit.state = state
+        if state == CircuitState.OPEN:
+            circuit.opened_at = time.monotonic()
+        elif state == CircuitState.CLOSED:
+            circuit.failures = 0
+        logger.info(f'circuit {group}: {old.value} -> {state.value}')
+        if self.on_state_change is not None:
+            try:
+                self.on_state_change(group, old, state)
+            except Exception as err:
+                logger.error(f'circuit state hook failed: {err!r}')
+
+    def state(self, group: str) -> CircuitState:
+        """
+        グループの状態を返します。
+
+        Args:
+            group:
+                エンドポイントグループ名
+
+        Returns:
+            CircuitState
+        """
+        with self._lock:
+            return self._circuit(group).state
+
+    def before_request(self, group: str, transport=None) -> bool:
+        """
+        リクエスト前に呼び出し、送信可否を判定します。
+
+        Args:
+            group:
+                エンドポイントグループ名
+            transport:
+                既定のプローブに渡すトランスポート
+
+        Returns:
+            probeがNoneで、このリクエストをHALF_OPENの試行として送信する場合True。
+            Trueの場合は、結果に関わらずリクエスト後にreleaseを呼び出すこと。
+
+        Raises:
+            CircuitOpenException:
+                OPEN中、またはHALF_OPENでプローブが失敗した場合
+        """
+        with self._lock:
+            circuit = self._circuit(group)
+            if circuit.state == CircuitState.CLOSED:
+                return False
+            retry_after = circuit.opened_at + self.recovery_timeout - time.monotonic()
+            if circuit.state == CircuitState.OPEN and retry_after > 0:
+                raise CircuitOpenException(group, retry_after)
+            if circuit.probing:
+                # 他のスレッドがプローブ中の場合は即時失敗とする
+                raise CircuitOpenException(group, 0.0)
+            self._transition(group, circuit, CircuitState.HALF_OPEN)
+            circuit.probing = True
+            if self.probe is None:
+                return True
+
+        try:
+            if self.probe is get_status_probe:
+                ok = bool(self.probe(timeout=self.probe_timeout, transport=transport))
+            else:
+                ok = bool(self.probe())
+        except Exception as err:
+            logger.error(f'circuit probe failed ({group}): {err!r}')
+            ok = False
+
+        with self._lock:
+            circuit.probing = False
+            if ok:
+                self._transition(group, circuit, CircuitState.CLOSED)
+                return False
+            self._transition(group, circuit, CircuitState.OPEN)
+        raise CircuitOpenException(group, self.recovery_timeout)
+
+    def record_success(self, group: str) -> None:
+        """
+        リクエストの成功を記録します。
+
+        Args:
+            group:
+                エンドポイントグループ名
+        """
+        with self._lock:
+            circuit = self._circuit(group)
+            circuit.failures = 0
+            circuit.probing = False
+            self._transition(group, circuit, CircuitState.CLOSED)
+
+    def record_failure(self, group: str) -> None:
+        """
+        リクエストの失敗を記録します。
+
+        Args:
+            group:
+                エンドポイントグループ名
+        """
+        with self._lock:
+            circuit = self._circuit(group)
+            circuit.failures += 1
+            circuit.probing = False
+            if circuit.state == CircuitState.HALF_OPEN or circuit.failures >= self.failure_threshold:
+                self._transition(group, circuit, CircuitState.OPEN)
+
+    def release(self, group: str) -> None:
+        """
+        HALF_OPENの試行として送信したリクエストの後に呼び出します。
+        成功・失敗を記録せずに終わった場合(4xx、期限切れ、リトライ上限、その他の例外)は失敗として扱い、OPENに戻します。
+
+        Args:
+            group:
+                エンドポイントグループ名
+        """
+        with self._lock:
+            circuit = self._circuit(group)
+            if not circuit.probing:
+                return
+            circuit.probing = False
+            self._transition(group, circuit, CircuitState.OPEN)
+
+    def trip(self, group: str = None) -> None:
+        """
+        即時にOPENにします。メンテナンス検知時に使用します。
+
+        Args:
+            group:
+                エンドポイントグループ名。指定しない場合は全グループをOPENにする。
+        """
+        with self._lock:
+            groups = [group] if group is not None else list(self._circuits)
+            if group is None:
+                # まだ使用していないグループも_circuitでOPENにする
+                self._tripped_at = time.monotonic()
+            for g in groups:
+                circuit = self._circuit(g)
+                circuit.probing = False
+                self._transition(g, circuit, CircuitState.OPEN)
+                # 既にOPENの場合も待ち時間を延長する
+                circuit.opened_at = time.monotonic()
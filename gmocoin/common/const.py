@@ -19,3 +19,7 @@ class GMOConst(metaclass=ConstMeta):
     END_POINT = 'https://api.coin.z.com/'
     END_POINT_PUBLIC = END_POINT+'public/v1/'
     END_POINT_PRIVATE = END_POINT+'private'
+    # 日次の約定履歴ファイル
+    END_POINT_DATA = END_POINT+'data/trades/'
+    # 1秒あたりのAPI呼出上限回数
+    API_RATE_LIMIT = 6
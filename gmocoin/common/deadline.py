@@ -0,0 +1,102 @@
+#!python3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .exception import GmoCoinTimeoutException
+
+
+class Deadline:
+    '''
+    リクエスト全体(接続・読込み・リトライ)の期限を表すクラスです。
+    '''
+
+    def __init__(self, timeout: float) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            timeout:
+                現在からの期限秒数を設定します。
+        """
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """
+        期限までの残り秒数を返します。
+
+        Returns:
+            float
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self) -> float:
+        """
+        期限切れの場合は例外を送出し、そうでない場合は残り秒数を返します。
+
+        Returns:
+            float
+
+        Raises:
+            GmoCoinTimeoutException
+        """
+        remaining = self.remaining()
+        if remaining <= 0.0:
+            raise GmoCoinTimeoutException(self.timeout)
+        return remaining
+
+
+_current_deadline = ContextVar('gmocoin_deadline', default=None)
+
+
+def current_deadline() -> Deadline:
+    """
+    現在のコンテキストの期限を返します。
+
+    Returns:
+        Deadline。期限が無い場合はNone。
+    """
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline(timeout: float):
+    """
+    ブロック内のAPI呼び出し全体に期限を設定するコンテキストマネージャーです。
+    既に期限が設定されている場合は、より早い方の期限を使用します。
+
+    Args:
+        timeout:
+            期限秒数。Noneの場合は期限を変更しない。
+
+    Yields:
+        Deadline
+    """
+    outer = _current_deadline.get()
+    if timeout is None or (outer is not None and outer.remaining() <= timeout):
+        yield outer
+        return
+
+    token = _current_deadline.set(Deadline(timeout))
+    try:
+        yield _current_deadline.get()
+    finally:
+        _current_deadline.reset(token)
+
+
+def request_timeout():
+    """
+    requestsに指定するタイムアウトを現在の期限から計算します。
+
+    Returns:
+        期限が無い場合はNone、ある場合は残り秒数
+
+    Raises:
+        GmoCoinTimeoutException:
+            既に期限切れの場合
+    """
+    current = _current_deadline.get()
+    if current is None:
+        return None
+    return current.check()
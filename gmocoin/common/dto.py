@@ -32,6 +32,10 @@ class Symbol(Enum):
     XRP_JPY = 'XRP_JPY'
 
 
+# レバレッジ取引の銘柄
+LEVERAGE_SYMBOLS = (Symbol.BTC_JPY, Symbol.ETH_JPY, Symbol.BCH_JPY, Symbol.LTC_JPY, Symbol.XRP_JPY)
+
+
 class AssetSymbol(Enum):
     """
     資産銘柄種別を示します。
@@ -144,7 +148,7 @@ class BaseResponse:
     """
     ベースレスポンスクラスです。
     """
-    def __init__(self, status: int, responsetime: datetime) -> None:
+    def __init__(self, status: int, responsetime: datetime = None) -> None:
         """
         コンストラクタです。
 
@@ -153,9 +157,10 @@ class BaseResponse:
                 ステータスコードを設定します。
             responsetime :
                 レスポンスタイムを設定します。
+                メンテナンス中のレスポンスには含まれないため、その場合はNoneとなる。
         """
         self.status = status
-        self.responsetime = responsetime.astimezone(timezone('Asia/Tokyo'))
+        self.responsetime = None if responsetime is None else responsetime.astimezone(timezone('Asia/Tokyo'))
 
 
 class BaseResponseSchema(BaseSchema):
@@ -197,7 +202,7 @@ class ErrorResponse(BaseResponse):
     """
     メッセージレスポンスクラスです。
     """
-    def __init__(self, status: int, responsetime: str,  messages: List[Message]) -> None:
+    def __init__(self, status: int, responsetime: str = None,  messages: List[Message] = None) -> None:
         """
         コンストラクタです。
 
@@ -20,3 +20,93 @@ class GmoCoinException(Exception):
         """
         self.status_code = status_code
         self.messageg = messageg
+
+
+class CircuitOpenException(GmoCoinException):
+    """
+    サーキットブレーカーがOPENのため、リクエストを送信しなかったことを示す例外クラスです。
+    """
+
+    def __init__(self, group: str, retry_after: float):
+        """
+        コンストラクタです。
+
+        Args:
+            group:
+                エンドポイントグループ名を設定します。
+            retry_after:
+                再試行可能になるまでの目安の秒数を設定します。
+
+        """
+        super().__init__(status_code=None)
+        self.group = group
+        self.retry_after = retry_after
+
+    def __str__(self) -> str:
+        return f'circuit open ({self.group}), retry after {self.retry_after:.1f}s'
+
+
+class GmoCoinTimeoutException(GmoCoinException):
+    """
+    期限までにリクエスト(リトライを含む)が完了しなかったことを示す例外クラスです。
+    """
+
+    def __init__(self, timeout: float):
+        """
+        コンストラクタです。
+
+        Args:
+            timeout:
+                指定された期限の秒数を設定します。
+
+        """
+        super().__init__(status_code=None)
+        self.timeout = timeout
+
+    def __str__(self) -> str:
+        return f'deadline exceeded ({self.timeout:.3f}s)'
+
+
+class ReplayMissException(GmoCoinException):
+    """
+    リプレイ時に一致するリクエストの記録が無いことを示す例外クラスです。
+    """
+
+    def __init__(self, method: str, url: str):
+        """
+        コンストラクタです。
+
+        Args:
+            method:
+                リクエストのメソッドを設定します。
+            url:
+                リクエスト先のURLを設定します。
+
+        """
+        super().__init__(status_code=None)
+        self.method = method
+        self.url = url
+
+    def __str__(self) -> str:
+        return f'no recorded response for {self.method} {self.url}'
+
+
+class PreTradeRejectedException(GmoCoinException):
+    """
+    発注前の確認で注文を拒否したため、リクエストを送信しなかったことを示す例外クラスです。
+    """
+
+    def __init__(self, reason: str):
+        """
+        コンストラクタです。
+
+        Args:
+            reason:
+                拒否した理由を設定します。
+
+        """
+        super().__init__(status_code=None)
+        self.reason = reason
+
+    def __str__(self) -> str:
+        return f'order rejected before sending: {self.reason}'
@@ -0,0 +1,186 @@
+#!python3
+import json
+import os
+
+from requests import Response
+
+
+class JsonBackend:
+    '''
+    JSONのエンコード/デコード処理をまとめたバックエンドクラスです。
+    '''
+
+    def __init__(self, name: str, loads, dumps) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            name:
+                バックエンド名を設定します。
+            loads:
+                bytesまたはstrをデコードする関数を設定します。
+            dumps:
+                オブジェクトをstrにエンコードする関数を設定します。
+        """
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+
+def _stdlib_dumps(obj) -> str:
+    """
+    標準ライブラリのjsonでエンコードします。
+    区切り文字は高速バックエンドと同じく空白なしとします。
+    """
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _create_orjson() -> JsonBackend:
+    """
+    orjsonバックエンドを生成します。
+    """
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    return JsonBackend('orjson', orjson.loads, _dumps)
+
+
+def _create_simdjson() -> JsonBackend:
+    """
+    simdjsonバックエンドを生成します。
+    """
+    import simdjson
+
+    # MEMO: simdjsonはパース専用のため、エンコードは標準ライブラリを使用する
+    return JsonBackend('simdjson', simdjson.loads, _stdlib_dumps)
+
+
+def _create_json() -> JsonBackend:
+    """
+    標準ライブラリのjsonバックエンドを生成します。
+    """
+    return JsonBackend('json', json.loads, _stdlib_dumps)
+
+
+# 優先順位順のバックエンド生成関数
+_BACKEND_FACTORIES = {
+    'orjson': _create_orjson,
+    'simdjson': _create_simdjson,
+    'json': _create_json,
+}
+
+_backend = None
+
+# デコード結果をResponseにキャッシュする属性名
+_RESPONSE_CACHE_ATTR = '_gmocoin_json'
+
+
+def available_backends() -> list:
+    """
+    インストール済みで使用可能なバックエンド名の一覧を返します。
+
+    Returns:
+        list
+    """
+    names = []
+    for name, factory in _BACKEND_FACTORIES.items():
+        try:
+            factory()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_backend(name: str = None) -> JsonBackend:
+    """
+    使用するJSONバックエンドを設定します。
+
+    Args:
+        name:
+            orjson simdjson json
+            指定しない場合は環境変数GMOCOIN_JSON_BACKEND、
+            それも無い場合はインストール済みの最速のバックエンドを使用する。
+
+    Returns:
+        JsonBackend
+    """
+    global _backend
+
+    if name is None:
+        name = os.environ.get('GMOCOIN_JSON_BACKEND')
+
+    if name is not None:
+        if name not in _BACKEND_FACTORIES:
+            raise ValueError(f'Unknown json backend ({name})')
+        _backend = _BACKEND_FACTORIES[name]()
+        return _backend
+
+    for factory in _BACKEND_FACTORIES.values():
+        try:
+            _backend = factory()
+            return _backend
+        except ImportError:
+            continue
+
+
+def get_backend() -> JsonBackend:
+    """
+    現在のJSONバックエンドを返します。
+
+    Returns:
+        JsonBackend
+    """
+    if _backend is None:
+        set_backend()
+    return _backend
+
+
+def loads(data):
+    """
+    JSONをデコードします。
+
+    Args:
+        data:
+            bytesまたはstr
+
+    Returns:
+        デコード結果
+    """
+    return get_backend().loads(data)
+
+
+def dumps(obj) -> str:
+    """
+    JSONにエンコードします。
+    署名とリクエストボディで同じ文字列を使用するため、結果は必ずstrで返します。
+
+    Args:
+        obj:
+            エンコード対象
+
+    Returns:
+        str
+    """
+    return get_backend().dumps(obj)
+
+
+def response_json(res: Response):
+    """
+    レスポンスボディをデコードします。
+    デコード結果はResponseにキャッシュし、同じレスポンスを二度デコードしません。
+
+    Args:
+        res:
+            requests.Response
+
+    Returns:
+        デコード結果
+    """
+    cached = res.__dict__.get(_RESPONSE_CACHE_ATTR)
+    if cached is None:
+        cached = loads(res.content)
+        setattr(res, _RESPONSE_CACHE_ATTR, cached)
+    return cached
@@ -0,0 +1,79 @@
+#!python3
+import threading
+import time
+
+
+class RateLimiter:
+    '''
+    トークンバケット方式のレートリミッタークラスです。
+    スレッドセーフで、複数のクライアント・スレッドから共有できます。
+    '''
+
+    def __init__(self, rate: float, burst: int = None) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            rate:
+                1秒あたりに許可するリクエスト数を設定します。
+            burst:
+                連続して許可するリクエスト数の上限を設定します。
+                指定しない場合はrateを切り上げた値を使用する。
+        """
+        if rate <= 0:
+            raise ValueError(f'rate must be positive ({rate})')
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(-(-rate // 1)))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """
+        経過時間分のトークンを補充します。ロック取得済みで呼び出すこと。
+        """
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """
+        トークンの取得を試みます。
+
+        Args:
+            tokens:
+                取得するトークン数
+
+        Returns:
+            取得できた場合は0、できなかった場合は取得可能になるまでの待ち秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: int = 1, timeout: float = None) -> bool:
+        """
+        トークンを取得できるまで待機します。
+
+        Args:
+            tokens:
+                取得するトークン数
+            timeout:
+                最大待ち秒数。指定しない場合は取得できるまで待機する。
+
+        Returns:
+            トークンを取得できた場合はTrue
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait:
+                    return False
+            time.sleep(wait)
@@ -0,0 +1,228 @@
+#!python3
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from .const import GMOConst
+from .logging import get_logger
+from .ratelimit import RateLimiter
+
+
+logger = get_logger()
+
+
+class PollJob:
+    """
+    PollSchedulerで定期的に実行するポーリングジョブクラスです。
+    """
+    def __init__(self, name: str, func: Callable[[], Any], freshness: float, priority: float = 1.0,
+                 on_result: Callable[[Any], None] = None, on_error: Callable[[Exception], None] = None,
+                 cost: int = 1) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            name:
+                ジョブ名を設定します。
+            func:
+                リクエストを送信する関数を設定します。例: lambda: client.get_orderbooks(Symbol.BTC)
+            freshness:
+                データの鮮度の目標(前回の実行からの秒数)を設定します。この秒数が経過するまで再実行しない。
+            priority:
+                優先度を設定します。リクエスト数の上限が足りない場合、優先度と目標に対する遅れの積が大きいジョブから実行する。
+            on_result:
+                funcの結果を受け取る関数を設定します。
+            on_error:
+                funcが送出した例外を受け取る関数を設定します。指定しない場合はログ出力のみ行う。
+            cost:
+                1回の実行で送信するリクエスト数を設定します。PollSchedulerのレートリミッターのburst以下であること。
+        """
+        if freshness <= 0:
+            raise ValueError(f'freshness must be positive ({freshness})')
+        self.name = name
+        self.func = func
+        self.freshness = freshness
+        self.priority = priority
+        self.on_result = on_result
+        self.on_error = on_error
+        self.cost = cost
+        self.last_run = None
+        self.runs = 0
+        self.errors = 0
+        self.max_age = 0.0
+
+    def age(self, now: float) -> float:
+        """
+        前回の実行からの経過秒数を返します。未実行の場合はinf。
+        """
+        return float('inf') if self.last_run is None else now - self.last_run
+
+    def urgency(self, now: float) -> float:
+        """
+        優先度と鮮度の目標に対する経過時間の比の積を返します。
+        """
+        return self.priority * self.age(now) / self.freshness
+
+
+class PollScheduler:
+    '''
+    複数のポーリングジョブを、共有するリクエスト数の上限の範囲で実行するスケジューラークラスです。
+
+    鮮度の目標を過ぎたジョブのうち、優先度と目標に対する遅れの積が最も大きいものから、
+    レートリミッターのトークンを取得して1件ずつ実行します。上限に余裕がある場合は各ジョブを目標の間隔で実行し、
+    足りない場合は優先度の低いジョブの間隔を自動的に延ばすため、固定の待ち時間を調整する必要がありません。
+
+    ジョブの関数で使用するクライアントには、同じレートリミッターを二重に取得しないよう
+    rate_limiterを指定しないでください。発注など他のリクエストと上限を共有する場合は、
+    同じRateLimiterを他のクライアントに指定します。
+    '''
+
+    def __init__(self, jobs: List[PollJob] = None, rate_limiter: RateLimiter = None) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            jobs:
+                ポーリングジョブを設定します。
+            rate_limiter:
+                共有するレートリミッターを設定します。指定しない場合はGMOConst.API_RATE_LIMITで作成する。
+        """
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(GMOConst.API_RATE_LIMIT)
+        for job in jobs or []:
+            self._check(job)
+        self.jobs = list(jobs or [])
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _check(self, job: PollJob) -> None:
+        """
+        ジョブのリクエスト数がレートリミッターのburst以下であることを確認します。
+        超える場合はトークンを取得できず、他のジョブも実行されなくなるためValueErrorを送出します。
+        """
+        if job.cost > self.rate_limiter.burst:
+            raise ValueError(f'cost of {job.name} ({job.cost}) exceeds the rate limiter burst '
+                             f'({self.rate_limiter.burst})')
+
+    def add(self, job: PollJob) -> PollJob:
+        """
+        ポーリングジョブを追加します。
+        """
+        self._check(job)
+        with self._lock:
+            self.jobs.append(job)
+        return job
+
+    def remove(self, name: str) -> None:
+        """
+        ジョブ名のポーリングジョブを削除します。
+        """
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.name != name]
+
+    def demand(self) -> float:
+        """
+        全ジョブを鮮度の目標どおりに実行した場合の1秒あたりのリクエスト数を返します。
+        レートリミッターのrateを超える場合、優先度の低いジョブは目標より遅れます。
+        """
+        return sum(job.cost / job.freshness for job in self.jobs)
+
+    def _next(self, now: float):
+        """
+        次に実行するジョブと、実行できるジョブが無い場合の待ち秒数を返します。
+        """
+        with self._lock:
+            jobs = list(self.jobs)
+        if len(jobs) == 0:
+            return None, 1.0
+        due = [job for job in jobs if job.age(now) >= job.freshness]
+        if len(due) == 0:
+            return None, min(job.freshness - job.age(now) for job in jobs)
+        return max(due, key=lambda job: job.urgency(now)), 0.0
+
+    def step(self) -> float:
+        """
+        実行できるジョブを1件実行します。
+
+        Returns:
+            ジョブを実行した場合は0、実行できなかった場合は次に実行できるまでの待ち秒数
+        """
+        job, wait = self._next(time.monotonic())
+        if job is None:
+            return wait
+        wait = self.rate_limiter.try_acquire(job.cost)
+        if wait > 0:
+            return wait
+
+        now = time.monotonic()
+        if job.last_run is not None:
+            job.max_age = max(job.max_age, now - job.last_run)
+        job.last_run = now
+        job.runs += 1
+        try:
+            result = job.func()
+            if job.on_result is not None:
+                job.on_result(result)
+        except Exception as err:
+            # MEMO: on_resultの例外もジョブのエラーとして扱い、実行スレッドを止めない
+            job.errors += 1
+            if job.on_error is not None:
+                job.on_error(err)
+            else:
+                logger.error(f'polling job failed ({job.name}): {err!r}')
+        return 0.0
+
+    def report(self) -> Dict[str, dict]:
+        """
+        ジョブごとの実行状況を返します。
+
+        Returns:
+            {ジョブ名: {'runs', 'errors', 'freshness', 'age', 'max_age'}}。
+            max_ageは実行間隔の最大値で、freshnessを大きく超える場合はリクエスト数の上限が不足している。
+        """
+        now = time.monotonic()
+        with self._lock:
+            jobs = list(self.jobs)
+        return {job.name: {'runs': job.runs, 'errors': job.errors, 'freshness': job.freshness,
+                           'age': job.age(now), 'max_age': job.max_age} for job in jobs}
+
+    def run(self, duration: float = None) -> None:
+        """
+        stopが呼ばれるまで(durationを指定した場合はその秒数だけ)ジョブを実行します。
+        """
+        if self.demand() > self.rate_limiter.rate:
+            logger.warning(f'polling demand {self.demand():.1f}/s exceeds the rate limit '
+                           f'{self.rate_limiter.rate}/s; low priority jobs will be delayed')
+        deadline = None if duration is None else time.monotonic() + duration
+        while not self._stop.is_set():
+            wait = self.step()
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                wait = min(wait, remaining)
+            if wait > 0:
+                self._stop.wait(wait)
+
+    def start(self) -> None:
+        """
+        バックグラウンドスレッドでジョブの実行を開始します。
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='PollScheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        ジョブの実行を停止します。
+
+        Args:
+            timeout:
+                スレッド終了を待つ最大秒数
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
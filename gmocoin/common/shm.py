@@ -0,0 +1,28 @@
+#!python3
+import sys
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+
+def attach_shared_memory(name: str) -> SharedMemory:
+    """
+    既存の共有メモリに接続します。
+    接続側のプロセス終了時に共有メモリが削除されないよう、resource_trackerには登録しません。
+
+    Args:
+        name:
+            共有メモリ名
+
+    Returns:
+        SharedMemory
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+
+    # MEMO: 3.12以前は接続時にもresource_trackerへ登録されるため、登録処理を一時的に無効化する
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
@@ -0,0 +1,253 @@
+#!python3
+import base64
+import gzip
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+import requests
+from requests import Response
+
+from .exception import ReplayMissException
+from .json_backend import loads, dumps
+
+
+# 記録時に値を伏せるリクエストヘッダー
+REDACTED_HEADERS = ('API-KEY', 'API-SIGN')
+
+
+class HttpTransport:
+    '''
+    requests.Sessionでリクエストを送信するトランスポートクラスです。
+    複数のクライアントで共有することでコネクションを再利用できます。
+    '''
+
+    def __init__(self, session: requests.Session = None) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            session:
+                使用するセッションを設定します。指定しない場合は新規に作成する。
+        """
+        self.session = session if session is not None else requests.Session()
+
+    def request(self, method: str, url: str, headers: dict = None, params: dict = None,
+                data: str = None, timeout: float = None) -> Response:
+        """
+        リクエストを送信します。
+
+        Args:
+            method:
+                GETまたはPOST
+            url:
+                リクエスト先のURL
+            headers:
+                リクエストヘッダー
+            params:
+                クエリパラメータ
+            data:
+                リクエストボディ
+            timeout:
+                タイムアウト秒数
+
+        Returns:
+            Response
+        """
+        return self.session.request(method, url, headers=headers, params=params, data=data, timeout=timeout)
+
+    def close(self) -> None:
+        """
+        セッションを閉じます。
+        """
+        self.session.close()
+
+
+def _key(method: str, url: str, params: dict, data: str) -> tuple:
+    """
+    リプレイ時にリクエストを照合するキーを返します。
+    """
+    params = tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+    return (method, url, params, data or None)
+
+
+def to_response(record: dict) -> Response:
+    """
+    記録をResponseに変換します。
+
+    Args:
+        record:
+            iter_recordsで読み込んだ記録
+
+    Returns:
+        Response
+    """
+    res = Response()
+    res.status_code = record['status']
+    if 'content_base64' in record:
+        res._content = base64.b64decode(record['content_base64'])
+    else:
+        res._content = record['content'].encode('utf-8')
+        res.encoding = 'utf-8'
+    res.url = record['url']
+    # MEMO: レスポンスヘッダーを記録していない古い記録はJSONとして扱う
+    res.headers.update(record.get('response_headers', {'Content-Type': 'application/json'}))
+    res.elapsed = timedelta(seconds=record['elapsed'])
+    return res
+
+
+def iter_records(path: str):
+    """
+    記録ファイルを読み込みます。
+
+    Args:
+        path:
+            RecordingTransportで記録したファイルパス
+
+    Yields:
+        記録(method url params data headers status content(またはcontent_base64) response_headers elapsed t)
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+class RecordingTransport:
+    '''
+    リクエストとレスポンスの組をgzip圧縮したJSON Linesで記録するトランスポートクラスです。
+    APIキーと署名は記録しません。UTF-8で復号できないレスポンス(日次約定履歴ファイル等)はBase64で記録します。
+    '''
+
+    def __init__(self, path: str, transport=None) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            path:
+                記録ファイルパスを設定します。既存のファイルには追記する。
+            transport:
+                実際にリクエストを送信するトランスポートを設定します。指定しない場合はHttpTransport。
+        """
+        self.transport = transport if transport is not None else HttpTransport()
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, headers: dict = None, params: dict = None,
+                data: str = None, timeout: float = None) -> Response:
+        """
+        リクエストを送信し、結果を記録します。引数はHttpTransport.requestと同じです。
+
+        Returns:
+            Response
+        """
+        sent = time.monotonic()
+        res = self.transport.request(method, url, headers=headers, params=params, data=data, timeout=timeout)
+        elapsed = time.monotonic() - sent
+
+        record = {'t': round(sent - self._started, 6), 'method': method, 'url': url,
+                  'params': {k: str(v) for k, v in (params or {}).items()}, 'data': data,
+                  'headers': {k: ('***' if k in REDACTED_HEADERS else v) for k, v in (headers or {}).items()},
+                  'status': res.status_code, 'response_headers': dict(res.headers), 'elapsed': round(elapsed, 6)}
+        try:
+            record['content'] = res.content.decode('utf-8')
+        except UnicodeDecodeError:
+            record['content_base64'] = base64.b64encode(res.content).decode('ascii')
+        with self._lock:
+            self._file.write(dumps(record) + '\n')
+        return res
+
+    def close(self) -> None:
+        """
+        記録ファイルを閉じます。
+        """
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport:
+    '''
+    RecordingTransportで記録したレスポンスを返すトランスポートクラスです。
+    同じリクエストが複数回記録されている場合は記録順に返します。
+    '''
+
+    def __init__(self, path: str, speed: float = None, loop: bool = False) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            path:
+                記録ファイルパスを設定します。
+            speed:
+                応答時間の再現倍率を設定します。1.0で記録時と同じ応答時間、2.0で半分の応答時間とする。
+                指定しない場合は待たずに返す。
+            loop:
+                Trueの場合、記録を使い切ったリクエストは先頭から再度返す。
+        """
+        self.speed = speed
+        self.loop = loop
+        self._records = {}
+        for record in iter_records(path):
+            key = _key(record['method'], record['url'], record['params'], record['data'])
+            self._records.setdefault(key, deque()).append(record)
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, headers: dict = None, params: dict = None,
+                data: str = None, timeout: float = None) -> Response:
+        """
+        記録したレスポンスを返します。引数はHttpTransport.requestと同じです。
+
+        Returns:
+            Response
+
+        Raises:
+            ReplayMissException:
+                一致する記録が無い場合
+        """
+        with self._lock:
+            records = self._records.get(_key(method, url, params, data))
+            if not records:
+                raise ReplayMissException(method, url)
+            record = records.popleft()
+            if self.loop:
+                records.append(record)
+
+        if self.speed:
+            elapsed = record['elapsed'] / self.speed
+            if timeout is not None and elapsed > timeout:
+                time.sleep(timeout)
+                raise requests.Timeout(f'replayed response took {elapsed:.3f}s')
+            time.sleep(elapsed)
+        return to_response(record)
+
+    def close(self) -> None:
+        """
+        何もしません。他のトランスポートとインターフェースを揃えるためのメソッドです。
+        """
+        pass
+
+
+def replay_paced(path: str, speed: float = 1.0):
+    """
+    記録をリクエスト送信時刻の間隔を再現して返します。クライアントを介さずにデコード処理等を計測する場合に使用します。
+
+    Args:
+        path:
+            記録ファイルパス
+        speed:
+            再現倍率。2.0で記録時の倍の速さで返す。
+
+    Yields:
+        (記録, Response)
+    """
+    started = time.monotonic()
+    first = None
+    for record in iter_records(path):
+        if first is None:
+            first = record['t']
+        wait = (record['t'] - first) / speed - (time.monotonic() - started)
+        if wait > 0:
+            time.sleep(wait)
+        yield record, to_response(record)
@@ -1,6 +1,5 @@
 #!python3
 import requests
-import json
 import hmac
 import hashlib
 import time
@@ -9,11 +8,19 @@ from datetime import datetime
 from ..common.annotation import post_request
 from ..common.const import GMOConst
 from ..common.logging import get_logger, log
-from ..common.dto import Symbol, SalesSide, ExecutionType, TimeInForce, BaseResponseSchema , BaseResponse
+from ..common.json_backend import dumps
+from ..common.ratelimit import RateLimiter
+from ..common.circuit import CircuitBreaker
+from ..common.deadline import request_timeout
+from ..common.dto import Symbol, SalesSide, ExecutionType, TimeInForce, BaseResponseSchema , BaseResponse, \
+    LEVERAGE_SYMBOLS
 from .dto import GetMarginResSchema, GetMarginRes, GetAssetsResSchema, GetAssetsRes,\
     GetActiveOrdersResSchema, GetActiveOrdersRes, GetPositionSummaryResSchema, GetPositionSummaryRes,\
     PostOrderResSchema, PostOrderRes, PostCloseOrderResSchema, PostCloseOrderRes,\
     PostCloseBulkOrderResSchema, PostCloseBulkOrderRes, GetLatestExecutionsResSchema, GetLatestExecutionsRes
+from .order_cache import OrderCache, update_order_cache
+from .pretrade import check_pre_trade
+from .rules import OrderValidator
 
 
 logger = get_logger()
@@ -24,7 +31,9 @@ class Client:
     GMOCoinのプライベートAPIクライアントクラスです。
     '''
 
-    def __init__(self, api_key: str, secret_key: str):
+    def __init__(self, api_key: str, secret_key: str, rate_limiter: RateLimiter = None,
+                 order_cache: OrderCache = None, circuit_breaker: CircuitBreaker = None, timeout: float = None,
+                 transport=None, pre_trade_checks: list = None, validate_orders: bool = False):
         """
         コンストラクタです。
 
@@ -34,12 +43,46 @@ class Client:
 
             secret_key:
                 APIシークレットを設定します。
+
+            rate_limiter:
+                リクエスト前にトークンを取得するレートリミッターを設定します。
+
+            order_cache:
+                注文・変更・取消の結果を反映する注文キャッシュを設定します。
+
+            circuit_breaker:
+                障害・メンテナンス時にリクエストを抑止するサーキットブレーカーを設定します。
+                照会系は'private'、注文系は'order'のグループで判定する。
+
+            timeout:
+                各メソッドの既定の期限秒数を設定します。接続・読込み・リトライ全体をこの秒数で打ち切り、
+                GmoCoinTimeoutExceptionを送出する。各メソッドのキーワード引数timeoutで個別に指定できる。
+
+            transport:
+                リクエストを送信するトランスポート(HttpTransport RecordingTransport ReplayTransport)を設定します。
+                指定しない場合はrequestsで直接送信する。RecordingTransportはAPIキーと署名を記録しない。
+
+            pre_trade_checks:
+                order close_order close_bulk_orderの送信前に(メソッド名, 引数の辞書)で呼び出す確認を設定します。
+                確認はPreTradeRejectedExceptionを送出して注文を拒否できる(例: SlippageGuard)。
+
+            validate_orders:
+                Trueの場合、pre_trade_checksの先頭に既定の取引ルールのOrderValidatorを追加します。
+                呼値・最小数量・執行数量条件に合わない注文を送信前に拒否し、価格・数量を有効な単位に丸める。
         """
         self._api_key = api_key
         self._secret_key = secret_key
+        self._rate_limiter = rate_limiter
+        self.order_cache = order_cache
+        self._circuit_breaker = circuit_breaker
+        self._timeout = timeout
+        self.transport = transport
+        self.pre_trade_checks = list(pre_trade_checks or [])
+        if validate_orders:
+            self.pre_trade_checks.insert(0, OrderValidator())
 
     @log(logger)
-    @post_request(GetMarginResSchema)
+    @post_request(GetMarginResSchema, group='private')
     def get_margin(self) -> GetMarginRes:
         """
         余力情報を取得します。
@@ -55,10 +98,10 @@ class Client:
 
         headers = self._create_header(method='GET', path=path)
 
-        return requests.get(GMOConst.END_POINT_PRIVATE + path, headers=headers)
+        return self._get(path, headers=headers)
 
     @log(logger)
-    @post_request(GetAssetsResSchema)
+    @post_request(GetAssetsResSchema, group='private')
     def get_assets(self) -> GetAssetsRes:
         """
         資産残高を取得します。
@@ -74,10 +117,10 @@ class Client:
 
         headers = self._create_header(method='GET', path=path)
 
-        return requests.get(GMOConst.END_POINT_PRIVATE + path, headers=headers)
+        return self._get(path, headers=headers)
 
     @log(logger)
-    @post_request(GetActiveOrdersResSchema)
+    @post_request(GetActiveOrdersResSchema, group='private')
     def get_active_orders(self, symbol:Symbol, page:int=1, count:int=100) -> GetActiveOrdersRes:
         """
         有効注文一覧を取得します。
@@ -104,10 +147,10 @@ class Client:
             "count": count
         }
 
-        return requests.get(GMOConst.END_POINT_PRIVATE + path, headers=headers, params=parameters)
+        return self._get(path, headers=headers, params=parameters)
 
     @log(logger)
-    @post_request(GetLatestExecutionsResSchema)
+    @post_request(GetLatestExecutionsResSchema, group='private')
     def get_latest_executions(self, symbol:Symbol, page:int=1, count:int=100) -> GetLatestExecutionsRes:
         """
         最新約定一覧を取得します。
@@ -136,10 +179,10 @@ class Client:
             "count": count
         }
 
-        return requests.get(GMOConst.END_POINT_PRIVATE + path, headers=headers, params=parameters)
+        return self._get(path, headers=headers, params=parameters)
 
     @log(logger)
-    @post_request(GetPositionSummaryResSchema)
+    @post_request(GetPositionSummaryResSchema, group='private')
     def get_position_summary(self, symbol:Symbol) -> GetPositionSummaryRes:
         """
         建玉サマリーを取得します。
@@ -162,10 +205,12 @@ class Client:
             "symbol": symbol.value
         }
 
-        return requests.get(GMOConst.END_POINT_PRIVATE + path, headers=headers, params=parameters)
+        return self._get(path, headers=headers, params=parameters)
 
     @log(logger)
-    @post_request(PostOrderResSchema)
+    @check_pre_trade
+    @update_order_cache('on_order')
+    @post_request(PostOrderResSchema, group='order')
     def order(self, symbol:Symbol, side:SalesSide, execution_type:ExecutionType, time_in_force: TimeInForce,
               size:str, price:str='0', losscut_price:str='0') -> PostOrderRes:
         """
@@ -213,12 +258,14 @@ class Client:
         if losscut_price != '0' and execution_type != ExecutionType.MARKET and self._is_leverage(symbol):
             req_body["losscutPrice"] = losscut_price
 
-        headers = self._create_header(method='POST', path=path, req_body=req_body)
+        body = dumps(req_body)
+        headers = self._create_header(method='POST', path=path, body=body)
 
-        return requests.post(GMOConst.END_POINT_PRIVATE + path, headers=headers, data=json.dumps(req_body))
+        return self._post(path, headers=headers, data=body)
 
     @log(logger)
-    @post_request(BaseResponseSchema)
+    @update_order_cache('on_change_order')
+    @post_request(BaseResponseSchema, group='order')
     def change_order(self, order_id:int, price: str, losscut_price: str='') -> BaseResponse:
         """
         注文変更をします。
@@ -244,12 +291,14 @@ class Client:
         if len(losscut_price) > 0:
             req_body["losscutPrice"] = losscut_price
 
-        headers = self._create_header(method='POST', path=path, req_body=req_body)
+        body = dumps(req_body)
+        headers = self._create_header(method='POST', path=path, body=body)
 
-        return requests.post(GMOConst.END_POINT_PRIVATE + path, headers=headers, data=json.dumps(req_body))
+        return self._post(path, headers=headers, data=body)
 
     @log(logger)
-    @post_request(BaseResponseSchema)
+    @update_order_cache('on_cancel_order')
+    @post_request(BaseResponseSchema, group='order')
     def cancel_order(self, order_id:int) -> BaseResponse:
         """
         注文取消をします。
@@ -267,13 +316,16 @@ class Client:
             "orderId": order_id
         }
 
-        headers = self._create_header(method='POST', path=path, req_body=req_body)
+        body = dumps(req_body)
+        headers = self._create_header(method='POST', path=path, body=body)
 
-        return requests.post(GMOConst.END_POINT_PRIVATE + path, headers=headers, data=json.dumps(req_body))
+        return self._post(path, headers=headers, data=body)
 
 
     @log(logger)
-    @post_request(PostCloseOrderResSchema)
+    @check_pre_trade
+    @update_order_cache('on_close_order')
+    @post_request(PostCloseOrderResSchema, group='order')
     def close_order(self, symbol:Symbol, side:SalesSide, execution_type:ExecutionType, time_in_force: TimeInForce,
                     position_id:int, position_size: str, price:str='0') -> PostCloseOrderRes:
         """
@@ -327,12 +379,15 @@ class Client:
         if execution_type != ExecutionType.MARKET:
             req_body["price"] = price
 
-        headers = self._create_header(method='POST', path=path, req_body=req_body)
+        body = dumps(req_body)
+        headers = self._create_header(method='POST', path=path, body=body)
 
-        return requests.post(GMOConst.END_POINT_PRIVATE + path, headers=headers, data=json.dumps(req_body))
+        return self._post(path, headers=headers, data=body)
 
     @log(logger)
-    @post_request(PostCloseBulkOrderResSchema)
+    @check_pre_trade
+    @update_order_cache('on_close_bulk_order')
+    @post_request(PostCloseBulkOrderResSchema, group='order')
     def close_bulk_order(self, symbol:Symbol, side:SalesSide, execution_type:ExecutionType, time_in_force: TimeInForce,
                          size: str, price:str='0') -> PostCloseBulkOrderRes:
         """
@@ -377,11 +432,54 @@ class Client:
         if execution_type != ExecutionType.MARKET:
             req_body["price"] = price
 
-        headers = self._create_header(method='POST', path=path, req_body=req_body)
+        body = dumps(req_body)
+        headers = self._create_header(method='POST', path=path, body=body)
 
-        return requests.post(GMOConst.END_POINT_PRIVATE + path, headers=headers, data=json.dumps(req_body))
+        return self._post(path, headers=headers, data=body)
+
+    def _get(self, path: str, headers: dict, params: dict = None) -> requests.Response:
+        """
+        GETリクエストを送信します。タイムアウトは現在の期限の残り秒数とします。
+
+        Args:
+            path:
+                url(private以下)を指定します。
+            headers:
+                ヘッダーを指定します。
+            params:
+                クエリパラメータを指定します。
+
+        Returns:
+            Response
+        """
+        if self.transport is None:
+            return requests.get(GMOConst.END_POINT_PRIVATE + path, headers=headers, params=params,
+                                timeout=request_timeout())
+        return self.transport.request('GET', GMOConst.END_POINT_PRIVATE + path, headers=headers, params=params,
+                                      timeout=request_timeout())
+
+    def _post(self, path: str, headers: dict, data: str) -> requests.Response:
+        """
+        POSTリクエストを送信します。タイムアウトは現在の期限の残り秒数とします。
+
+        Args:
+            path:
+                url(private以下)を指定します。
+            headers:
+                ヘッダーを指定します。
+            data:
+                エンコード済みのリクエストボディを指定します。
+
+        Returns:
+            Response
+        """
+        if self.transport is None:
+            return requests.post(GMOConst.END_POINT_PRIVATE + path, headers=headers, data=data,
+                                 timeout=request_timeout())
+        return self.transport.request('POST', GMOConst.END_POINT_PRIVATE + path, headers=headers, data=data,
+                                      timeout=request_timeout())
 
-    def _create_header(self, method :str, path :str, req_body:[] = None) -> dict:
+    def _create_header(self, method :str, path :str, body:str = None) -> dict:
         """
         ヘッダーを生成します。
 
@@ -390,16 +488,19 @@ class Client:
                 HTTPメソッドを指定します。
             path:
                 url(private以下)を指定します。
+            body:
+                エンコード済みのリクエストボディを指定します。
+                署名と送信内容を一致させるため、送信するボディと同じ文字列を指定すること。
 
         Returns:
             header
         """
         timestamp = '{0}000'.format(int(time.mktime(datetime.now().timetuple())))
 
-        if req_body is None:
+        if body is None:
             text = timestamp + method + path
         else:
-            text = timestamp + method + path + json.dumps(req_body)
+            text = timestamp + method + path + body
 
         sign = hmac.new(bytes(self._secret_key.encode('ascii')), bytes(text.encode('ascii')), hashlib.sha256).hexdigest()
         headers = {
@@ -422,8 +523,4 @@ class Client:
             bool
         """
 
-        return (symbol == Symbol.BTC_JPY or 
-                symbol == Symbol.ETH_JPY or 
-                symbol == Symbol.BCH_JPY or 
-                symbol == Symbol.LTC_JPY or 
-                symbol == Symbol.XRP_JPY)
+        return symbol in LEVERAGE_SYMBOLS
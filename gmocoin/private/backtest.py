@@ -0,0 +1,198 @@
+#!python3
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from pytz import utc
+
+from ..common.dto import Symbol, SalesSide, ExecutionType
+from ..common.logging import get_logger, log
+from .dto import ActiveOrder, LatestExecution
+from .simulator import SimulatedClient
+
+
+logger = get_logger()
+
+
+class BacktestResult:
+    """
+    バックテストの結果クラスです。
+    """
+    def __init__(self, executions: List[LatestExecution], summary: Dict[Symbol, Dict[str, Decimal]],
+                 trade_count: int) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            executions:
+                約定情報(約定ID順)
+            summary:
+                銘柄ごとの数量・損益
+            trade_count:
+                リプレイした約定履歴の件数
+        """
+        self.executions = executions
+        self.summary = summary
+        self.trade_count = trade_count
+
+    @property
+    def fee(self) -> Decimal:
+        """
+        手数料の合計を返します。
+        """
+        return sum((e.fee for e in self.executions), Decimal(0))
+
+    @property
+    def realized_pnl(self) -> Decimal:
+        """
+        手数料を差し引いた実現損益の合計を返します。
+        """
+        return sum((s['realized_pnl'] for s in self.summary.values()), Decimal(0))
+
+    @property
+    def unrealized_pnl(self) -> Decimal:
+        """
+        最後の約定価格で評価した評価損益の合計を返します。
+        """
+        return sum((s['unrealized_pnl'] for s in self.summary.values()), Decimal(0))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        約定情報をDataFrameで返します。
+
+        Returns:
+            DataFrame
+        """
+        return pd.DataFrame([{'execution_id': e.execution_id, 'order_id': e.order_id, 'symbol': e.symbol.value,
+                              'side': e.side.value, 'settle_type': e.settle_type.value, 'size': e.size,
+                              'price': e.price, 'loss_gain': e.loss_gain, 'fee': e.fee,
+                              'timestamp': e.timestamp} for e in self.executions])
+
+
+class Backtester:
+    '''
+    過去の約定履歴をリプレイして戦略を評価するクラスです。
+    戦略はinterval秒(約定履歴の時刻)ごとにSimulatedClientを引数に呼び出され、
+    private.api.Clientと同じメソッドで発注します。呼び出し間の約定判定はnumpyで一括して行います。
+    '''
+
+    def __init__(self, strategy, interval: float = 60.0, maker_fee: str = '0', taker_fee: str = '0',
+                 fill_on_touch: bool = False) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            strategy:
+                (SimulatedClient, 現在日時)で呼び出す関数を設定します。
+                最新の約定価格はSimulatedClient.last_priceで参照できます。
+            interval:
+                戦略を呼び出す間隔秒数を設定します。
+            maker_fee:
+                メイカー手数料率を設定します。
+            taker_fee:
+                テイカー手数料率を設定します。
+            fill_on_touch:
+                Trueの場合、指値と同じ約定価格でも約定したとみなす。
+        """
+        self.strategy = strategy
+        self.interval = interval
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.fill_on_touch = fill_on_touch
+
+    def _find(self, client: SimulatedClient, order: ActiveOrder, prices: np.ndarray, lo: int, hi: int):
+        """
+        prices[lo:hi]で注文が約定・失効する最初の位置を返します。
+
+        Returns:
+            (位置, SimulatedClient.matchの結果)。該当しない場合はNone。
+        """
+        if lo >= hi:
+            return None
+        if client.is_fresh(order.order_id):
+            # 発注後最初の約定はテイカー判定・失効判定があるため個別に判定する
+            result = client.match(order, Decimal(repr(float(prices[lo]))))
+            client.seen(order.order_id)
+            if result is not None:
+                return lo, result
+            lo += 1
+            if lo >= hi:
+                return None
+
+        segment = prices[lo:hi]
+        price = float(order.price)
+        buy = order.side == SalesSide.BUY
+        if order.execution_type == ExecutionType.STOP:
+            hits = np.flatnonzero(segment >= price if buy else segment <= price)
+            taker = True
+        elif self.fill_on_touch:
+            hits = np.flatnonzero(segment <= price if buy else segment >= price)
+            taker = False
+        else:
+            hits = np.flatnonzero(segment < price if buy else segment > price)
+            taker = False
+        if len(hits) == 0:
+            return None
+        i = lo + int(hits[0])
+        return i, ((Decimal(repr(float(prices[i]))), True) if taker else (order.price, False))
+
+    @log(logger)
+    def run(self, trades: pd.DataFrame) -> BacktestResult:
+        """
+        約定履歴をリプレイします。
+
+        Args:
+            trades:
+                get_historical_dataで取得した約定履歴(symbol price timestamp列が必要)
+
+        Returns:
+            BacktestResult
+        """
+        client = SimulatedClient(self.maker_fee, self.taker_fee, self.fill_on_touch)
+        if len(trades) == 0:
+            return BacktestResult([], {}, 0)
+
+        timestamps = pd.to_datetime(trades['timestamp'], utc=True).dt.tz_localize(None) \
+            .to_numpy(dtype='datetime64[ns]').astype('int64')
+        interval_ns = int(self.interval * 1e9)
+        start = timestamps.min() // interval_ns * interval_ns
+        boundaries = np.arange(start + interval_ns, timestamps.max() + interval_ns + 1, interval_ns)
+
+        books = {}
+        symbols = trades['symbol'].to_numpy()
+        prices = trades['price'].to_numpy(dtype='float64')
+        for name in np.unique(symbols):
+            mask = symbols == name
+            sort = np.argsort(timestamps[mask], kind='stable')
+            ts = timestamps[mask][sort]
+            books[Symbol(name)] = (ts, prices[mask][sort], np.searchsorted(ts, boundaries, side='left'))
+        positions = {symbol: 0 for symbol in books}
+
+        for k, boundary in enumerate(boundaries):
+            events = []
+            for symbol, (ts, px, bounds) in books.items():
+                lo, hi = positions[symbol], int(bounds[k])
+                for order in client.live_orders(symbol):
+                    found = self._find(client, order, px, lo, hi)
+                    if found is not None:
+                        events.append((int(ts[found[0]]), order.order_id, order, found[1]))
+
+            for ts_ns, _, order, result in sorted(events, key=lambda e: e[:2]):
+                timestamp = datetime.fromtimestamp(ts_ns / 1e9, tz=utc)
+                if isinstance(result, tuple):
+                    client.fill(order, result[0], result[1], timestamp)
+                else:
+                    client.close(order, result)
+
+            now = datetime.fromtimestamp(int(boundary) / 1e9, tz=utc)
+            for symbol, (ts, px, bounds) in books.items():
+                hi = int(bounds[k])
+                if hi > positions[symbol]:
+                    client.set_last_price(symbol, Decimal(repr(float(px[hi - 1]))), now)
+                    positions[symbol] = hi
+            client.now = now
+            self.strategy(client, now)
+
+        return BacktestResult(client.executions(), client.summary(), len(trades))
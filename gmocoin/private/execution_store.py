@@ -0,0 +1,220 @@
+#!python3
+import sqlite3
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+from pytz import utc
+
+from ..common.dto import Symbol, SalesSide, SettleType
+from ..common.logging import get_logger, log
+from .dto import LatestExecution
+
+
+logger = get_logger()
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS executions (
+    execution_id INTEGER PRIMARY KEY,
+    order_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    settle_type TEXT NOT NULL,
+    size TEXT NOT NULL,
+    price TEXT NOT NULL,
+    loss_gain TEXT NOT NULL,
+    fee TEXT NOT NULL,
+    timestamp_us INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_executions_order_id ON executions (order_id);
+CREATE INDEX IF NOT EXISTS idx_executions_symbol_timestamp ON executions (symbol, timestamp_us);
+CREATE TABLE IF NOT EXISTS sync_state (
+    symbol TEXT PRIMARY KEY,
+    last_execution_id INTEGER NOT NULL
+);
+'''
+
+_COLUMNS = 'execution_id, order_id, symbol, side, settle_type, size, price, loss_gain, fee, timestamp_us'
+
+
+def _to_us(timestamp: datetime) -> int:
+    """
+    datetimeをepochマイクロ秒に変換します。
+    """
+    return int(round(timestamp.timestamp() * 1000000))
+
+
+def _to_row(e: LatestExecution) -> tuple:
+    """
+    LatestExecutionをテーブルの行に変換します。
+    """
+    return (e.execution_id, e.order_id, e.symbol.value, e.side.value, e.settle_type.value,
+            str(e.size), str(e.price), str(e.loss_gain), str(e.fee), _to_us(e.timestamp))
+
+
+def _from_row(row: tuple) -> LatestExecution:
+    """
+    テーブルの行をLatestExecutionに変換します。
+    """
+    execution_id, order_id, symbol, side, settle_type, size, price, loss_gain, fee, timestamp_us = row
+    return LatestExecution(execution_id=execution_id, order_id=order_id, symbol=Symbol(symbol),
+                           side=SalesSide(side), settle_type=SettleType(settle_type),
+                           size=Decimal(size), price=Decimal(price), loss_gain=Decimal(loss_gain),
+                           fee=Decimal(fee), timestamp=datetime.fromtimestamp(timestamp_us / 1000000, tz=utc))
+
+
+class ExecutionSyncStore:
+    '''
+    約定情報を差分同期してSQLiteに保存するクラスです。
+    銘柄ごとに取得済みの最大約定IDを保存し、get_latest_executionsは新しい約定が含まれるページのみ取得します。
+    '''
+
+    def __init__(self, path: str) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            path:
+                SQLiteのファイルパスを設定します。':memory:'を指定した場合は永続化しない。
+        """
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """
+        データベースを閉じます。
+        """
+        with self._lock:
+            self._conn.close()
+
+    def last_execution_id(self, symbol: Symbol) -> int:
+        """
+        指定した銘柄の取得済み最大約定IDを返します。
+
+        Args:
+            symbol:
+                銘柄
+
+        Returns:
+            約定ID。未取得の場合は0。
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT last_execution_id FROM sync_state WHERE symbol = ?',
+                                     (symbol.value,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def add(self, symbol: Symbol, executions: List[LatestExecution]) -> List[LatestExecution]:
+        """
+        約定情報を保存します。保存済みの約定IDは無視します。
+
+        Args:
+            symbol:
+                銘柄
+            executions:
+                約定情報
+
+        Returns:
+            新たに保存した約定情報(約定ID昇順)
+        """
+        with self._lock, self._conn:
+            new = []
+            for e in sorted(executions, key=lambda e: e.execution_id):
+                cursor = self._conn.execute(f'INSERT OR IGNORE INTO executions ({_COLUMNS}) '
+                                            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', _to_row(e))
+                if cursor.rowcount == 1:
+                    new.append(e)
+            if len(new) > 0:
+                self._conn.execute('INSERT INTO sync_state (symbol, last_execution_id) VALUES (?, ?) '
+                                   'ON CONFLICT (symbol) DO UPDATE SET last_execution_id = '
+                                   'MAX(last_execution_id, excluded.last_execution_id)',
+                                   (symbol.value, new[-1].execution_id))
+        return new
+
+    @log(logger)
+    def sync(self, client, symbol: Symbol, count: int = 100) -> dict:
+        """
+        前回同期以降の約定情報を取得して保存します。
+        get_latest_executionsは新しい順に返るため、取得済みの約定IDが現れたページで取得を終了します。
+        最後のページまで取得しても取得済みの約定IDが現れない場合は、取得できる期間を過ぎた約定があるため、
+        警告を出力し、その期間をgapに設定します。
+
+        Args:
+            client:
+                プライベートAPIクライアント
+            symbol:
+                銘柄
+            count:
+                1ページ当りの取得件数
+
+        Returns:
+            {'executions': 新たに保存した約定情報(約定ID昇順),
+             'gap': 約定を遡れなかった期間(前回同期した最新の約定日時 取得できた最古の約定日時)。隙間がない場合はNone}
+        """
+        last_execution_id = self.last_execution_id(symbol)
+        fetched = []
+        page = 1
+        while True:
+            res = client.get_latest_executions(symbol, page=page, count=count)
+            executions = res.data.latest_executions or []
+            fetched.extend(e for e in executions if e.execution_id > last_execution_id)
+            if any(e.execution_id <= last_execution_id for e in executions):
+                reached = True
+                break
+            if len(executions) < count:
+                reached = False
+                break
+            page += 1
+
+        gap = None
+        if last_execution_id > 0 and not reached:
+            with self._lock:
+                row = self._conn.execute('SELECT timestamp_us FROM executions WHERE execution_id = ?',
+                                         (last_execution_id,)).fetchone()
+            since = datetime.fromtimestamp(row[0] / 1000000, tz=utc) if row is not None else None
+            until = min(e.timestamp for e in fetched) if len(fetched) > 0 else res.responsetime
+            gap = (since, until)
+            logger.warning(f'executions of {symbol.value} between {since} and {until} are not available '
+                           f'(last execution id {last_execution_id})')
+
+        return {'executions': self.add(symbol, fetched), 'gap': gap}
+
+    def get_by_order_id(self, order_id: int) -> List[LatestExecution]:
+        """
+        指定した注文IDの約定情報を返します。
+
+        Args:
+            order_id:
+                注文ID
+
+        Returns:
+            約定情報(約定ID昇順)
+        """
+        with self._lock:
+            rows = self._conn.execute(f'SELECT {_COLUMNS} FROM executions WHERE order_id = ? '
+                                      'ORDER BY execution_id', (order_id,)).fetchall()
+        return [_from_row(r) for r in rows]
+
+    def get_by_time_range(self, symbol: Symbol, start: datetime, end: datetime) -> List[LatestExecution]:
+        """
+        指定した銘柄・期間の約定情報を返します。
+
+        Args:
+            symbol:
+                銘柄
+            start:
+                開始日時(この日時を含む)。タイムゾーン付きで指定すること。
+            end:
+                終了日時(この日時を含まない)。タイムゾーン付きで指定すること。
+
+        Returns:
+            約定情報(約定日時昇順)
+        """
+        with self._lock:
+            rows = self._conn.execute(f'SELECT {_COLUMNS} FROM executions '
+                                      'WHERE symbol = ? AND timestamp_us >= ? AND timestamp_us < ? '
+                                      'ORDER BY timestamp_us, execution_id',
+                                      (symbol.value, _to_us(start), _to_us(end))).fetchall()
+        return [_from_row(r) for r in rows]
@@ -0,0 +1,377 @@
+#!python3
+import inspect
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from functools import wraps
+from typing import Dict, List
+
+from pytz import utc
+
+from ..common.dto import Symbol, SalesSide, OrderType, ExecutionType, SettleType, OrderStatus, TimeInForce
+from ..common.logging import get_logger
+from .dto import ActiveOrder, LatestExecution
+
+
+logger = get_logger()
+
+# 有効注文として扱う注文ステータス
+LIVE_STATUSES = (OrderStatus.WAITING, OrderStatus.ORDERED, OrderStatus.MODIFYING, OrderStatus.CANCELLING)
+
+
+def update_order_cache(handler: str):
+    """
+    APIの実行結果をクライアントの注文キャッシュに反映するデコレーターです。
+    post_requestより外側に指定し、レスポンスと呼び出し時の引数をOrderCacheのhandlerに渡します。
+
+    Args:
+        handler:
+            呼び出すOrderCacheのメソッド名
+
+    Returns:
+        _decoratorの返り値
+    """
+
+    def _decorator(func):
+        """
+        デコレーターを使用する関数を引数とする
+
+        Args:
+            func (function)
+        Returns:
+            wrapperの返り値
+        """
+        signature = inspect.signature(func)
+
+        # funcのメタデータを引き継ぐ
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            """
+            実際の処理を書くための関数
+
+            Args:
+                *args, **kwargs:
+                    funcの引数
+
+            Returns:
+                funcの返り値
+            """
+            ret = func(self, *args, **kwargs)
+
+            order_cache = getattr(self, 'order_cache', None)
+            if order_cache is not None:
+                # MEMO: timeoutはpost_requestが処理する引数のため、束縛対象から除く
+                bound = signature.bind(self, *args, **{k: v for k, v in kwargs.items() if k != 'timeout'})
+                bound.apply_defaults()
+                arguments = dict(bound.arguments)
+                del arguments['self']
+                try:
+                    getattr(order_cache, handler)(ret, **arguments)
+                except Exception as err:
+                    # MEMO: キャッシュの更新失敗で注文結果を失わないよう、ログ出力のみ行う
+                    logger.error(f'order cache update failed ({handler}): {err!r}')
+
+            return ret
+
+        return wrapper
+    return _decorator
+
+
+class OrderCache:
+    '''
+    注文状態をメモリ上に保持するキャッシュクラスです。
+    注文・変更・取消のレスポンスと約定情報で更新し、低頻度でget_active_ordersと突き合わせます。
+    注文ID、親注文ID、銘柄ごとに索引を持ち、有効注文や建玉前の発注数量をAPI呼び出し無しで参照できます。
+    '''
+
+    def __init__(self, reconcile_interval: float = 300.0) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            reconcile_interval:
+                maybe_reconcileでget_active_ordersと突き合わせる間隔秒数を設定します。
+        """
+        self.reconcile_interval = reconcile_interval
+        self._orders = {}
+        self._by_root_order_id = {}
+        self._by_symbol = {}
+        self._applied_execution_ids = {}
+        # reconcileで取得した約定数量の時点(取引所の日時)
+        self._reconciled_at = {}
+        # 最後に登録・変更した時刻(time.monotonic)
+        self._updated_at = {}
+        self._last_reconciled = {}
+        self._lock = threading.RLock()
+
+    def _put(self, order: ActiveOrder) -> None:
+        """
+        注文を登録します。ロック取得済みで呼び出すこと。
+        """
+        self._orders[order.order_id] = order
+        self._updated_at[order.order_id] = time.monotonic()
+        self._by_root_order_id.setdefault(order.root_order_id, set()).add(order.order_id)
+        if order.status in LIVE_STATUSES:
+            self._by_symbol.setdefault(order.symbol, set()).add(order.order_id)
+        else:
+            self._by_symbol.get(order.symbol, set()).discard(order.order_id)
+            self._applied_execution_ids.pop(order.order_id, None)
+            self._reconciled_at.pop(order.order_id, None)
+
+    def _set_status(self, order: ActiveOrder, status: OrderStatus) -> None:
+        """
+        注文ステータスを更新し、索引に反映します。ロック取得済みで呼び出すこと。
+        """
+        order.status = status
+        self._put(order)
+
+    def get(self, order_id: int) -> ActiveOrder:
+        """
+        注文IDで注文を返します。
+
+        Args:
+            order_id:
+                注文ID
+
+        Returns:
+            ActiveOrder。キャッシュに無い場合はNone。
+        """
+        with self._lock:
+            return self._orders.get(order_id)
+
+    def get_by_root_order_id(self, root_order_id: int) -> List[ActiveOrder]:
+        """
+        親注文IDで注文を返します。
+
+        Args:
+            root_order_id:
+                親注文ID
+
+        Returns:
+            List[ActiveOrder]
+        """
+        with self._lock:
+            return [self._orders[i] for i in sorted(self._by_root_order_id.get(root_order_id, ()))]
+
+    def is_active(self, order_id: int) -> bool:
+        """
+        注文が有効かどうかを返します。
+
+        Args:
+            order_id:
+                注文ID
+
+        Returns:
+            bool
+        """
+        with self._lock:
+            order = self._orders.get(order_id)
+            return order is not None and order.status in LIVE_STATUSES
+
+    def get_active_orders(self, symbol: Symbol) -> List[ActiveOrder]:
+        """
+        指定した銘柄の有効注文を返します。
+
+        Args:
+            symbol:
+                銘柄
+
+        Returns:
+            List[ActiveOrder]
+        """
+        with self._lock:
+            return [self._orders[i] for i in sorted(self._by_symbol.get(symbol, ()))]
+
+    def open_exposure(self, symbol: Symbol) -> Dict[SalesSide, Decimal]:
+        """
+        指定した銘柄の有効注文の未約定数量を売買区分ごとに返します。
+
+        Args:
+            symbol:
+                銘柄
+
+        Returns:
+            {SalesSide: 未約定数量}
+        """
+        exposure = {SalesSide.BUY: Decimal(0), SalesSide.SELL: Decimal(0)}
+        with self._lock:
+            for order_id in self._by_symbol.get(symbol, ()):
+                order = self._orders[order_id]
+                exposure[order.side] += order.size - order.executed_size
+        return exposure
+
+    def _new_order(self, order_id: int, symbol: Symbol, side: SalesSide, execution_type: ExecutionType,
+                   settle_type: SettleType, time_in_force: TimeInForce, size: str, price: str,
+                   losscut_price: str = '0') -> None:
+        """
+        発注が受け付けられた注文を登録します。
+        """
+        status = OrderStatus.WAITING if execution_type == ExecutionType.STOP else OrderStatus.ORDERED
+        order = ActiveOrder(root_order_id=order_id, order_id=order_id, symbol=symbol, side=side,
+                            order_type=OrderType.NORMAL, execution_type=execution_type, settle_type=settle_type,
+                            size=Decimal(size), executed_size=Decimal(0),
+                            price=Decimal(0) if execution_type == ExecutionType.MARKET else Decimal(price),
+                            losscut_price=Decimal(losscut_price), status=status, time_in_force=time_in_force,
+                            timestamp=datetime.now(utc))
+        with self._lock:
+            self._put(order)
+
+    def on_order(self, res, symbol: Symbol, side: SalesSide, execution_type: ExecutionType,
+                 time_in_force: TimeInForce, size: str, price: str = '0', losscut_price: str = '0') -> None:
+        """
+        新規注文のレスポンスを反映します。
+        """
+        self._new_order(res.data, symbol, side, execution_type, SettleType.OPEN, time_in_force,
+                        size, price, losscut_price)
+
+    def on_close_order(self, res, symbol: Symbol, side: SalesSide, execution_type: ExecutionType,
+                       time_in_force: TimeInForce, position_id: int, position_size: str, price: str = '0') -> None:
+        """
+        決済注文のレスポンスを反映します。
+        """
+        self._new_order(res.data, symbol, side, execution_type, SettleType.CLOSE, time_in_force,
+                        position_size, price)
+
+    def on_close_bulk_order(self, res, symbol: Symbol, side: SalesSide, execution_type: ExecutionType,
+                            time_in_force: TimeInForce, size: str, price: str = '0') -> None:
+        """
+        一括決済注文のレスポンスを反映します。
+        """
+        self._new_order(res.data, symbol, side, execution_type, SettleType.CLOSE, time_in_force, size, price)
+
+    def on_change_order(self, res, order_id: int, price: str, losscut_price: str = '') -> None:
+        """
+        注文変更のレスポンスを反映します。
+        """
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None:
+                return
+            order.price = Decimal(price)
+            if len(losscut_price) > 0:
+                order.losscut_price = Decimal(losscut_price)
+            self._updated_at[order_id] = time.monotonic()
+
+    def on_cancel_order(self, res, order_id: int) -> None:
+        """
+        注文取消のレスポンスを反映します。
+        取消は非同期に処理され、受付後も取消前の約定が届くため、CANCELLINGとして約定の反映を続けます。
+        最終的な状態は約定情報またはreconcileで確定します。
+        """
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is not None and order.status in LIVE_STATUSES:
+                self._set_status(order, OrderStatus.CANCELLING)
+
+    def apply_executions(self, executions: List[LatestExecution]) -> None:
+        """
+        約定情報を反映します。同じ約定IDは一度だけ反映します。
+        reconcileで置き換えた注文は、取得時点までの約定が約定数量に含まれているため、それ以前の約定は反映しません。
+        約定数量が発注数量に達した注文は有効注文から除外します。
+
+        Args:
+            executions:
+                get_latest_executionsまたはExecutionSyncStore.syncで取得した約定情報
+        """
+        with self._lock:
+            for e in executions:
+                order = self._orders.get(e.order_id)
+                if order is None or order.status not in LIVE_STATUSES:
+                    continue
+                applied = self._applied_execution_ids.setdefault(e.order_id, set())
+                if e.execution_id in applied:
+                    continue
+                applied.add(e.execution_id)
+                reconciled_at = self._reconciled_at.get(e.order_id)
+                if reconciled_at is not None and e.timestamp <= reconciled_at:
+                    continue
+                order.executed_size += e.size
+                if order.executed_size >= order.size:
+                    self._set_status(order, OrderStatus.EXECUTED)
+
+    def poll_executions(self, client, symbol: Symbol, store=None) -> List[LatestExecution]:
+        """
+        約定情報を取得して反映します。
+
+        Args:
+            client:
+                プライベートAPIクライアント
+            symbol:
+                銘柄
+            store:
+                ExecutionSyncStoreを指定した場合、差分同期した約定のみ反映する。
+                指定しない場合は最新1ページ分を反映する。
+
+        Returns:
+            反映対象とした約定情報
+        """
+        if store is not None:
+            executions = store.sync(client, symbol)['executions']
+        else:
+            executions = client.get_latest_executions(symbol).data.latest_executions or []
+        self.apply_executions(executions)
+        return executions
+
+    def reconcile(self, client, symbol: Symbol, count: int = 100) -> None:
+        """
+        get_active_ordersの結果で指定した銘柄の有効注文を置き換えます。
+
+        Args:
+            client:
+                プライベートAPIクライアント
+            symbol:
+                銘柄
+            count:
+                1ページ当りの取得件数
+        """
+        started = time.monotonic()
+        active_orders = []
+        page = 1
+        while True:
+            res = client.get_active_orders(symbol, page=page, count=count)
+            orders = res.data.active_orders or []
+            active_orders.extend((order, res.responsetime) for order in orders)
+            if len(orders) < count:
+                break
+            page += 1
+
+        with self._lock:
+            active_ids = {o.order_id for o, _ in active_orders}
+            for order_id in list(self._by_symbol.get(symbol, ())):
+                if order_id in active_ids or self._updated_at.get(order_id, 0.0) >= started:
+                    # 取得中に発注・変更した注文は取得結果に含まれない場合があるため、次回に判定する
+                    continue
+                # MEMO: 約定か取消かは判別できないため、約定数量で判定する
+                order = self._orders[order_id]
+                status = OrderStatus.EXECUTED if order.executed_size >= order.size else OrderStatus.CANCELED
+                self._set_status(order, status)
+            for order, responsetime in active_orders:
+                if self._updated_at.get(order.order_id, 0.0) >= started:
+                    # 取得中に変更・取消した注文はキャッシュの状態を優先する
+                    continue
+                self._put(order)
+                self._reconciled_at[order.order_id] = responsetime
+            self._last_reconciled[symbol] = time.monotonic()
+
+    def maybe_reconcile(self, client, symbols: List[Symbol]) -> List[Symbol]:
+        """
+        前回の突き合わせからreconcile_interval秒以上経過した銘柄のみ突き合わせます。
+
+        Args:
+            client:
+                プライベートAPIクライアント
+            symbols:
+                対象銘柄
+
+        Returns:
+            突き合わせを行った銘柄
+        """
+        now = time.monotonic()
+        reconciled = []
+        for symbol in symbols:
+            last = self._last_reconciled.get(symbol)
+            if last is None or now - last >= self.reconcile_interval:
+                self.reconcile(client, symbol)
+                reconciled.append(symbol)
+        return reconciled
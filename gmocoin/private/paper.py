@@ -0,0 +1,346 @@
+#!python3
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List
+
+from pytz import utc
+
+from ..common.dto import Symbol, AssetSymbol, SalesSide, ExecutionType, OrderStatus, TimeInForce, \
+    MarginCallStatus, BaseResponse, LEVERAGE_SYMBOLS
+from ..common.logging import get_logger, log
+from ..public.api import Client as PublicClient
+from ..public.dto import GetOrderBooksData, OrderData
+from ..public.trades import TradeCursor
+from .dto import ActiveOrder, LatestExecution, GetAssetsData, GetAssetsRes, GetMarginData, GetMarginRes, \
+    PostOrderRes, PostCloseOrderRes, PostCloseBulkOrderRes
+from .simulator import SimulatedClient, _error
+
+
+logger = get_logger()
+
+
+def _vwap(levels: List[OrderData], size: Decimal, limit: Decimal = None, buy: bool = True,
+          partial: bool = False) -> Decimal:
+    """
+    板の先頭から数量分を約定させた場合の平均約定価格を返します。
+
+    Args:
+        levels:
+            約定させる側の板(買いの場合はasks、売りの場合はbids)
+        size:
+            数量
+        limit:
+            指値。指値を超える価格の板は使用しない。
+        buy:
+            買いの場合True
+        partial:
+            Trueの場合、板が不足する分は最後に使用した板の価格で約定したとみなす。
+
+    Returns:
+        平均約定価格。板が不足する場合はNone。
+    """
+    remaining = size
+    amount = Decimal(0)
+    last = None
+    for level in levels:
+        if limit is not None and (level.price > limit if buy else level.price < limit):
+            break
+        quantity = min(remaining, level.size)
+        amount += level.price * quantity
+        remaining -= quantity
+        last = level.price
+        if remaining <= 0:
+            return amount / size
+    if partial and last is not None:
+        return (amount + last * remaining) / size
+    return None
+
+
+class PaperClient(SimulatedClient):
+    '''
+    公開APIの板情報・約定履歴で約定を模擬するペーパートレード用クライアントクラスです。
+    private.api.Clientと同じメソッドを持ち、資産残高・余力も模擬します。プライベートAPIは呼び出しません。
+
+    成行注文と発注時に約定可能な指値注文はget_orderbooksの板を消化した平均価格でテイカー約定し、
+    残った指値・逆指値注文はpollで取得したget_tradesの約定価格で判定します。
+    public_clientにReplayTransportを設定したクライアントを指定すると、記録した相場で実行できます。
+    '''
+
+    def __init__(self, public_client: PublicClient = None, jpy: str = '1000000',
+                 assets: Dict[AssetSymbol, str] = None, leverage: int = 2, latency: float = 0.0,
+                 maker_fee: str = '0', taker_fee: str = '0', fill_on_touch: bool = False) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            public_client:
+                板情報・約定履歴を取得するパブリックAPIクライアントを設定します。指定しない場合は新規に作成する。
+            jpy:
+                初期の円残高を設定します。
+            assets:
+                初期の暗号資産残高を設定します。
+            leverage:
+                レバレッジ取引の証拠金計算に使用する倍率を設定します。
+            latency:
+                各メソッドの呼び出し時に待つ秒数を設定します。プライベートAPIの応答時間を模擬する場合に使用します。
+            maker_fee:
+                メイカー手数料率を設定します。
+            taker_fee:
+                テイカー手数料率を設定します。
+            fill_on_touch:
+                Trueの場合、指値と同じ約定価格でも約定したとみなす。
+        """
+        super().__init__(maker_fee, taker_fee, fill_on_touch)
+        self.public_client = public_client if public_client is not None else PublicClient()
+        self.leverage = Decimal(leverage)
+        self.latency = latency
+        self._balances = {AssetSymbol.JPY: Decimal(jpy)}
+        for symbol, amount in (assets or {}).items():
+            self._balances[symbol] = Decimal(amount)
+        self._cursors = {}
+
+    def _begin(self) -> None:
+        """
+        応答時間を模擬し、現在日時を更新します。
+        """
+        if self.latency > 0:
+            time.sleep(self.latency)
+        self.now = datetime.now(utc)
+
+    def _sync(self, symbol: Symbol) -> None:
+        """
+        発注前に約定履歴を取得して既存の注文を判定し、取得位置を進めます。
+        発注前の約定で新しい注文を判定しないようにする。
+        """
+        self.poll([symbol])
+
+    def _book(self, symbol: Symbol) -> GetOrderBooksData:
+        """
+        板情報を取得します。
+        """
+        return self.public_client.get_orderbooks(symbol).data
+
+    def _check_balance(self, symbol: Symbol, side: SalesSide, size: Decimal, price: Decimal) -> None:
+        """
+        新規注文に必要な残高・余力があるかを確認します。
+        """
+        if symbol in LEVERAGE_SYMBOLS:
+            if size * price / self.leverage > self.get_margin().data.available_amount:
+                raise _error('ERR-201', 'Trading margin is insufficient.')
+        elif side == SalesSide.BUY:
+            if size * price > self._balances.get(AssetSymbol.JPY, Decimal(0)):
+                raise _error('ERR-208', 'Exceeds the available balance.')
+        elif size > self._balances.get(AssetSymbol(symbol.value), Decimal(0)):
+            raise _error('ERR-208', 'Exceeds the available balance.')
+
+    def _execute(self, order_id: int, book: GetOrderBooksData) -> None:
+        """
+        発注時点の板で注文を判定します。約定しなかった指値・逆指値注文は以降pollで判定します。
+        """
+        order = self._orders[order_id]
+        self.seen(order_id)
+        if order.execution_type == ExecutionType.STOP or order.status not in (OrderStatus.ORDERED,):
+            return
+
+        buy = order.side == SalesSide.BUY
+        levels = book.asks if buy else book.bids
+        if order.execution_type == ExecutionType.MARKET:
+            price = _vwap(levels, order.size, buy=buy, partial=True)
+            if price is None:
+                self.close(order, OrderStatus.EXPIRED)
+            else:
+                self.fill(order, price, True, self.now)
+            return
+
+        marketable = len(levels) > 0 and (levels[0].price <= order.price if buy else levels[0].price >= order.price)
+        if order.time_in_force == TimeInForce.SOK:
+            if marketable:
+                self.close(order, OrderStatus.CANCELED)
+            return
+        price = _vwap(levels, order.size, limit=order.price, buy=buy) if marketable else None
+        if price is not None:
+            self.fill(order, price, True, self.now)
+        elif order.time_in_force in (TimeInForce.FAK, TimeInForce.FOK):
+            self.close(order, OrderStatus.EXPIRED)
+
+    @log(logger)
+    def order(self, symbol: Symbol, side: SalesSide, execution_type: ExecutionType, time_in_force: TimeInForce,
+              size: str, price: str = '0', losscut_price: str = '0') -> PostOrderRes:
+        """
+        新規注文をします。引数はprivate.api.Client.orderと同じです。
+
+        Returns:
+            PostOrderRes
+        """
+        self._begin()
+        self._sync(symbol)
+        book = None if execution_type == ExecutionType.STOP else self._book(symbol)
+        if execution_type == ExecutionType.MARKET:
+            levels = book.asks if side == SalesSide.BUY else book.bids
+            estimate = levels[0].price if len(levels) > 0 else Decimal(0)
+        else:
+            estimate = Decimal(price)
+        self._check_balance(symbol, side, Decimal(size), estimate)
+
+        res = super().order(symbol, side, execution_type, time_in_force, size, price, losscut_price)
+        if book is not None:
+            self._execute(res.data, book)
+        return res
+
+    @log(logger)
+    def close_order(self, symbol: Symbol, side: SalesSide, execution_type: ExecutionType,
+                    time_in_force: TimeInForce, position_id: int, position_size: str,
+                    price: str = '0') -> PostCloseOrderRes:
+        """
+        決済注文をします。引数はprivate.api.Client.close_orderと同じです。
+
+        Returns:
+            PostCloseOrderRes
+        """
+        self._begin()
+        self._sync(symbol)
+        res = super().close_order(symbol, side, execution_type, time_in_force, position_id, position_size, price)
+        if execution_type != ExecutionType.STOP:
+            self._execute(res.data, self._book(symbol))
+        return res
+
+    @log(logger)
+    def close_bulk_order(self, symbol: Symbol, side: SalesSide, execution_type: ExecutionType,
+                         time_in_force: TimeInForce, size: str, price: str = '0') -> PostCloseBulkOrderRes:
+        """
+        一括決済注文をします。引数はprivate.api.Client.close_bulk_orderと同じです。
+
+        Returns:
+            PostCloseBulkOrderRes
+        """
+        self._begin()
+        self._sync(symbol)
+        res = super().close_bulk_order(symbol, side, execution_type, time_in_force, size, price)
+        if execution_type != ExecutionType.STOP:
+            self._execute(res.data, self._book(symbol))
+        return res
+
+    @log(logger)
+    def change_order(self, order_id: int, price: str, losscut_price: str = '') -> BaseResponse:
+        """
+        注文変更をします。引数はprivate.api.Client.change_orderと同じです。
+        変更後の指値が板と約定可能な場合はその時点で約定します。
+
+        Returns:
+            BaseResponse
+        """
+        self._begin()
+        if order_id in self._orders:
+            self._sync(self._orders[order_id].symbol)
+        res = super().change_order(order_id, price, losscut_price)
+        order = self._orders[order_id]
+        if order.execution_type == ExecutionType.LIMIT:
+            self._execute(order_id, self._book(order.symbol))
+        return res
+
+    @log(logger)
+    def cancel_order(self, order_id: int) -> BaseResponse:
+        """
+        注文取消をします。引数はprivate.api.Client.cancel_orderと同じです。
+
+        Returns:
+            BaseResponse
+        """
+        self._begin()
+        return super().cancel_order(order_id)
+
+    def fill(self, order: ActiveOrder, price: Decimal, taker: bool, timestamp) -> List[LatestExecution]:
+        """
+        注文を約定させ、資産残高に反映します。引数はSimulatedClient.fillと同じです。
+
+        Returns:
+            新たに発生した約定情報
+        """
+        executions = super().fill(order, price, taker, timestamp)
+        with self._lock:
+            jpy = self._balances.get(AssetSymbol.JPY, Decimal(0))
+            for e in executions:
+                if e.symbol in LEVERAGE_SYMBOLS:
+                    jpy += e.loss_gain - e.fee
+                    continue
+                asset = AssetSymbol(e.symbol.value)
+                sign = 1 if e.side == SalesSide.BUY else -1
+                self._balances[asset] = self._balances.get(asset, Decimal(0)) + e.size * sign
+                jpy -= e.price * e.size * sign + e.fee
+            self._balances[AssetSymbol.JPY] = jpy
+        return executions
+
+    def set_last_price(self, symbol: Symbol, price: Decimal, timestamp: datetime) -> None:
+        """
+        最新の約定価格を更新します。現在日時は過去に戻さない。
+        """
+        with self._lock:
+            now = self.now
+            super().set_last_price(symbol, price, timestamp)
+            if now is not None and self.now < now:
+                self.now = now
+
+    @log(logger)
+    def poll(self, symbols: List[Symbol] = None) -> List[LatestExecution]:
+        """
+        get_tradesで新しい約定履歴を取得し、有効注文を判定します。
+        取得するのは最新1ページ分のため、約定が多い銘柄は短い間隔で呼び出すこと。
+        発注時にも同じ銘柄の約定履歴を取得するため、発注前の約定で新しい注文が約定することはありません。
+
+        Args:
+            symbols:
+                対象銘柄。指定しない場合は有効注文のある銘柄。
+
+        Returns:
+            新たに発生した約定情報
+        """
+        if symbols is None:
+            with self._lock:
+                symbols = [s for s, orders in self._live.items() if len(orders) > 0]
+
+        executions = []
+        for symbol in symbols:
+            trades = self.public_client.get_trades(symbol).data.trades or []
+            new = self._cursors.setdefault(symbol, TradeCursor()).new_trades(trades)
+            for trade in new:
+                executions.extend(self.on_trade(symbol, trade.price, trade.timestamp))
+        return executions
+
+    def get_assets(self) -> GetAssetsRes:
+        """
+        資産残高を取得します。円転レートは最新の約定価格を使用します。
+
+        Returns:
+            GetAssetsRes
+        """
+        self._begin()
+        assets = []
+        with self._lock:
+            for symbol, amount in self._balances.items():
+                rate = Decimal(1) if symbol == AssetSymbol.JPY else \
+                    (self.last_price(Symbol(symbol.value)) or Decimal(0))
+                assets.append(GetAssetsData(amount=amount, available=amount, conversion_rate=rate, symbol=symbol))
+        return self._response(GetAssetsRes, assets)
+
+    def get_margin(self) -> GetMarginRes:
+        """
+        余力情報を取得します。拘束証拠金は建玉の約定金額をleverageで割った金額とします。
+
+        Returns:
+            GetMarginRes
+        """
+        with self._lock:
+            margin = Decimal(0)
+            profit_loss = Decimal(0)
+            for position in self._positions.values():
+                margin += position.price * position.size / self.leverage
+                last = self.last_price(position.symbol)
+                if last is not None:
+                    sign = 1 if position.side == SalesSide.BUY else -1
+                    profit_loss += (last - position.price) * position.size * sign
+            actual = self._balances.get(AssetSymbol.JPY, Decimal(0)) + profit_loss
+        ratio = actual / margin * 100 if margin > 0 else Decimal(-1)
+        return self._response(GetMarginRes, GetMarginData(actual_profit_loss=actual, available_amount=actual - margin,
+                                                          margin=margin, margin_call_status=MarginCallStatus.NORMAL,
+                                                          profit_loss=profit_loss, margin_ratio=ratio))
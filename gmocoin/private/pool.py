@@ -0,0 +1,222 @@
+#!python3
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from requests.adapters import HTTPAdapter
+
+from ..common.const import GMOConst
+from ..common.dto import Symbol, AssetSymbol, SalesSide, MarginCallStatus
+from ..common.logging import get_logger, log
+from ..common.ratelimit import RateLimiter
+from ..common.transport import HttpTransport
+from .api import Client
+from .dto import GetAssetsRes, GetMarginRes, GetMarginData, GetPositionSummaryRes, PositionSummary
+
+
+logger = get_logger()
+
+
+class ClientPool:
+    '''
+    複数のAPIキーのプライベートAPIクライアントを管理するクラスです。
+    全クライアントでコネクション(requests.Session)を共有し、レートリミッターはAPIキーごとに持ちます。
+    照会系のメソッドは全口座に並行して送信し、口座名ごとの結果と合算結果を返します。
+    '''
+
+    def __init__(self, accounts: Dict[str, Tuple[str, str]], rate: float = GMOConst.API_RATE_LIMIT,
+                 max_workers: int = 8, transport=None, **client_options) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            accounts:
+                {口座名: (APIキー, APIシークレット)}を設定します。
+            rate:
+                APIキーごとの1秒あたりのリクエスト上限を設定します。
+            max_workers:
+                並行して送信するスレッド数を設定します。共有するコネクションプールの大きさにも使用する。
+            transport:
+                全クライアントで共有するトランスポートを設定します。指定しない場合はHttpTransportを作成する。
+                指定したトランスポートはcloseで閉じないため、呼び出し元で閉じること。
+            client_options:
+                Clientのその他の引数(order_cache circuit_breaker timeout)を設定します。
+        """
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = HttpTransport()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            transport.session.mount('https://', adapter)
+        self.transport = transport
+        self.clients = {name: Client(api_key, secret_key, rate_limiter=RateLimiter(rate), transport=transport,
+                                     **client_options)
+                        for name, (api_key, secret_key) in accounts.items()}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gmocoin-pool')
+
+    def __getitem__(self, name: str) -> Client:
+        """
+        口座名のクライアントを返します。
+        """
+        return self.clients[name]
+
+    def __iter__(self):
+        return iter(self.clients)
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def fan_out(self, method: str, *args, accounts: List[str] = None, return_exceptions: bool = False,
+                **kwargs) -> dict:
+        """
+        クライアントのメソッドを複数の口座に並行して実行します。
+
+        Args:
+            method:
+                Clientのメソッド名
+            *args, **kwargs:
+                メソッドの引数
+            accounts:
+                対象の口座名。指定しない場合は全口座。
+            return_exceptions:
+                Trueの場合、例外を送出せずに結果として返す。
+
+        Returns:
+            {口座名: メソッドの返り値}
+        """
+        names = list(self.clients) if accounts is None else accounts
+        # MEMO: 呼び出し元の期限(deadline)をワーカースレッドに引き継ぐため、コンテキストをコピーして実行する
+        futures = {name: self._executor.submit(copy_context().run, getattr(self.clients[name], method),
+                                               *args, **kwargs)
+                   for name in names}
+        results = {}
+        for name, future in futures.items():
+            error = future.exception()
+            if error is not None and not return_exceptions:
+                # 他の口座の処理は完了を待ってから送出する
+                for f in futures.values():
+                    f.exception()
+                raise error
+            results[name] = error if error is not None else future.result()
+        return results
+
+    @log(logger)
+    def get_assets(self, accounts: List[str] = None) -> Dict[str, GetAssetsRes]:
+        """
+        口座ごとの資産残高を取得します。
+
+        Args:
+            accounts:
+                対象の口座名。指定しない場合は全口座。
+
+        Returns:
+            {口座名: GetAssetsRes}
+        """
+        return self.fan_out('get_assets', accounts=accounts)
+
+    @log(logger)
+    def get_margin(self, accounts: List[str] = None) -> Dict[str, GetMarginRes]:
+        """
+        口座ごとの余力情報を取得します。
+
+        Args:
+            accounts:
+                対象の口座名。指定しない場合は全口座。
+
+        Returns:
+            {口座名: GetMarginRes}
+        """
+        return self.fan_out('get_margin', accounts=accounts)
+
+    @log(logger)
+    def get_position_summary(self, symbol: Symbol, accounts: List[str] = None) -> Dict[str, GetPositionSummaryRes]:
+        """
+        口座ごとの建玉サマリーを取得します。
+
+        Args:
+            symbol:
+                銘柄
+            accounts:
+                対象の口座名。指定しない場合は全口座。
+
+        Returns:
+            {口座名: GetPositionSummaryRes}
+        """
+        return self.fan_out('get_position_summary', symbol, accounts=accounts)
+
+    def total_assets(self, accounts: List[str] = None) -> Dict[AssetSymbol, Decimal]:
+        """
+        全口座の資産残高を銘柄ごとに合算して返します。
+
+        Args:
+            accounts:
+                対象の口座名。指定しない場合は全口座。
+
+        Returns:
+            {AssetSymbol: 残高}
+        """
+        totals = {}
+        for res in self.get_assets(accounts).values():
+            for asset in res.data:
+                totals[asset.symbol] = totals.get(asset.symbol, Decimal(0)) + asset.amount
+        return totals
+
+    def total_margin(self, accounts: List[str] = None) -> GetMarginData:
+        """
+        全口座の余力情報を合算して返します。証拠金維持率は合算値から計算し、追証ステータスは最も悪いものとします。
+
+        Args:
+            accounts:
+                対象の口座名。指定しない場合は全口座。
+
+        Returns:
+            GetMarginData
+        """
+        items = [res.data for res in self.get_margin(accounts).values()]
+        actual = sum((m.actual_profit_loss for m in items), Decimal(0))
+        margin = sum((m.margin for m in items), Decimal(0))
+        statuses = [m.margin_call_status for m in items]
+        status = next((s for s in (MarginCallStatus.LOSSCUT, MarginCallStatus.MARGIN_CALL) if s in statuses),
+                      MarginCallStatus.NORMAL)
+        return GetMarginData(actual_profit_loss=actual,
+                             available_amount=sum((m.available_amount for m in items), Decimal(0)),
+                             margin=margin, margin_call_status=status,
+                             profit_loss=sum((m.profit_loss for m in items), Decimal(0)),
+                             margin_ratio=actual / margin * 100 if margin > 0 else Decimal(-1))
+
+    def total_position_summary(self, symbol: Symbol, accounts: List[str] = None) -> List[PositionSummary]:
+        """
+        全口座の建玉サマリーを売買区分ごとに合算して返します。平均建玉レートは建玉数量で加重平均します。
+
+        Args:
+            symbol:
+                銘柄
+            accounts:
+                対象の口座名。指定しない場合は全口座。
+
+        Returns:
+            List[PositionSummary]
+        """
+        summaries = [p for res in self.get_position_summary(symbol, accounts).values()
+                     for p in (res.data.position_summarys or [])]
+        totals = []
+        for side in SalesSide:
+            items = [p for p in summaries if p.side == side]
+            size = sum((p.sum_position_quantity for p in items), Decimal(0))
+            if len(items) == 0 or size == 0:
+                continue
+            totals.append(PositionSummary(
+                average_position_rate=sum((p.average_position_rate * p.sum_position_quantity for p in items),
+                                          Decimal(0)) / size,
+                position_loss_gain=sum((p.position_loss_gain for p in items), Decimal(0)),
+                side=side, sum_order_quantity=sum((p.sum_order_quantity for p in items), Decimal(0)),
+                sum_position_quantity=size, symbol=symbol))
+        return totals
+
+    def close(self) -> None:
+        """
+        スレッドと、プールで作成したトランスポートのコネクションを解放します。
+        """
+        self._executor.shutdown(wait=True)
+        if self._owns_transport:
+            self.transport.close()
@@ -0,0 +1,268 @@
+#!python3
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List
+
+from ..common.dto import Symbol, SalesSide, SettleType, LEVERAGE_SYMBOLS
+from ..public.dto import GetTickerData
+from .dto import LatestExecution
+
+
+_OPPOSITE = {SalesSide.BUY: SalesSide.SELL, SalesSide.SELL: SalesSide.BUY}
+
+
+class Position:
+    """
+    銘柄・売買区分ごとの建玉クラスです。
+    """
+    def __init__(self, symbol: Symbol, side: SalesSide) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            symbol:
+                銘柄を設定します。
+            side:
+                建玉の売買区分を設定します。現物取引の保有分はBUYとして扱う。
+        """
+        self.symbol = symbol
+        self.side = side
+        self.size = Decimal(0)
+        self.average_price = Decimal(0)
+        self.realized_pnl = Decimal(0)
+        self.fee = Decimal(0)
+
+    def unrealized_pnl(self, ticker: GetTickerData) -> Decimal:
+        """
+        評価損益を返します。買建玉はbid、売建玉はaskで評価します。
+
+        Args:
+            ticker:
+                最新レート
+
+        Returns:
+            Decimal
+        """
+        if self.size == 0 or ticker is None:
+            return Decimal(0)
+        if self.side == SalesSide.BUY:
+            return (ticker.bid - self.average_price) * self.size
+        return (self.average_price - ticker.ask) * self.size
+
+
+class PositionTracker:
+    '''
+    約定情報と最新レートから建玉・平均建玉レート・損益をメモリ上で計算するクラスです。
+    get_position_summaryとは低頻度で突き合わせ、リスクチェックはAPI呼び出し無しで行えます。
+    '''
+
+    def __init__(self, reconcile_interval: float = 300.0) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            reconcile_interval:
+                maybe_reconcileでget_position_summaryと突き合わせる間隔秒数を設定します。
+        """
+        self.reconcile_interval = reconcile_interval
+        self._positions = {}
+        self._tickers = {}
+        self._last_execution_id = {}
+        # reconcileで取得した建玉の時点(取引所の日時)
+        self._reconciled_at = {}
+        self._last_reconciled = {}
+        self._lock = threading.Lock()
+
+    def _position(self, symbol: Symbol, side: SalesSide) -> Position:
+        """
+        建玉を返します。存在しない場合は作成します。ロック取得済みで呼び出すこと。
+        """
+        key = (symbol, side)
+        position = self._positions.get(key)
+        if position is None:
+            position = self._positions[key] = Position(symbol, side)
+        return position
+
+    def apply_executions(self, executions: List[LatestExecution]) -> None:
+        """
+        約定情報を反映します。銘柄ごとに反映済みの約定ID以下の約定と、
+        reconcileで取得した建玉に含まれる約定(約定日時が取得時点以前)は無視します。
+
+        Args:
+            executions:
+                get_latest_executionsまたはExecutionSyncStore.syncで取得した約定情報
+        """
+        with self._lock:
+            for e in sorted(executions, key=lambda e: e.execution_id):
+                if e.execution_id <= self._last_execution_id.get(e.symbol, 0):
+                    continue
+                self._last_execution_id[e.symbol] = e.execution_id
+                reconciled_at = self._reconciled_at.get(e.symbol)
+                if reconciled_at is not None and e.timestamp <= reconciled_at:
+                    continue
+                self._apply(e)
+
+    def _apply(self, e: LatestExecution) -> None:
+        """
+        約定を1件反映します。ロック取得済みで呼び出すこと。
+        """
+        if e.symbol in LEVERAGE_SYMBOLS:
+            is_open = e.settle_type == SettleType.OPEN
+            # 決済約定の売買区分は決済する建玉と逆になる
+            side = e.side if is_open else _OPPOSITE[e.side]
+        else:
+            is_open = e.side == SalesSide.BUY
+            side = SalesSide.BUY
+
+        position = self._position(e.symbol, side)
+        position.fee += e.fee
+
+        if is_open:
+            size = position.size + e.size
+            position.average_price = (position.average_price * position.size + e.price * e.size) / size
+            position.size = size
+            return
+
+        closed = min(e.size, position.size)
+        if e.symbol in LEVERAGE_SYMBOLS:
+            position.realized_pnl += e.loss_gain
+        else:
+            position.realized_pnl += (e.price - position.average_price) * closed
+        position.size -= closed
+        if position.size == 0:
+            position.average_price = Decimal(0)
+
+    def update_ticker(self, ticker: GetTickerData) -> None:
+        """
+        評価に使用する最新レートを更新します。
+
+        Args:
+            ticker:
+                get_tickerで取得した最新レート
+        """
+        with self._lock:
+            self._tickers[ticker.symbol] = ticker
+
+    def get_position(self, symbol: Symbol, side: SalesSide = SalesSide.BUY) -> Position:
+        """
+        建玉を返します。
+
+        Args:
+            symbol:
+                銘柄
+            side:
+                建玉の売買区分
+
+        Returns:
+            Position
+        """
+        with self._lock:
+            return self._position(symbol, side)
+
+    def net_size(self, symbol: Symbol) -> Decimal:
+        """
+        買建玉数量 - 売建玉数量を返します。
+
+        Args:
+            symbol:
+                銘柄
+
+        Returns:
+            Decimal
+        """
+        with self._lock:
+            return self._position(symbol, SalesSide.BUY).size - self._position(symbol, SalesSide.SELL).size
+
+    def unrealized_pnl(self, symbol: Symbol) -> Decimal:
+        """
+        最新レートで評価した評価損益を返します。最新レートが無い場合は0を返します。
+
+        Args:
+            symbol:
+                銘柄
+
+        Returns:
+            Decimal
+        """
+        with self._lock:
+            ticker = self._tickers.get(symbol)
+            return sum((self._position(symbol, side).unrealized_pnl(ticker) for side in SalesSide), Decimal(0))
+
+    def realized_pnl(self, symbol: Symbol) -> Decimal:
+        """
+        決済損益の合計から手数料を差し引いた実現損益を返します。
+
+        Args:
+            symbol:
+                銘柄
+
+        Returns:
+            Decimal
+        """
+        with self._lock:
+            return sum((self._position(symbol, side).realized_pnl - self._position(symbol, side).fee
+                        for side in SalesSide), Decimal(0))
+
+    def summary(self) -> Dict[Symbol, Dict[str, Decimal]]:
+        """
+        建玉のある銘柄ごとの数量・損益を返します。
+
+        Returns:
+            {Symbol: {'net_size', 'unrealized_pnl', 'realized_pnl'}}
+        """
+        with self._lock:
+            symbols = {symbol for (symbol, _) in self._positions}
+        return {s: {'net_size': self.net_size(s),
+                    'unrealized_pnl': self.unrealized_pnl(s),
+                    'realized_pnl': self.realized_pnl(s)} for s in symbols}
+
+    def reconcile(self, client, symbol: Symbol) -> None:
+        """
+        get_position_summaryの結果で建玉数量と平均建玉レートを置き換えます。
+        対象はレバレッジ取引の銘柄のみです。取得時点以前の約定はapply_executionsで反映しません。
+
+        Args:
+            client:
+                プライベートAPIクライアント
+            symbol:
+                銘柄
+        """
+        if symbol not in LEVERAGE_SYMBOLS:
+            return
+        res = client.get_position_summary(symbol)
+        summaries = {p.side: p for p in (res.data.position_summarys or [])}
+        with self._lock:
+            for side in SalesSide:
+                position = self._position(symbol, side)
+                summary = summaries.get(side)
+                if summary is None:
+                    position.size = Decimal(0)
+                    position.average_price = Decimal(0)
+                else:
+                    position.size = summary.sum_position_quantity
+                    position.average_price = summary.average_position_rate
+            self._reconciled_at[symbol] = res.responsetime
+            self._last_reconciled[symbol] = time.monotonic()
+
+    def maybe_reconcile(self, client, symbols: List[Symbol]) -> List[Symbol]:
+        """
+        前回の突き合わせからreconcile_interval秒以上経過した銘柄のみ突き合わせます。
+
+        Args:
+            client:
+                プライベートAPIクライアント
+            symbols:
+                対象銘柄
+
+        Returns:
+            突き合わせを行った銘柄
+        """
+        now = time.monotonic()
+        reconciled = []
+        for symbol in symbols:
+            last = self._last_reconciled.get(symbol)
+            if symbol in LEVERAGE_SYMBOLS and (last is None or now - last >= self.reconcile_interval):
+                self.reconcile(client, symbol)
+                reconciled.append(symbol)
+        return reconciled
@@ -0,0 +1,102 @@
+#!python3
+import inspect
+from decimal import Decimal
+from functools import wraps
+from typing import Callable
+
+from ..common.dto import Symbol, SalesSide, ExecutionType
+from ..common.exception import PreTradeRejectedException
+from ..common.logging import get_logger
+
+
+logger = get_logger()
+
+
+def check_pre_trade(func):
+    """
+    発注前にクライアントのpre_trade_checksを順に呼び出すデコレーターです。
+    update_order_cacheより外側に指定します。
+
+    各確認は(メソッド名, 引数の辞書)で呼び出され、PreTradeRejectedExceptionを送出して注文を拒否するか、
+    引数の辞書を書き換えて送信する値(価格・数量の丸め等)を変更できます。
+
+    Args:
+        func (function)
+    Returns:
+        wrapperの返り値
+    """
+    signature = inspect.signature(func)
+
+    # funcのメタデータを引き継ぐ
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        """
+        実際の処理を書くための関数
+
+        Args:
+            *args, **kwargs:
+                funcの引数
+
+        Returns:
+            funcの返り値
+        """
+        checks = getattr(self, 'pre_trade_checks', None)
+        if not checks:
+            return func(self, *args, **kwargs)
+
+        # MEMO: timeoutはpost_requestが処理する引数のため、束縛対象から除く
+        options = {k: v for k, v in kwargs.items() if k == 'timeout'}
+        bound = signature.bind(self, *args, **{k: v for k, v in kwargs.items() if k != 'timeout'})
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        del arguments['self']
+        for check in checks:
+            check(func.__name__, arguments)
+        return func(self, **arguments, **options)
+
+    return wrapper
+
+
+class SlippageGuard:
+    '''
+    成行注文の想定スリッページが上限を超える場合に注文を拒否する発注前確認クラスです。
+    private.api.Clientのpre_trade_checksに指定して使用します。
+    '''
+
+    def __init__(self, book: Callable[[Symbol], object], max_slippage_bps: float,
+                 allow_partial: bool = False) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            book:
+                銘柄の板情報(GetOrderBooksData)を返す関数を設定します。
+                例: lambda symbol: public_client.get_orderbooks(symbol).data、SharedOrderBook.attach(symbol).read
+            max_slippage_bps:
+                最良気配に対する平均約定価格の乖離の上限(ベーシスポイント)を設定します。
+            allow_partial:
+                Trueの場合、板の数量が不足していても拒否しない。
+        """
+        self.book = book
+        self.max_slippage_bps = max_slippage_bps
+        self.allow_partial = allow_partial
+
+    def __call__(self, method: str, arguments: dict) -> None:
+        """
+        成行の注文・決済注文・一括決済注文の想定スリッページを確認します。
+        """
+        if arguments.get('execution_type') != ExecutionType.MARKET:
+            return
+        from ..public.analytics import estimate_impact
+
+        size = arguments.get('size', arguments.get('position_size'))
+        symbol, side = arguments['symbol'], arguments['side']
+        estimate = estimate_impact(self.book(symbol), side, [float(Decimal(size))])
+        if not self.allow_partial and not estimate.fully_filled[0]:
+            raise PreTradeRejectedException(
+                f'{symbol.value} {side.value} {size}: order book has only {estimate.filled[0]:g}')
+        slippage = float(estimate.slippage_bps[0])
+        if slippage > self.max_slippage_bps:
+            raise PreTradeRejectedException(
+                f'{symbol.value} {side.value} {size}: expected slippage {slippage:.1f}bps '
+                f'exceeds {self.max_slippage_bps}bps')
@@ -0,0 +1,140 @@
+#!python3
+from decimal import Decimal, ROUND_DOWN, ROUND_UP
+from typing import Dict
+
+from ..common.dto import Symbol, SalesSide, ExecutionType, TimeInForce, LEVERAGE_SYMBOLS
+from ..common.exception import PreTradeRejectedException
+
+
+class SymbolRule:
+    """
+    銘柄ごとの取引ルールクラスです。
+    """
+    def __init__(self, min_size: str, size_step: str, tick_size: str, max_size: str = None,
+                 sok: bool = True) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            min_size:
+                最小注文数量を設定します。
+            size_step:
+                注文数量の単位を設定します。
+            tick_size:
+                呼値の単位を設定します。
+            max_size:
+                1回あたりの最大注文数量を設定します。指定しない場合は確認しない。
+            sok:
+                SOK(Post-only)を指定できるかどうかを設定します。
+        """
+        self.min_size = Decimal(min_size)
+        self.size_step = Decimal(size_step)
+        self.tick_size = Decimal(tick_size)
+        self.max_size = Decimal(max_size) if max_size is not None else None
+        self.sok = sok
+
+
+# 取引ルール(取引所の公開している取引ルールに基づく。変更された場合はOrderValidatorのrulesで上書きすること)
+DEFAULT_RULES = {
+    Symbol.BTC: SymbolRule('0.0001', '0.0001', '1'),
+    Symbol.ETH: SymbolRule('0.01', '0.0001', '1'),
+    Symbol.BCH: SymbolRule('0.01', '0.0001', '1'),
+    Symbol.LTC: SymbolRule('0.1', '0.01', '1'),
+    Symbol.XRP: SymbolRule('1', '1', '0.001'),
+    Symbol.XEM: SymbolRule('10', '1', '0.0001'),
+    Symbol.BTC_JPY: SymbolRule('0.01', '0.01', '1'),
+    Symbol.ETH_JPY: SymbolRule('0.1', '0.1', '1', sok=False),
+    Symbol.BCH_JPY: SymbolRule('0.1', '0.1', '1', sok=False),
+    Symbol.LTC_JPY: SymbolRule('1', '1', '1', sok=False),
+    Symbol.XRP_JPY: SymbolRule('10', '10', '0.001', sok=False),
+}
+
+# 注文タイプごとに指定可能な執行数量条件
+TIME_IN_FORCE = {
+    ExecutionType.MARKET: (TimeInForce.FAK,),
+    ExecutionType.STOP: (TimeInForce.FAK,),
+    ExecutionType.LIMIT: (TimeInForce.FAS, TimeInForce.FOK, TimeInForce.SOK),
+}
+
+
+def _quantize(value: Decimal, step: Decimal, rounding: str) -> Decimal:
+    """
+    値をstepの倍数に丸めます。
+    """
+    return (value / step).to_integral_value(rounding=rounding) * step
+
+
+class OrderValidator:
+    '''
+    銘柄ごとの取引ルールで注文を確認し、価格・数量を有効な単位に丸める発注前確認クラスです。
+    private.api.Clientのpre_trade_checksに指定するか、Clientのvalidate_orders=Trueで使用します。
+    ルールに違反する注文はリクエストを送信せずにPreTradeRejectedExceptionを送出します。
+
+    数量は注文単位に切り捨てます。価格は指値注文では約定しにくい方向(買いは切り捨て、売りは切り上げ)、
+    逆指値注文では発動しにくい方向(買いは切り上げ、売りは切り捨て)に呼値の単位で丸めます。
+    '''
+
+    def __init__(self, rules: Dict[Symbol, SymbolRule] = None, round_values: bool = True) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            rules:
+                銘柄ごとの取引ルールを設定します。指定した銘柄はDEFAULT_RULESを上書きする。
+            round_values:
+                Trueの場合は価格・数量を丸める。Falseの場合は単位に合わない注文を拒否する。
+        """
+        self.rules = dict(DEFAULT_RULES)
+        self.rules.update(rules or {})
+        self.round_values = round_values
+
+    def _round(self, name: str, value: Decimal, step: Decimal, rounding: str) -> Decimal:
+        """
+        値を単位に丸めます。丸めない設定で単位に合わない場合は注文を拒否します。
+        """
+        rounded = _quantize(value, step, rounding)
+        if rounded != value and not self.round_values:
+            raise PreTradeRejectedException(f'{name} {value} is not a multiple of {step}')
+        return rounded
+
+    def __call__(self, method: str, arguments: dict) -> None:
+        """
+        注文・決済注文・一括決済注文の引数を確認し、価格・数量を丸めます。
+        """
+        symbol = arguments['symbol']
+        execution_type = arguments['execution_type']
+        time_in_force = arguments['time_in_force']
+        rule = self.rules.get(symbol)
+
+        if method in ('close_order', 'close_bulk_order') and symbol not in LEVERAGE_SYMBOLS:
+            raise PreTradeRejectedException(f'{method} is only available for leverage symbols ({symbol.value})')
+        if time_in_force not in TIME_IN_FORCE.get(execution_type, ()):
+            raise PreTradeRejectedException(
+                f'{time_in_force.value} is not available for {execution_type.value} orders')
+        if rule is None:
+            return
+        if time_in_force == TimeInForce.SOK and not rule.sok:
+            raise PreTradeRejectedException(f'SOK is not available for {symbol.value}')
+
+        key = 'position_size' if method == 'close_order' else 'size'
+        size = self._round('size', Decimal(arguments[key]), rule.size_step, ROUND_DOWN)
+        if size < rule.min_size:
+            raise PreTradeRejectedException(f'size {arguments[key]} is below the minimum {rule.min_size} '
+                                            f'for {symbol.value}')
+        if rule.max_size is not None and size > rule.max_size:
+            raise PreTradeRejectedException(f'size {arguments[key]} exceeds the maximum {rule.max_size} '
+                                            f'for {symbol.value}')
+        arguments[key] = f'{size:f}'
+
+        if execution_type == ExecutionType.MARKET:
+            return
+        price = Decimal(arguments['price'])
+        if price <= 0:
+            raise PreTradeRejectedException(f'price is required for {execution_type.value} orders')
+        buy = arguments['side'] == SalesSide.BUY
+        passive = (buy and execution_type == ExecutionType.LIMIT) or \
+            (not buy and execution_type == ExecutionType.STOP)
+        price = self._round('price', price, rule.tick_size, ROUND_DOWN if passive else ROUND_UP)
+        if price <= 0:
+            raise PreTradeRejectedException(f'price {arguments["price"]} is below the tick size {rule.tick_size}')
+        arguments['price'] = f'{price:f}'
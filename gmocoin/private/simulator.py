@@ -0,0 +1,500 @@
+#!python3
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List
+
+from pytz import utc
+
+from ..common.dto import Symbol, SalesSide, OrderType, ExecutionType, SettleType, OrderStatus, TimeInForce, \
+    BaseResponse, ErrorResponse, Message, LEVERAGE_SYMBOLS
+from ..common.exception import GmoCoinException
+from ..public.dto import GetTickerData
+from .dto import ActiveOrder, ActiveOrdersPagenation, GetActiveOrdersData, GetActiveOrdersRes, \
+    LatestExecution, LatestExecutionsPagenation, GetLatestExecutionsData, GetLatestExecutionsRes, \
+    PositionSummary, GetPositionSummaryData, GetPositionSummaryRes, \
+    PostOrderRes, PostCloseOrderRes, PostCloseBulkOrderRes
+from .order_cache import LIVE_STATUSES
+from .position import PositionTracker
+
+
+class OpenPosition:
+    """
+    模擬約定で建てたレバレッジ取引の建玉クラスです。
+    """
+    def __init__(self, position_id: int, symbol: Symbol, side: SalesSide, size: Decimal, price: Decimal,
+                 timestamp: datetime) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            position_id:
+                建玉ID
+            symbol:
+                銘柄
+            side:
+                売買区分
+            size:
+                建玉数量
+            price:
+                建玉レート
+            timestamp:
+                約定日時
+        """
+        self.position_id = position_id
+        self.symbol = symbol
+        self.side = side
+        self.size = size
+        self.price = price
+        self.timestamp = timestamp
+
+
+def _error(message_code: str, message_string: str) -> GmoCoinException:
+    """
+    APIのエラーレスポンスと同じ形式の例外を生成します。
+    """
+    return GmoCoinException(200, messageg=ErrorResponse(status=1, messages=[Message(message_code, message_string)]))
+
+
+class SimulatedClient:
+    '''
+    約定を模擬するプライベートAPIクライアントクラスです。
+    private.api.Clientと同じシグネチャで注文・変更・取消・決済・照会を受け付け、
+    on_tradeまたはfillで与えられた約定価格で注文を約定させます。
+
+    約定の判定は以下の通りです。数量は全量約定とします。
+        MARKET: 発注後の最初の約定価格で約定(テイカー)
+        STOP: 約定価格が逆指値に達した時点の約定価格で約定(テイカー)
+        LIMIT: 発注後の最初の約定価格で約定可能な場合はその価格で約定(テイカー)、
+               以降は約定価格が指値を超えた時点で指値で約定(メイカー)
+               FAK FOKで最初に約定しない場合は失効、SOKで最初に約定可能な場合は取消とする
+    '''
+
+    def __init__(self, maker_fee: str = '0', taker_fee: str = '0', fill_on_touch: bool = False) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            maker_fee:
+                メイカー手数料率を設定します。マイナスの場合は手数料の受取となる。
+            taker_fee:
+                テイカー手数料率を設定します。
+            fill_on_touch:
+                Trueの場合、指値と同じ約定価格でも約定したとみなす。Falseの場合は指値を超えた約定価格が必要。
+        """
+        self.maker_fee = Decimal(maker_fee)
+        self.taker_fee = Decimal(taker_fee)
+        self.fill_on_touch = fill_on_touch
+        self.tracker = PositionTracker()
+        self.now = datetime.now(utc)
+        self._orders = {}
+        self._live = {}
+        self._fresh = set()
+        self._settle_position_id = {}
+        self._positions = {}
+        self._executions = {}
+        self._last_prices = {}
+        self._next_order_id = 1
+        self._next_execution_id = 1
+        self._next_position_id = 1
+        self._lock = threading.RLock()
+
+    def _response(self, Res, data=None):
+        """
+        レスポンスを生成します。
+        """
+        if Res is BaseResponse:
+            return BaseResponse(status=0, responsetime=self.now)
+        return Res(status=0, responsetime=self.now, data=data)
+
+    def _new_order(self, symbol: Symbol, side: SalesSide, execution_type: ExecutionType, settle_type: SettleType,
+                   time_in_force: TimeInForce, size: str, price: str, losscut_price: str = '0') -> int:
+        """
+        注文を受け付けます。
+        """
+        if Decimal(size) <= 0:
+            raise _error('ERR-5106', 'Invalid request parameter. size')
+        if execution_type != ExecutionType.MARKET and Decimal(price) <= 0:
+            raise _error('ERR-5106', 'Invalid request parameter. price')
+        with self._lock:
+            order_id = self._next_order_id
+            self._next_order_id += 1
+            status = OrderStatus.WAITING if execution_type == ExecutionType.STOP else OrderStatus.ORDERED
+            order = ActiveOrder(root_order_id=order_id, order_id=order_id, symbol=symbol, side=side,
+                                order_type=OrderType.NORMAL, execution_type=execution_type, settle_type=settle_type,
+                                size=Decimal(size), executed_size=Decimal(0),
+                                price=Decimal(0) if execution_type == ExecutionType.MARKET else Decimal(price),
+                                losscut_price=Decimal(losscut_price), status=status, time_in_force=time_in_force,
+                                timestamp=self.now)
+            self._orders[order_id] = order
+            self._live.setdefault(symbol, {})[order_id] = order
+            self._fresh.add(order_id)
+            return order_id
+
+    def order(self, symbol: Symbol, side: SalesSide, execution_type: ExecutionType, time_in_force: TimeInForce,
+              size: str, price: str = '0', losscut_price: str = '0') -> PostOrderRes:
+        """
+        新規注文をします。引数はprivate.api.Client.orderと同じです。
+
+        Returns:
+            PostOrderRes
+        """
+        if time_in_force == TimeInForce.SOK and symbol in LEVERAGE_SYMBOLS and symbol != Symbol.BTC_JPY:
+            raise _error('ERR-5106', 'Invalid request parameter. timeInForce')
+        order_id = self._new_order(symbol, side, execution_type, SettleType.OPEN, time_in_force, size, price,
+                                   losscut_price)
+        return self._response(PostOrderRes, order_id)
+
+    def close_order(self, symbol: Symbol, side: SalesSide, execution_type: ExecutionType,
+                    time_in_force: TimeInForce, position_id: int, position_size: str,
+                    price: str = '0') -> PostCloseOrderRes:
+        """
+        決済注文をします。引数はprivate.api.Client.close_orderと同じです。
+
+        Returns:
+            PostCloseOrderRes
+        """
+        with self._lock:
+            position = self._positions.get(position_id)
+            if position is None or position.symbol != symbol or position.side == side:
+                raise _error('ERR-254', 'Not found position.')
+            if Decimal(position_size) > position.size:
+                raise _error('ERR-422', 'There are no open positions that can be settled.')
+            order_id = self._new_order(symbol, side, execution_type, SettleType.CLOSE, time_in_force,
+                                       position_size, price)
+            self._settle_position_id[order_id] = position_id
+        return self._response(PostCloseOrderRes, order_id)
+
+    def close_bulk_order(self, symbol: Symbol, side: SalesSide, execution_type: ExecutionType,
+                         time_in_force: TimeInForce, size: str, price: str = '0') -> PostCloseBulkOrderRes:
+        """
+        一括決済注文をします。引数はprivate.api.Client.close_bulk_orderと同じです。
+
+        Returns:
+            PostCloseBulkOrderRes
+        """
+        with self._lock:
+            open_size = sum((p.size for p in self._positions.values() if p.symbol == symbol and p.side != side),
+                            Decimal(0))
+            if Decimal(size) > open_size:
+                raise _error('ERR-422', 'There are no open positions that can be settled.')
+            order_id = self._new_order(symbol, side, execution_type, SettleType.CLOSE, time_in_force, size, price)
+            self._settle_position_id[order_id] = None
+        return self._response(PostCloseBulkOrderRes, order_id)
+
+    def _live_order(self, order_id: int) -> ActiveOrder:
+        """
+        有効注文を返します。ロック取得済みで呼び出すこと。
+        """
+        order = self._orders.get(order_id)
+        if order is None or order.status not in LIVE_STATUSES:
+            raise _error('ERR-5122', 'The request is invalid due to the status of the specified order.')
+        return order
+
+    def change_order(self, order_id: int, price: str, losscut_price: str = '') -> BaseResponse:
+        """
+        注文変更をします。引数はprivate.api.Client.change_orderと同じです。
+
+        Returns:
+            BaseResponse
+        """
+        with self._lock:
+            order = self._live_order(order_id)
+            if order.execution_type == ExecutionType.MARKET:
+                raise _error('ERR-5122', 'The request is invalid due to the status of the specified order.')
+            order.price = Decimal(price)
+            if len(losscut_price) > 0:
+                order.losscut_price = Decimal(losscut_price)
+        return self._response(BaseResponse)
+
+    def cancel_order(self, order_id: int) -> BaseResponse:
+        """
+        注文取消をします。引数はprivate.api.Client.cancel_orderと同じです。
+
+        Returns:
+            BaseResponse
+        """
+        with self._lock:
+            self.close(self._live_order(order_id), OrderStatus.CANCELED)
+        return self._response(BaseResponse)
+
+    def get_active_orders(self, symbol: Symbol, page: int = 1, count: int = 100) -> GetActiveOrdersRes:
+        """
+        有効注文一覧を取得します。引数はprivate.api.Client.get_active_ordersと同じです。
+
+        Returns:
+            GetActiveOrdersRes
+        """
+        with self._lock:
+            orders = sorted(self._live.get(symbol, {}).values(), key=lambda o: o.order_id, reverse=True)
+        orders = orders[(page - 1) * count:page * count]
+        return self._response(GetActiveOrdersRes, GetActiveOrdersData(
+            pagination=ActiveOrdersPagenation(current_page=page, count=len(orders)), active_orders=orders))
+
+    def get_latest_executions(self, symbol: Symbol, page: int = 1, count: int = 100) -> GetLatestExecutionsRes:
+        """
+        最新の約定一覧を取得します。引数はprivate.api.Client.get_latest_executionsと同じです。
+
+        Returns:
+            GetLatestExecutionsRes
+        """
+        with self._lock:
+            executions = self._executions.get(symbol, [])
+            end = len(executions) - (page - 1) * count
+            executions = executions[max(0, end - count):max(0, end)][::-1]
+        return self._response(GetLatestExecutionsRes, GetLatestExecutionsData(
+            pagination=LatestExecutionsPagenation(current_page=page, count=len(executions)),
+            latest_executions=executions))
+
+    def get_position_summary(self, symbol: Symbol) -> GetPositionSummaryRes:
+        """
+        建玉サマリーを取得します。引数はprivate.api.Client.get_position_summaryと同じです。
+
+        Returns:
+            GetPositionSummaryRes
+        """
+        summaries = []
+        with self._lock:
+            last = self._last_prices.get(symbol)
+            for side in SalesSide:
+                positions = [p for p in self._positions.values() if p.symbol == symbol and p.side == side]
+                if len(positions) == 0:
+                    continue
+                size = sum((p.size for p in positions), Decimal(0))
+                average = sum((p.price * p.size for p in positions), Decimal(0)) / size
+                ordered = sum((o.size - o.executed_size for o in self._live.get(symbol, {}).values()
+                               if o.settle_type == SettleType.CLOSE and o.side != side), Decimal(0))
+                loss_gain = Decimal(0) if last is None else (last - average) * size * (1 if side == SalesSide.BUY else -1)
+                summaries.append(PositionSummary(average_position_rate=average, position_loss_gain=loss_gain,
+                                                 side=side, sum_order_quantity=ordered, sum_position_quantity=size,
+                                                 symbol=symbol))
+        return self._response(GetPositionSummaryRes, GetPositionSummaryData(position_summarys=summaries))
+
+    def live_orders(self, symbol: Symbol) -> List[ActiveOrder]:
+        """
+        指定した銘柄の有効注文を注文ID順に返します。
+
+        Args:
+            symbol:
+                銘柄
+
+        Returns:
+            List[ActiveOrder]
+        """
+        with self._lock:
+            return sorted(self._live.get(symbol, {}).values(), key=lambda o: o.order_id)
+
+    def is_fresh(self, order_id: int) -> bool:
+        """
+        発注後にまだ約定価格を受け取っていない注文かどうかを返します。
+        """
+        return order_id in self._fresh
+
+    def through(self, order: ActiveOrder, price: Decimal) -> bool:
+        """
+        約定価格が指値を超えたかどうかを返します。
+        """
+        if order.side == SalesSide.BUY:
+            return price <= order.price if self.fill_on_touch else price < order.price
+        return price >= order.price if self.fill_on_touch else price > order.price
+
+    def match(self, order: ActiveOrder, price: Decimal):
+        """
+        1件の約定価格に対する注文の約定を判定します。
+
+        Args:
+            order:
+                有効注文
+            price:
+                約定価格
+
+        Returns:
+            約定する場合は(約定価格, テイカーの場合True)、失効・取消する場合はOrderStatus、約定しない場合はNone
+        """
+        fresh = order.order_id in self._fresh
+        if order.execution_type == ExecutionType.MARKET:
+            return (price, True)
+        if order.execution_type == ExecutionType.STOP:
+            triggered = price >= order.price if order.side == SalesSide.BUY else price <= order.price
+            return (price, True) if triggered else None
+
+        marketable = price <= order.price if order.side == SalesSide.BUY else price >= order.price
+        if fresh:
+            if marketable:
+                return OrderStatus.CANCELED if order.time_in_force == TimeInForce.SOK else (price, True)
+            if order.time_in_force in (TimeInForce.FAK, TimeInForce.FOK):
+                return OrderStatus.EXPIRED
+            return None
+        return (order.price, False) if self.through(order, price) else None
+
+    def on_trade(self, symbol: Symbol, price: Decimal, timestamp: datetime) -> List[LatestExecution]:
+        """
+        1件の約定価格で指定した銘柄の有効注文を判定し、約定させます。
+
+        Args:
+            symbol:
+                銘柄
+            price:
+                約定価格
+            timestamp:
+                約定日時
+
+        Returns:
+            新たに発生した約定情報
+        """
+        executions = []
+        with self._lock:
+            self.set_last_price(symbol, price, timestamp)
+            for order in self.live_orders(symbol):
+                result = self.match(order, price)
+                self._fresh.discard(order.order_id)
+                if isinstance(result, OrderStatus):
+                    self.close(order, result)
+                elif result is not None:
+                    executions.extend(self.fill(order, result[0], result[1], timestamp))
+        return executions
+
+    def last_price(self, symbol: Symbol) -> Decimal:
+        """
+        最新の約定価格を返します。
+
+        Args:
+            symbol:
+                銘柄
+
+        Returns:
+            Decimal。約定価格を受け取っていない場合はNone。
+        """
+        return self._last_prices.get(symbol)
+
+    def set_last_price(self, symbol: Symbol, price: Decimal, timestamp: datetime) -> None:
+        """
+        評価に使用する最新の約定価格と現在日時を更新します。
+        """
+        with self._lock:
+            self.now = timestamp
+            self._last_prices[symbol] = price
+            self.tracker.update_ticker(GetTickerData(symbol=symbol, timestamp=timestamp, volume=Decimal(0),
+                                                     ask=price, bid=price, high=price, last=price, low=price))
+
+    def seen(self, order_id: int) -> None:
+        """
+        注文が約定価格を受け取ったことを記録します。
+        """
+        self._fresh.discard(order_id)
+
+    def close(self, order: ActiveOrder, status: OrderStatus) -> None:
+        """
+        注文を有効注文から除外します。
+        """
+        with self._lock:
+            order.status = status
+            self._live.get(order.symbol, {}).pop(order.order_id, None)
+            self._fresh.discard(order.order_id)
+            self._settle_position_id.pop(order.order_id, None)
+
+    def fill(self, order: ActiveOrder, price: Decimal, taker: bool, timestamp: datetime) -> List[LatestExecution]:
+        """
+        注文を全量約定させます。
+
+        Args:
+            order:
+                有効注文
+            price:
+                約定価格
+            taker:
+                テイカーの場合True
+            timestamp:
+                約定日時
+
+        Returns:
+            新たに発生した約定情報
+        """
+        rate = self.taker_fee if taker else self.maker_fee
+        with self._lock:
+            if order.symbol not in LEVERAGE_SYMBOLS or order.settle_type == SettleType.OPEN:
+                if order.symbol in LEVERAGE_SYMBOLS:
+                    position_id = self._next_position_id
+                    self._next_position_id += 1
+                    self._positions[position_id] = OpenPosition(position_id, order.symbol, order.side,
+                                                                order.size, price, timestamp)
+                chunks = [(order.size, Decimal(0))]
+            else:
+                chunks = self._settle(order, price)
+
+            executions = []
+            for size, loss_gain in chunks:
+                executions.append(LatestExecution(execution_id=self._next_execution_id, order_id=order.order_id,
+                                                  symbol=order.symbol, side=order.side,
+                                                  settle_type=order.settle_type, size=size, price=price,
+                                                  loss_gain=loss_gain, fee=price * size * rate, timestamp=timestamp))
+                self._next_execution_id += 1
+
+            if len(executions) == 0:
+                # 決済対象の建玉が既に無い場合は取消とする
+                self.close(order, OrderStatus.CANCELED)
+                return executions
+            order.executed_size = sum((e.size for e in executions), Decimal(0))
+            self.close(order, OrderStatus.EXECUTED)
+            self._executions.setdefault(order.symbol, []).extend(executions)
+            self.tracker.apply_executions(executions)
+        return executions
+
+    def _settle(self, order: ActiveOrder, price: Decimal) -> list:
+        """
+        決済注文の対象建玉を決済し、(決済数量, 決済損益)のリストを返します。ロック取得済みで呼び出すこと。
+        """
+        position_id = self._settle_position_id.get(order.order_id)
+        if position_id is not None:
+            targets = [self._positions[position_id]] if position_id in self._positions else []
+        else:
+            # 一括決済は古い建玉から決済する
+            targets = sorted((p for p in self._positions.values()
+                              if p.symbol == order.symbol and p.side != order.side), key=lambda p: p.position_id)
+
+        chunks = []
+        remaining = order.size
+        for position in targets:
+            if remaining <= 0:
+                break
+            size = min(remaining, position.size)
+            sign = 1 if position.side == SalesSide.BUY else -1
+            chunks.append((size, (price - position.price) * size * sign))
+            position.size -= size
+            remaining -= size
+            if position.size == 0:
+                del self._positions[position.position_id]
+        return chunks
+
+    def open_positions(self, symbol: Symbol) -> List[OpenPosition]:
+        """
+        指定した銘柄の建玉を建玉ID順に返します。
+
+        Args:
+            symbol:
+                銘柄
+
+        Returns:
+            List[OpenPosition]
+        """
+        with self._lock:
+            return sorted((p for p in self._positions.values() if p.symbol == symbol), key=lambda p: p.position_id)
+
+    def executions(self) -> List[LatestExecution]:
+        """
+        全銘柄の約定情報を約定ID順に返します。
+
+        Returns:
+            List[LatestExecution]
+        """
+        with self._lock:
+            return sorted((e for es in self._executions.values() for e in es), key=lambda e: e.execution_id)
+
+    def summary(self) -> Dict[Symbol, Dict[str, Decimal]]:
+        """
+        銘柄ごとの数量・損益を返します。
+
+        Returns:
+            {Symbol: {'net_size', 'unrealized_pnl', 'realized_pnl'}}
+        """
+        return self.tracker.summary()
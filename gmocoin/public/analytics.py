@@ -0,0 +1,270 @@
+#!python3
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from ..common.dto import SalesSide
+from .dto import GetOrderBooksData
+
+
+# 価格・数量の列
+PRICE = 0
+SIZE = 1
+
+
+class BookStack:
+    '''
+    板情報のスナップショットを時刻方向に積み重ねた配列と、その特徴量を計算するクラスです。
+
+    asks bidsはそれぞれ(スナップショット数, 段数, 2)の配列で、最後の次元は(価格, 数量)です。
+    段数に満たない板はNaNで埋めます。特徴量は全スナップショット分をまとめてnumpyで計算します。
+    '''
+
+    def __init__(self, asks: np.ndarray, bids: np.ndarray) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            asks:
+                売り板の配列(スナップショット数, 段数, 2)を設定します。価格の昇順とする。
+            bids:
+                買い板の配列(スナップショット数, 段数, 2)を設定します。価格の降順とする。
+        """
+        if asks.ndim != 3 or bids.ndim != 3 or asks.shape[2] != 2 or bids.shape[2] != 2:
+            raise ValueError(f'asks and bids must be (snapshots, depth, 2) arrays ({asks.shape}, {bids.shape})')
+        if asks.shape[0] != bids.shape[0]:
+            raise ValueError(f'asks and bids must have the same number of snapshots ({asks.shape}, {bids.shape})')
+        self.asks = asks
+        self.bids = bids
+
+    @classmethod
+    def from_snapshots(cls, snapshots: Sequence[GetOrderBooksData], depth: int = 20) -> 'BookStack':
+        """
+        get_orderbooksで取得したスナップショットから作成します。
+
+        Args:
+            snapshots:
+                スナップショット(時刻順)
+            depth:
+                使用する段数
+
+        Returns:
+            BookStack
+        """
+        asks = np.full((len(snapshots), depth, 2), np.nan)
+        bids = np.full((len(snapshots), depth, 2), np.nan)
+        for t, snapshot in enumerate(snapshots):
+            for book, levels in ((asks, snapshot.asks), (bids, snapshot.bids)):
+                n = min(depth, len(levels))
+                if n > 0:
+                    book[t, :n] = [(float(o.price), float(o.size)) for o in levels[:n]]
+        return cls(asks, bids)
+
+    @classmethod
+    def from_records(cls, times: np.ndarray, sides: np.ndarray, levels: np.ndarray, prices: np.ndarray,
+                     sizes: np.ndarray, depth: int = None) -> Tuple[np.ndarray, 'BookStack']:
+        """
+        1行1段の形式(MarketDataRecorderのorderbooksの列)から作成します。
+
+        Args:
+            times:
+                受信日時
+            sides:
+                'ASK'または'BID'
+            levels:
+                段(0始まり)
+            prices:
+                価格
+            sizes:
+                数量
+            depth:
+                使用する段数。指定しない場合は最大の段数。
+
+        Returns:
+            (時刻順の受信日時, BookStack)
+        """
+        times = np.asarray(times)
+        levels = np.asarray(levels, dtype=np.int64)
+        unique, index = np.unique(times, return_inverse=True)
+        if depth is None:
+            depth = int(levels.max()) + 1 if len(levels) > 0 else 0
+        keep = levels < depth
+        ask = (np.asarray(sides) == 'ASK') & keep
+        bid = (np.asarray(sides) == 'BID') & keep
+        values = np.column_stack([np.asarray(prices, dtype=np.float64), np.asarray(sizes, dtype=np.float64)])
+
+        asks = np.full((len(unique), depth, 2), np.nan)
+        bids = np.full((len(unique), depth, 2), np.nan)
+        asks[index[ask], levels[ask]] = values[ask]
+        bids[index[bid], levels[bid]] = values[bid]
+        return unique, cls(asks, bids)
+
+    def __len__(self) -> int:
+        return self.asks.shape[0]
+
+    def mid(self) -> np.ndarray:
+        """
+        仲値((最良売り気配 + 最良買い気配) / 2)を返します。
+        """
+        return (self.asks[:, 0, PRICE] + self.bids[:, 0, PRICE]) / 2
+
+    def spread(self) -> np.ndarray:
+        """
+        スプレッド(最良売り気配 - 最良買い気配)を返します。
+        """
+        return self.asks[:, 0, PRICE] - self.bids[:, 0, PRICE]
+
+    def microprice(self) -> np.ndarray:
+        """
+        最良気配の数量で加重したマイクロプライスを返します。
+        買い板が厚いほど最良売り気配に近くなります。
+        """
+        ask, ask_size = self.asks[:, 0, PRICE], self.asks[:, 0, SIZE]
+        bid, bid_size = self.bids[:, 0, PRICE], self.bids[:, 0, SIZE]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (ask * bid_size + bid * ask_size) / (ask_size + bid_size)
+
+    def imbalance(self, levels: int = 5) -> np.ndarray:
+        """
+        先頭levels段の数量の偏り((買い - 売り) / (買い + 売り))を返します。-1～1の値となります。
+        """
+        ask = np.nansum(self.asks[:, :levels, SIZE], axis=1)
+        bid = np.nansum(self.bids[:, :levels, SIZE], axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (bid - ask) / (bid + ask)
+
+    def slope(self, levels: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        先頭levels段の板の傾き(仲値からの価格差に対する累積数量の原点を通る回帰係数)を売り・買いそれぞれ返します。
+        値が大きいほど仲値の近くに数量が集まっている(板が厚い)ことを示します。
+
+        Returns:
+            (売り板の傾き, 買い板の傾き)
+        """
+        mid = self.mid()[:, None]
+        result = []
+        for book in (self.asks, self.bids):
+            distance = np.abs(book[:, :levels, PRICE] - mid)
+            depth = np.nancumsum(book[:, :levels, SIZE], axis=1)
+            valid = ~np.isnan(distance)
+            x = np.where(valid, distance, 0.0)
+            y = np.where(valid, depth, 0.0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result.append((x * y).sum(axis=1) / (x * x).sum(axis=1))
+        return result[0], result[1]
+
+    def liquidity_at_distance(self, bps: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        仲値からbps以内の価格にある数量を売り・買いそれぞれ返します。
+
+        Args:
+            bps:
+                仲値からの距離(ベーシスポイント)のリスト
+
+        Returns:
+            (売り板の数量(スナップショット数, len(bps)), 買い板の数量(スナップショット数, len(bps)))
+        """
+        mid = self.mid()[:, None, None]
+        limits = np.asarray(bps, dtype=np.float64)[None, None, :] / 10000 * mid
+        result = []
+        for book in (self.asks, self.bids):
+            distance = np.abs(book[:, :, PRICE] - mid[:, :, 0])[:, :, None]
+            sizes = np.nan_to_num(book[:, :, SIZE])[:, :, None]
+            result.append(np.where(distance <= limits, sizes, 0.0).sum(axis=1))
+        return result[0], result[1]
+
+    def features(self, imbalance_levels: int = 5, slope_levels: int = 10,
+                 bps: Sequence[float] = (10, 50, 100)) -> Dict[str, np.ndarray]:
+        """
+        特徴量をまとめて返します。pandas.DataFrameに渡して表にできます。
+
+        Returns:
+            {'mid', 'spread', 'microprice', 'imbalance', 'ask_slope', 'bid_slope',
+             'ask_liquidity_{bps}bps', 'bid_liquidity_{bps}bps'}
+        """
+        ask_slope, bid_slope = self.slope(slope_levels)
+        ask_liquidity, bid_liquidity = self.liquidity_at_distance(bps)
+        features = {'mid': self.mid(), 'spread': self.spread(), 'microprice': self.microprice(),
+                    'imbalance': self.imbalance(imbalance_levels), 'ask_slope': ask_slope, 'bid_slope': bid_slope}
+        for i, b in enumerate(bps):
+            features[f'ask_liquidity_{b:g}bps'] = ask_liquidity[:, i]
+            features[f'bid_liquidity_{b:g}bps'] = bid_liquidity[:, i]
+        return features
+
+
+class ImpactEstimate:
+    """
+    成行注文の約定見積もりクラスです。各属性は数量ごとの配列です。
+    """
+    def __init__(self, size: np.ndarray, filled: np.ndarray, average_price: np.ndarray, slippage_bps: np.ndarray,
+                 levels: np.ndarray, worst_price: np.ndarray) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            size:
+                注文数量を設定します。
+            filled:
+                板の数量で約定できる数量を設定します。板が不足する場合はsizeより小さくなる。
+            average_price:
+                約定できる数量の平均約定価格を設定します。
+            slippage_bps:
+                最良気配に対する平均約定価格の不利な方向への乖離(ベーシスポイント)を設定します。
+            levels:
+                消費する板の段数を設定します。
+            worst_price:
+                最後に消費する板の価格を設定します。
+        """
+        self.size = size
+        self.filled = filled
+        self.average_price = average_price
+        self.slippage_bps = slippage_bps
+        self.levels = levels
+        self.worst_price = worst_price
+
+    @property
+    def fully_filled(self) -> np.ndarray:
+        """
+        板の数量で全数量が約定できるかどうかを返します。
+        """
+        return self.filled >= self.size
+
+
+def estimate_impact(levels, side: SalesSide, sizes: Sequence[float]) -> ImpactEstimate:
+    """
+    現在の板で成行注文を約定させた場合の平均約定価格・スリッページ・消費する段数を、複数の数量についてまとめて見積もります。
+
+    Args:
+        levels:
+            GetOrderBooksData、または約定させる側の板の(段数, 2)の価格・数量の配列
+            (買いの場合はasks、売りの場合はbids)
+        side:
+            注文の売買区分
+        sizes:
+            見積もる注文数量のリスト
+
+    Returns:
+        ImpactEstimate
+    """
+    if isinstance(levels, GetOrderBooksData):
+        orders = levels.asks if side == SalesSide.BUY else levels.bids
+        levels = np.array([(float(o.price), float(o.size)) for o in orders], dtype=np.float64).reshape(-1, 2)
+    sizes = np.asarray(sizes, dtype=np.float64)
+    prices, quantities = levels[:, PRICE], levels[:, SIZE]
+    if len(prices) == 0:
+        nan = np.full(sizes.shape, np.nan)
+        return ImpactEstimate(sizes, np.zeros(sizes.shape), nan, nan, np.zeros(sizes.shape, dtype=np.int64), nan)
+
+    depth = np.cumsum(quantities)
+    cost = np.cumsum(prices * quantities)
+    # 注文数量を満たす段(板が不足する場合は最後の段)
+    last = np.minimum(np.searchsorted(depth, sizes, side='left'), len(prices) - 1)
+    filled = np.minimum(sizes, depth[-1])
+    before = np.where(last > 0, depth[last - 1], 0.0)
+    amount = np.where(last > 0, cost[last - 1], 0.0) + (filled - before) * prices[last]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average = amount / filled
+    best = prices[0]
+    sign = 1.0 if side == SalesSide.BUY else -1.0
+    slippage = (average - best) / best * 10000 * sign
+    return ImpactEstimate(sizes, filled, average, slippage, last + 1, prices[last])
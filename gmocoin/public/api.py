@@ -1,29 +1,88 @@
 #!python3
+import io
 import requests
-import json
 from datetime import datetime, date, timedelta
-import pandas as pd
+from typing import TYPE_CHECKING
 
-from ..common.annotation import post_request
+from ..common.annotation import post_request, get_schema
 from ..common.const import GMOConst
 from ..common.logging import get_logger, log
 from ..common.dto import Status
-from .dto import GetStatusResSchema, GetStatusRes, \
+from ..common.json_backend import response_json
+from ..common.ratelimit import RateLimiter
+from ..common.circuit import CircuitBreaker
+from ..common.deadline import Deadline, deadline, current_deadline, request_timeout
+from .daily import DailyFileIndex, daily_url
+from .dto import GetStatusResSchema, GetStatusRes, GetStatusData, \
     GetTickerResSchema, GetTickerRes, Symbol , \
     GetOrderBooksResSchema, GetOrderBooksRes, \
     GetTradesResSchema, GetTradesRes
 
 
+if TYPE_CHECKING:
+    # MEMO: 起動時間短縮のため、型注釈でのみ使用するモジュールは実行時にimportしない
+    import pandas as pd
+    from .hedge import HedgePolicy
+
+
 logger = get_logger()
 
 
+class _DeadlineReader:
+    """
+    ストリーミングで読み込むレスポンス本体に期限を適用するファイルオブジェクトです。
+    requestsのtimeoutはソケットの1回の読込みごとに適用されるため、読み込むたびに期限を確認します。
+    """
+    def __init__(self, raw, deadline: Deadline) -> None:
+        self._raw = raw
+        self._deadline = deadline
+
+    def read(self, size: int = -1) -> bytes:
+        self._deadline.check()
+        return self._raw.read(size)
+
+    def close(self) -> None:
+        self._raw.close()
+
+
 class Client:
     '''
     GMOCoinのパブリックAPIクライアントクラスです。
     '''
-    
+
+    def __init__(self, rate_limiter: RateLimiter = None, circuit_breaker: CircuitBreaker = None,
+                 hedge: 'HedgePolicy' = None, timeout: float = None, transport=None,
+                 daily_index: DailyFileIndex = None):
+        """
+        コンストラクタです。
+
+        Args:
+            rate_limiter:
+                リクエスト前にトークンを取得するレートリミッターを設定します。
+                複数のクライアントで共有することで合計のリクエスト数を制限できます。
+            circuit_breaker:
+                障害・メンテナンス時にリクエストを抑止するサーキットブレーカーを設定します。
+            hedge:
+                設定した場合、get_status get_ticker get_orderbooks get_tradesのリクエストをヘッジします。
+            timeout:
+                各メソッドの既定の期限秒数を設定します。接続・読込み・リトライ全体をこの秒数で打ち切り、
+                GmoCoinTimeoutExceptionを送出する。各メソッドのキーワード引数timeoutで個別に指定できる。
+            transport:
+                リクエストを送信するトランスポート(HttpTransport RecordingTransport ReplayTransport)を設定します。
+                指定しない場合はrequestsで直接送信する。
+            daily_index:
+                get_historical_dataで使用する日次ファイルの存在確認結果の記録を設定します。
+                JSONファイルに保存するDailyFileIndexを指定すると、存在しない日を次回以降確認しない。
+        """
+        self._rate_limiter = rate_limiter
+        self._circuit_breaker = circuit_breaker
+        self.hedge = hedge
+        self._timeout = timeout
+        self.transport = transport
+        self.daily_index = daily_index if daily_index is not None else DailyFileIndex()
+
     @log(logger)
-    @post_request(GetStatusResSchema)
+    @post_request(GetStatusResSchema, group='public')
     def get_status(self) -> GetStatusRes:
         """
         取引所の稼動状態を取得します。
@@ -34,19 +93,28 @@ class Client:
         Returns:
             GetStatusRes
         """
-        ret = requests.get(GMOConst.END_POINT_PUBLIC + 'status')
+        ret = self._get(GMOConst.END_POINT_PUBLIC + 'status')
 
-        res_json = ret.json()
+        # MEMO: デコード結果はpost_requestでも再利用される
+        res_json = response_json(ret)
         if res_json['status'] == 5 and res_json['messages'][0]['message_code'] == 'ERR-5201':
             # メンテナンス中の場合、メンテナンスレスポンスを返却
             # {'status': 5, 'messages': [{'message_code': 'ERR-5201', 'message_string': 'MAINTENANCE. Please wait for a while'}]}
+            if self._circuit_breaker is not None:
+                self._circuit_breaker.trip()
             return GetStatusRes(status=0, responsetime=datetime.now(), 
                                 data=GetStatusData(status=Status.MAINTENANCE))
 
+        if res_json['status'] == 0 and res_json['data']['status'] == Status.MAINTENANCE.value \
+                and self._circuit_breaker is not None:
+            # MEMO: post_requestで成功として記録されないよう、ここで変換して返却する
+            self._circuit_breaker.trip()
+            return get_schema(GetStatusResSchema).load(res_json)
+
         return ret
         
     @log(logger)
-    @post_request(GetTickerResSchema)
+    @post_request(GetTickerResSchema, group='public')
     def get_ticker(self, symbol:Symbol = None) -> GetTickerRes:
         """
         指定した銘柄の最新レートを取得します。
@@ -61,12 +129,12 @@ class Client:
             GetTickerRes
         """
         if symbol is None:
-            return requests.get(GMOConst.END_POINT_PUBLIC + f'ticker')
+            return self._get(GMOConst.END_POINT_PUBLIC + f'ticker')
         else:
-            return requests.get(GMOConst.END_POINT_PUBLIC + f'ticker?symbol={symbol.value}')
+            return self._get(GMOConst.END_POINT_PUBLIC + f'ticker?symbol={symbol.value}')
 
     @log(logger)
-    @post_request(GetOrderBooksResSchema)
+    @post_request(GetOrderBooksResSchema, group='public')
     def get_orderbooks(self, symbol:Symbol) -> GetOrderBooksRes:
         """
         指定した銘柄の板情報(snapshot)を取得します。
@@ -78,10 +146,10 @@ class Client:
         Returns:
             GetOrderBooksRes
         """
-        return requests.get(GMOConst.END_POINT_PUBLIC + f'orderbooks?symbol={symbol.value}')
+        return self._get(GMOConst.END_POINT_PUBLIC + f'orderbooks?symbol={symbol.value}')
     
     @log(logger)
-    @post_request(GetTradesResSchema)
+    @post_request(GetTradesResSchema, group='public')
     def get_trades(self, symbol:Symbol, page:int=1, count:int=100) -> GetTradesRes:
         """
         指定した銘柄の板情報(snapshot)を取得します。
@@ -99,7 +167,7 @@ class Client:
         Returns:
             GetTradesRes
         """
-        return requests.get(GMOConst.END_POINT_PUBLIC + f'trades?symbol={symbol.value}&page={page}&count={count}')
+        return self._get(GMOConst.END_POINT_PUBLIC + f'trades?symbol={symbol.value}&page={page}&count={count}')
 
     @log(logger)
     def get_historical_data(self, symbol:Symbol, page:int=1, count:int=100) -> GetTradesRes:
@@ -122,7 +190,8 @@ class Client:
         return requests.get(GMOConst.END_POINT_PUBLIC + f'trades?symbol={symbol.value}&page={page}&count={count}')
 
     @log(logger)
-    def get_historical_data(self, symbol:Symbol, past_days: int, base_date:date = None) -> pd.DataFrame:
+    def get_historical_data(self, symbol:Symbol, past_days: int, base_date:date = None,
+                            timeout: float = None) -> 'pd.DataFrame':
         """
         指定した銘柄の過去取引情報を取得します。
 
@@ -135,23 +204,108 @@ class Client:
             base_date:
                 過去基準日
                 指定しない場合は現在日を指定したとして動作する。
+            timeout:
+                存在確認・ダウンロード・読み込み全体の期限秒数。指定しない場合はクライアントのtimeout。
 
         Returns:
-            DataFrame
+            DataFrame(symbol side: category、size price: float64、timestamp: UTCのdatetime64)
         """
+        # MEMO: pandasはimportに時間がかかるため、使用時にimportする
+        import pandas as pd
+        from .history import read_trades
+
         if base_date == None:
             base_date = date.today()
 
         start_date = base_date - timedelta(days=past_days)
 
-        #差分を使って、スタートの日から現在まで一日ずつ足していく
-        url_list = []
-        for d in range(past_days):
-            day=start_date + timedelta(days=d)
-            # print(day)
-            url = f'https://api.coin.z.com/data/trades/{symbol.value}/{day.year}/{day.month:02}/{day.year}{day.month:02}{day.day:02}_{symbol.value}.csv.gz'
-            # MEMO: 土日は更新されないようなので、存在する日付だけlistに追加する
-            if requests.get(url).status_code == 200:
-                url_list.append(url)
-
-        return pd.concat([pd.read_csv(url) for url in url_list], axis=0, sort=True)
+        # MEMO: post_requestを使用しないため、ここで期限を設定する
+        with deadline(timeout if timeout is not None else self._timeout):
+            #差分を使って、スタートの日から現在まで一日ずつ足していく
+            url_list = []
+            for d in range(past_days):
+                day=start_date + timedelta(days=d)
+                # print(day)
+                url = daily_url(symbol, day)
+                # MEMO: 土日は更新されないようなので、存在する日付だけlistに追加する
+                # ファイル本体をダウンロードしないようにHEADリクエストで確認する
+                if self.daily_index.exists(url, day, self._request):
+                    url_list.append(url)
+            self.daily_index.save()
+
+            return pd.concat([read_trades(self._open(url)) for url in url_list], axis=0, sort=True)
+
+    def _get(self, url: str) -> requests.Response:
+        """
+        GETリクエストを送信します。ヘッジが設定されている場合はヘッジして送信します。
+        タイムアウトは現在の期限の残り秒数とします。
+
+        Args:
+            url:
+                リクエスト先のURL
+
+        Returns:
+            Response
+        """
+        timeout = request_timeout()
+        if self.hedge is None:
+            return self._send(url, timeout)
+        return self.hedge.get(lambda: self._send(url, timeout), self._rate_limiter, timeout)
+
+    def _request_timeout(self) -> float:
+        """
+        APIではないURLへのリクエストのタイムアウトを返します。
+        期限が設定されている場合はその残り秒数、無い場合はクライアントのtimeoutとします。
+        """
+        timeout = request_timeout()
+        return timeout if timeout is not None else self._timeout
+
+    def _request(self, method: str, url: str, headers: dict = None) -> requests.Response:
+        """
+        APIではないURL(日次ファイル等)にリクエストを送信します。レートリミッター・ヘッジは使用しません。
+
+        Args:
+            method:
+                HTTPメソッド
+            url:
+                リクエスト先のURL
+            headers:
+                リクエストヘッダー
+
+        Returns:
+            Response
+        """
+        timeout = self._request_timeout()
+        if self.transport is None:
+            return requests.request(method, url, headers=headers, timeout=timeout)
+        return self.transport.request(method, url, headers=headers, timeout=timeout)
+
+    def _open(self, url: str):
+        """
+        ファイルをダウンロードしながら読み込むバイナリのファイルオブジェクトを返します。
+        トランスポートが設定されている場合は、トランスポートで取得した内容を返します。
+        期限が設定されている場合は、読み込み中に期限を過ぎるとGmoCoinTimeoutExceptionを送出します。
+
+        Args:
+            url:
+                ファイルのURL
+
+        Returns:
+            ファイルオブジェクト
+        """
+        if self.transport is not None:
+            return io.BytesIO(self._request('GET', url).content)
+        res = requests.get(url, stream=True, timeout=self._request_timeout())
+        res.raise_for_status()
+        # MEMO: gzipファイルをそのまま読み込むため、Content-Encodingによる展開はしない
+        res.raw.decode_content = False
+        current = current_deadline()
+        return res.raw if current is None else _DeadlineReader(res.raw, current)
+
+    def _send(self, url: str, timeout: float) -> requests.Response:
+        """
+        トランスポートが設定されている場合はトランスポートで、そうでない場合はrequestsでGETリクエストを送信します。
+        """
+        if self.transport is None:
+            return requests.get(url, timeout=timeout)
+        return self.transport.request('GET', url, timeout=timeout)
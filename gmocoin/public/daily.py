@@ -0,0 +1,157 @@
+#!python3
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict
+
+import requests
+from pytz import utc
+
+from ..common.const import GMOConst
+from ..common.dto import Symbol
+from ..common.logging import get_logger
+
+
+logger = get_logger()
+
+
+# ファイルが存在しないことを示すステータスコード
+MISSING_STATUS = (403, 404)
+
+
+def daily_url(symbol: Symbol, day: date) -> str:
+    """
+    日次の約定履歴ファイルのURLを返します。
+    """
+    return GMOConst.END_POINT_DATA + \
+        f'{symbol.value}/{day.year}/{day.month:02}/{day.year}{day.month:02}{day.day:02}_{symbol.value}.csv.gz'
+
+
+class DailyFileIndex:
+    '''
+    日次の約定履歴ファイルの存在確認結果を記録するクラスです。
+
+    存在確認はHEADリクエストで行い、ファイル本体はダウンロードしません。
+    存在するファイルはETag・Last-Modifiedを記録して条件付きリクエストに使用します。
+    日付からgrace_days日以上経ってから存在しなかったファイルは以降も公開されないとみなし、再確認しません。
+    pathを指定した場合は記録をJSONファイルに保存し、次回以降も使用します。
+    '''
+
+    def __init__(self, path: str = None, grace_days: int = 2) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            path:
+                記録を保存するJSONファイルのパスを設定します。指定しない場合はメモリ上にのみ記録する。
+            grace_days:
+                公開が遅れる可能性がある日数を設定します。この日数以内の日付のファイルは存在しなくても再確認する。
+        """
+        self.path = path
+        self.grace_days = grace_days
+        self._lock = threading.Lock()
+        self._entries = {}
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    def _permanently_missing(self, entry: dict) -> bool:
+        """
+        再確認が不要な存在しないファイルの記録かどうかを返します。
+        """
+        checked = datetime.fromisoformat(entry['checked_at']).date()
+        return entry['status'] == 'missing' and \
+            checked - date.fromisoformat(entry['day']) >= timedelta(days=self.grace_days)
+
+    def is_missing(self, url: str) -> bool:
+        """
+        存在しないことが確定しているファイルの場合Trueを返します。
+        """
+        entry = self._entries.get(url)
+        return entry is not None and self._permanently_missing(entry)
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """
+        条件付きリクエストのヘッダー(If-None-Match If-Modified-Since)を返します。
+        """
+        entry = self._entries.get(url) or {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, url: str, day: date, res: requests.Response) -> None:
+        """
+        レスポンスのステータスコードからファイルの存在を記録します。
+        存在・不存在を判定できないステータスコード(5xx等)の場合は記録しない。
+
+        Args:
+            url:
+                ファイルのURL
+            day:
+                ファイルの日付
+            res:
+                HEAD GETまたは条件付きGETのレスポンス
+        """
+        if res.status_code in (200, 206, 304):
+            entry = {'status': 'present', 'day': day.isoformat(), 'checked_at': datetime.now(utc).isoformat(),
+                     'etag': res.headers.get('ETag'), 'last_modified': res.headers.get('Last-Modified'),
+                     'length': res.headers.get('Content-Length')}
+            if res.status_code == 304:
+                # 未変更の場合は記録済みの検証子を引き継ぐ
+                previous = self._entries.get(url) or {}
+                entry.update({k: previous.get(k) for k in ('etag', 'last_modified', 'length')})
+        elif res.status_code in MISSING_STATUS:
+            entry = {'status': 'missing', 'day': day.isoformat(), 'checked_at': datetime.now(utc).isoformat()}
+        else:
+            return
+        with self._lock:
+            self._entries[url] = entry
+
+    def exists(self, url: str, day: date, request: Callable[..., requests.Response]) -> bool:
+        """
+        ファイルが存在するかを返します。記録が無い場合はHEADリクエストで確認して記録します。
+
+        Args:
+            url:
+                ファイルのURL
+            day:
+                ファイルの日付
+            request:
+                (method, url, headers)でリクエストを送信する関数
+
+        Returns:
+            存在する場合True
+        """
+        entry = self._entries.get(url)
+        if entry is not None and entry['status'] == 'present':
+            return True
+        if entry is not None and self._permanently_missing(entry):
+            return False
+
+        res = request('HEAD', url, headers=None)
+        if res.status_code == 405:
+            # HEADに対応していない場合は先頭1バイトだけ取得する
+            res = request('GET', url, headers={'Range': 'bytes=0-0'})
+        self.record(url, day, res)
+        if res.status_code not in (200, 206) and res.status_code not in MISSING_STATUS:
+            logger.warning(f'unexpected status {res.status_code} for {url}')
+        return res.status_code in (200, 206)
+
+    def save(self) -> None:
+        """
+        記録をJSONファイルに保存します。pathを指定していない場合は何もしない。
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(self.path + '.tmp', self.path)
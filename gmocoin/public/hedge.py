@@ -0,0 +1,172 @@
+#!python3
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from requests import Response
+
+from ..common.exception import GmoCoinTimeoutException
+from ..common.ratelimit import RateLimiter
+
+
+class HedgeStats:
+    """
+    ヘッジリクエストの統計クラスです。
+    """
+    def __init__(self) -> None:
+        """
+        コンストラクタです。
+        """
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def hedge_rate(self) -> float:
+        """
+        ヘッジリクエストを送信した割合を返します。
+        """
+        return self.hedged / self.requests if self.requests > 0 else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        """
+        送信したヘッジリクエストが先に応答した割合を返します。
+        """
+        return self.hedge_wins / self.hedged if self.hedged > 0 else 0.0
+
+
+class HedgePolicy:
+    '''
+    冪等なGETリクエストをヘッジするクラスです。
+    最初のリクエストが直近の応答時間のパーセンタイルを超えても応答しない場合に2つ目のリクエストを送信し、
+    先に応答した方を返します。2つ目のリクエストもレートリミッターのトークンを消費します。
+    '''
+
+    def __init__(self, percentile: float = 95.0, initial_delay: float = 0.5, min_delay: float = 0.05,
+                 max_delay: float = 2.0, window: int = 200, min_samples: int = 20, max_workers: int = 8) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            percentile:
+                ヘッジリクエストを送信するまでの待ち時間に使用する応答時間のパーセンタイルを設定します。
+            initial_delay:
+                応答時間のサンプル数がmin_samples未満の場合の待ち秒数を設定します。
+            min_delay:
+                待ち秒数の下限を設定します。
+            max_delay:
+                待ち秒数の上限を設定します。
+            window:
+                パーセンタイルの計算に使用する直近の応答時間の件数を設定します。
+            min_samples:
+                パーセンタイルを使用する最小サンプル数を設定します。
+            max_workers:
+                リクエストを送信するスレッド数を設定します。
+        """
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.stats = HedgeStats()
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gmocoin-hedge')
+
+    def delay(self) -> float:
+        """
+        ヘッジリクエストを送信するまでの待ち秒数を返します。
+
+        Returns:
+            float
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < self.min_samples:
+            return self.initial_delay
+        # 最近傍順位法(n件中ceil(n * p / 100)番目)
+        index = max(0, math.ceil(len(latencies) * self.percentile / 100) - 1)
+        return min(self.max_delay, max(self.min_delay, latencies[index]))
+
+    def _record(self, latency: float) -> None:
+        """
+        応答時間を記録します。
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _submit(self, send):
+        """
+        リクエストを送信し、完了時に応答時間を記録します。
+        """
+        started = time.monotonic()
+        future = self._executor.submit(send)
+        future.add_done_callback(lambda f: f.exception() is None and self._record(time.monotonic() - started))
+        return future
+
+    def get(self, send, rate_limiter: RateLimiter = None, timeout: float = None) -> Response:
+        """
+        リクエストをヘッジして送信します。
+
+        Args:
+            send:
+                リクエストを送信してResponseを返す関数
+            rate_limiter:
+                ヘッジリクエストの送信前にトークンを取得するレートリミッター
+                最初のリクエスト分はpost_requestで取得済みのため、ここでは取得しない。
+            timeout:
+                応答を待つ最大秒数
+
+        Returns:
+            Response
+
+        Raises:
+            GmoCoinTimeoutException:
+                timeout秒以内にどちらのリクエストも応答しなかった場合
+        """
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self.stats.requests += 1
+
+        first = self._submit(send)
+        delay = self.delay() if timeout is None else min(self.delay(), timeout)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        remaining = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+        if rate_limiter is not None and not rate_limiter.acquire(timeout=remaining):
+            # ヘッジリクエストのトークンが取得できない場合は最初のリクエストのみ待つ
+            done, _ = wait([first], timeout=remaining)
+            if not done:
+                raise GmoCoinTimeoutException(timeout)
+            return first.result()
+        with self._lock:
+            self.stats.hedged += 1
+        second = self._submit(send)
+
+        pending = {first, second}
+        error = None
+        while pending:
+            remaining = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                raise GmoCoinTimeoutException(timeout)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                if future is second:
+                    with self._lock:
+                        self.stats.hedge_wins += 1
+                return future.result()
+        raise error
+
+    def close(self) -> None:
+        """
+        送信用のスレッドを停止します。
+        """
+        self._executor.shutdown(wait=False)
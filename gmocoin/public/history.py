@@ -0,0 +1,437 @@
+#!python3
+import gzip
+import os
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, List, Tuple
+
+from pytz import utc
+
+from ..common.const import GMOConst
+from ..common.dto import Symbol
+from ..common.logging import get_logger, log
+from ..common.ratelimit import RateLimiter
+from .api import Client
+from .daily import DailyFileIndex, daily_url
+from .range_index import TimeRangeIndex, epoch_ns
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = get_logger()
+
+
+# 日次の約定履歴ファイルの列
+COLUMNS = ['symbol', 'side', 'size', 'price', 'timestamp']
+# 重複判定に使用する列
+KEYS = ['timestamp', 'side', 'price', 'size']
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+SIDES = ('BUY', 'SELL')
+
+
+def csv_engine() -> str:
+    """
+    pyarrowがimportできる場合は'pyarrow'、できない場合は'c'を返します。
+    """
+    try:
+        import pyarrow.csv  # noqa: F401
+        return 'pyarrow'
+    except ImportError:
+        return 'c'
+
+
+def typed(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """
+    約定履歴の列の型(symbol side: category、size price: float64、timestamp: UTCのdatetime64[ns])を揃えます。
+    side は全ファイル共通のカテゴリとし、連結してもcategoryのままとなるようにします。
+    """
+    import pandas as pd
+
+    dtypes = {'symbol': 'category', 'side': pd.CategoricalDtype(SIDES), 'size': 'float64', 'price': 'float64',
+              'timestamp': 'datetime64[ns, UTC]'}
+    # 型が一致している列はコピーしない
+    return df.astype({c: t for c, t in dtypes.items() if df[c].dtype != t})
+
+
+def parse_trades(stream, engine: str = None) -> 'pd.DataFrame':
+    """
+    展開済みの約定履歴のCSVを列の型を指定して読み込み、約定日時順に並べて返します。
+
+    Args:
+        stream:
+            ヘッダー行から始まるCSVを読み込むバイナリのファイルオブジェクト
+        engine:
+            'pyarrow'または'c'。指定しない場合はcsv_engine()。
+
+    Returns:
+        DataFrame
+    """
+    import pandas as pd
+
+    if engine is None:
+        engine = csv_engine()
+    if engine == 'pyarrow':
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+
+        category = pa.dictionary(pa.int32(), pa.string())
+        options = pacsv.ConvertOptions(column_types={
+            'symbol': category, 'side': category, 'size': pa.float64(), 'price': pa.float64(),
+            'timestamp': pa.timestamp('ns')})
+        df = pacsv.read_csv(stream, convert_options=options).to_pandas()
+        df['timestamp'] = df['timestamp'].dt.tz_localize('UTC')
+    else:
+        df = pd.read_csv(stream, engine='c', dtype={'symbol': 'category', 'side': 'category',
+                                                    'size': 'float64', 'price': 'float64'})
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, format='ISO8601')
+
+    df = typed(df[COLUMNS])
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', kind='stable', ignore_index=True)
+    return df
+
+
+def read_trades(source, engine: str = None) -> 'pd.DataFrame':
+    """
+    gzip圧縮された約定履歴ファイルを読み込み、約定日時順に並べて返します。
+    型を推定せずに列の型を指定して読み込み、timestampはUTCのdatetime64として返します。
+    gzipはファイル全体を展開せずに読み込みながら展開します。
+
+    Args:
+        source:
+            ファイルパス、またはgzip圧縮されたデータを読み込むバイナリのファイルオブジェクト
+        engine:
+            'pyarrow'または'c'。指定しない場合はcsv_engine()。
+
+    Returns:
+        DataFrame
+    """
+    raw = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        with gzip.GzipFile(fileobj=raw) as stream:
+            return parse_trades(stream, engine)
+    finally:
+        if raw is not source:
+            raw.close()
+
+
+def _empty() -> 'pd.DataFrame':
+    """
+    列だけの約定履歴を返します。
+    """
+    import pandas as pd
+
+    return typed(pd.DataFrame(columns=COLUMNS))
+
+
+def _occurrence(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """
+    同じ約定日時・売買区分・価格・数量の約定に出現順の番号を付けます。
+    同じ内容の約定が複数ある場合も、同じ取得元に含まれる件数は重複とみなさずに残すために使用します。
+    """
+    return df.assign(_n=df.groupby(KEYS, sort=False).cumcount())
+
+
+def append_tail(head: 'pd.DataFrame', tail: 'pd.DataFrame') -> 'pd.DataFrame':
+    """
+    headの後ろに、tailのうちheadに含まれない約定を追加します。
+    headの最終約定日時より前のtailの約定は取得済みとみなして除き、同時刻の約定は件数で重複を除きます。
+
+    Args:
+        head:
+            約定日時順の約定履歴
+        tail:
+            約定日時順の約定履歴
+
+    Returns:
+        DataFrame
+    """
+    import pandas as pd
+
+    if len(head) == 0:
+        return tail.reset_index(drop=True)
+    if len(tail) == 0:
+        return head.reset_index(drop=True)
+    cutoff = head['timestamp'].iloc[-1]
+    tail = tail[tail['timestamp'] >= cutoff]
+    boundary = _occurrence(head[head['timestamp'] == cutoff])
+    tail = _occurrence(tail)
+    seen = tail.merge(boundary[KEYS + ['_n']], on=KEYS + ['_n'], how='left', indicator=True)['_merge'] == 'both'
+    tail = tail[~seen.to_numpy()].drop(columns='_n')
+    return pd.concat([head, tail], ignore_index=True)
+
+
+class TradeHistory:
+    '''
+    約定履歴をローカルに保存し、日次ファイルとget_tradesを組み合わせて隙間なく補完するクラスです。
+
+    日次ファイルは{root}/{symbol}/{YYYY}/{MM}/{YYYYMMDD}_{symbol}.csv.gzに公開されている形式のまま保存し、
+    最新の日次ファイル以降の約定はget_tradesで取得して{root}/{symbol}/recent.csv.gzに保存します。
+    backfillは不足している日次ファイルと、前回以降の約定だけを取得します。
+    '''
+
+    def __init__(self, root: str, client: Client = None, page_size: int = 100,
+                 index: DailyFileIndex = None, range_index: TimeRangeIndex = None) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            root:
+                保存先ディレクトリを設定します。
+            client:
+                パブリックAPIクライアントを設定します。
+                指定しない場合はGMOConst.API_RATE_LIMITのレートリミッター付きで作成する。
+            page_size:
+                get_tradesの1ページ当りの取得件数を設定します。
+            index:
+                日次ファイルの存在確認結果の記録を設定します。指定しない場合は{root}/daily_index.jsonに保存する。
+            range_index:
+                保存した約定履歴ファイルの時間範囲の索引を設定します。指定しない場合は{root}/range_index.jsonに保存する。
+        """
+        self.root = root
+        self.page_size = page_size
+        self.index = index if index is not None else DailyFileIndex(os.path.join(root, 'daily_index.json'))
+        self.range_index = range_index if range_index is not None else \
+            TimeRangeIndex(os.path.join(root, 'range_index.json'))
+        self.client = client if client is not None else Client(rate_limiter=RateLimiter(GMOConst.API_RATE_LIMIT))
+
+    def daily_path(self, symbol: Symbol, day: date) -> str:
+        """
+        日次ファイルの保存先を返します。
+        """
+        return os.path.join(self.root, symbol.value, f'{day.year}', f'{day.month:02}',
+                            f'{day.year}{day.month:02}{day.day:02}_{symbol.value}.csv.gz')
+
+    def recent_path(self, symbol: Symbol) -> str:
+        """
+        get_tradesで取得した約定の保存先を返します。
+        """
+        return os.path.join(self.root, symbol.value, 'recent.csv.gz')
+
+    def days(self, symbol: Symbol) -> List[date]:
+        """
+        保存済みの日次ファイルの日付を古い順に返します。
+        """
+        days = []
+        directory = os.path.join(self.root, symbol.value)
+        for dirpath, _, filenames in os.walk(directory):
+            for name in filenames:
+                if name.endswith(f'_{symbol.value}.csv.gz'):
+                    days.append(datetime.strptime(name[:8], '%Y%m%d').date())
+        return sorted(days)
+
+    def fetch_day(self, symbol: Symbol, day: date, refresh: bool = False) -> bool:
+        """
+        日次ファイルを取得して保存します。
+        保存済みの場合と、存在しないことが確定している場合はリクエストを送信しません。
+
+        Args:
+            symbol:
+                銘柄
+            day:
+                日付
+            refresh:
+                Trueの場合、保存済みでも条件付きリクエスト(ETag Last-Modified)で更新を確認する。
+
+        Returns:
+            日次ファイルが存在する場合True
+        """
+        path = self.daily_path(symbol, day)
+        url = daily_url(symbol, day)
+        saved = os.path.exists(path)
+        if saved and not refresh:
+            return True
+        if self.index.is_missing(url):
+            return False
+
+        res = self.client._request('GET', url, headers=self.index.validators(url) if saved else None)
+        self.index.record(url, day, res)
+        if res.status_code == 304:
+            return True
+        if res.status_code != 200:
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 途中で中断しても壊れたファイルが残らないように一時ファイルから置き換える
+        with open(path + '.tmp', 'wb') as f:
+            f.write(res.content)
+        os.replace(path + '.tmp', path)
+        return True
+
+    def fetch_recent(self, symbol: Symbol, since: 'pd.Timestamp' = None) -> Tuple['pd.DataFrame', bool]:
+        """
+        get_tradesを新しいページから順に取得し、since以降の約定を古い順に返します。
+
+        Args:
+            symbol:
+                銘柄
+            since:
+                取得する最も古い約定日時。指定しない場合は最新1ページ分。
+
+        Returns:
+            (DataFrame, 全ページ取得してもsinceまで遡れなかった場合True)
+        """
+        import pandas as pd
+
+        count = self.page_size
+        rows = []
+        page = 1
+        exhausted = False
+        while True:
+            trades = self.client.get_trades(symbol, page=page, count=count).data.trades or []
+            rows.extend((symbol.value, t.side.value, float(t.size), float(t.price), t.timestamp) for t in trades)
+            if since is None:
+                break
+            # 同時刻の約定がページをまたぐ場合があるため、sinceより前の約定を含むページまで取得する
+            if len(trades) > 0 and min(t.timestamp for t in trades) < since:
+                break
+            if len(trades) < count:
+                exhausted = len(rows) > 0 and min(r[4] for r in rows) > since
+                break
+            page += 1
+
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+        df = typed(df)
+        if since is not None:
+            df = df[df['timestamp'] >= since]
+        # ページは新しい順のため、同時刻の約定の順序も含めて反転する
+        return df.iloc[::-1].reset_index(drop=True), exhausted
+
+    @log(logger)
+    def backfill(self, symbol: Symbol, start: date, until: date = None) -> dict:
+        """
+        startからuntilの前日までの日次ファイルと、それ以降現在までの約定を取得して保存します。
+        取得済みの日次ファイルと、保存済みの約定より前の約定は取得しません。
+
+        Args:
+            symbol:
+                銘柄
+            start:
+                取得を開始する日
+            until:
+                日次ファイルを取得する最後の日の翌日。指定しない場合は当日(UTC)。
+
+        Returns:
+            {'downloaded': 取得した日次ファイル数, 'missing': 存在しなかった日, 'recent': 追加した約定件数,
+             'gap': 約定を遡れなかった期間(開始 終了)。隙間がない場合はNone}
+        """
+        import pandas as pd
+
+        if until is None:
+            until = datetime.now(utc).date()
+        stats = {'downloaded': 0, 'missing': [], 'recent': 0, 'gap': None}
+        day = start
+        while day < until:
+            if not os.path.exists(self.daily_path(symbol, day)):
+                if self.fetch_day(symbol, day):
+                    stats['downloaded'] += 1
+                else:
+                    stats['missing'].append(day)
+            day += timedelta(days=1)
+        self.index.save()
+
+        # 最新の日次ファイルの最終約定以降をget_tradesで補完する
+        # 保存する約定は同時刻の約定の件数で重複を除けるように、日次ファイルの最終約定日時の約定も全件残す
+        days = self.days(symbol)
+        head = read_trades(self.daily_path(symbol, days[-1])) if len(days) > 0 else _empty()
+        head = head[head['timestamp'] == head['timestamp'].max()] if len(head) > 0 else head
+        path = self.recent_path(symbol)
+        saved = read_trades(path) if os.path.exists(path) else _empty()
+        if len(head) > 0:
+            saved = saved[saved['timestamp'] >= head['timestamp'].iloc[-1]].reset_index(drop=True)
+
+        if len(saved) > 0:
+            since = saved['timestamp'].iloc[-1]
+        elif len(head) > 0:
+            since = head['timestamp'].iloc[-1]
+        else:
+            since = pd.Timestamp(start, tz=utc)
+        fetched, exhausted = self.fetch_recent(symbol, since)
+        if exhausted and len(fetched) > 0:
+            stats['gap'] = (since, fetched['timestamp'].iloc[0])
+            logger.warning(f'trades of {symbol.value} between {since} and {fetched["timestamp"].iloc[0]} '
+                           'are not available')
+
+        recent = append_tail(saved, fetched)
+        stats['recent'] = len(append_tail(head, recent)) - len(append_tail(head, saved))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        recent.to_csv(path + '.tmp', index=False, compression='gzip', date_format=TIMESTAMP_FORMAT)
+        os.replace(path + '.tmp', path)
+        return stats
+
+    def load(self, symbol: Symbol, start: date = None, end: date = None) -> 'pd.DataFrame':
+        """
+        保存済みの約定履歴を1つのDataFrameとして返します。
+
+        Args:
+            symbol:
+                銘柄
+            start:
+                日次ファイルの開始日。指定しない場合は保存済みの全期間。
+            end:
+                日次ファイルの終了日(この日を含まない)。指定した場合はget_tradesで取得した約定を含めない。
+
+        Returns:
+            DataFrame
+        """
+        import pandas as pd
+
+        days = [d for d in self.days(symbol) if (start is None or d >= start) and (end is None or d < end)]
+        frames = [read_trades(self.daily_path(symbol, d)) for d in days]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 0 else _empty()
+        path = self.recent_path(symbol)
+        if end is None and os.path.exists(path):
+            df = append_tail(df, read_trades(path))
+        return df
+
+    @log(logger)
+    def query(self, symbol: Symbol, windows: List[Tuple[datetime, datetime]]) -> 'pd.DataFrame':
+        """
+        保存済みの約定履歴から、いずれかの時間範囲[開始, 終了)に含まれる約定を返します。
+        時間範囲の索引(range_index)を使用し、範囲と重なるファイルのチャンクだけを読み込みます。
+
+        Args:
+            symbol:
+                銘柄
+            windows:
+                [(開始日時, 終了日時), ...]。タイムゾーン無しの日時はUTCとして扱う。
+                例えば30日分の10:00～10:05を指定する場合は30個の時間範囲を指定する。
+
+        Returns:
+            DataFrame
+        """
+        import pandas as pd
+
+        if len(windows) == 0:
+            return _empty()
+        first = min(pd.Timestamp(start) for start, _ in windows).date()
+        last = max(pd.Timestamp(end) for _, end in windows).date()
+        bounds = [(epoch_ns(start), epoch_ns(end)) for start, end in windows]
+
+        def overlaps(path):
+            lo, hi = self.range_index.span(path)
+            return lo is not None and any(lo < end and hi >= start for start, end in bounds)
+
+        # 日次ファイルの日付とUTCの日付のずれを考慮して前後1日のファイルを対象とする
+        days = [d for d in self.days(symbol) if first - timedelta(days=1) <= d <= last + timedelta(days=1)]
+        frames = [self.range_index.read(self.daily_path(symbol, d), windows)
+                  for d in days if overlaps(self.daily_path(symbol, d))]
+        frames = [f for f in frames if f is not None]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 0 else _empty()
+
+        path = self.recent_path(symbol)
+        if os.path.exists(path) and overlaps(path):
+            recent = self.range_index.read(path, windows)
+            if recent is not None:
+                # 日次ファイルに含まれる約定を除く(同時刻の約定は件数で判定する)
+                all_days = self.days(symbol)
+                cutoff = self.range_index.span(self.daily_path(symbol, all_days[-1]))[1] if len(all_days) > 0 \
+                    else None
+                if cutoff is not None:
+                    boundary = df[df['timestamp'].array.asi8 == cutoff]
+                    recent = recent[recent['timestamp'].array.asi8 >= cutoff]
+                    recent = append_tail(boundary, recent)[len(boundary):]
+                df = pd.concat([df, recent], ignore_index=True)
+        self.range_index.save()
+        return df.sort_values('timestamp', kind='stable', ignore_index=True)
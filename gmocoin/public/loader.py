@@ -0,0 +1,128 @@
+#!python3
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, List
+
+from ..common.dto import Symbol
+from ..common.logging import get_logger, log
+from .api import Client
+from .history import TradeHistory, read_trades, _empty
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = get_logger()
+
+
+def _read_job(path: str, engine: str = None) -> 'pd.DataFrame':
+    """
+    プロセスプールで実行する1ファイル分の読み込み処理です。
+    """
+    return read_trades(path, engine)
+
+
+class HistoryLoader:
+    '''
+    複数銘柄の日次約定履歴ファイルを並列に取得・読み込むクラスです。
+
+    ダウンロードはスレッドで、gzipの展開とCSVの解析は銘柄・日付ごとのジョブとしてプロセスプールで並列に実行し、
+    銘柄ごとに日付順に連結します。ファイルはTradeHistoryと同じ場所に保存し、保存済みのファイルは再取得しません。
+    '''
+
+    def __init__(self, root: str, client: Client = None, max_workers: int = None, download_workers: int = 4,
+                 engine: str = None) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            root:
+                保存先ディレクトリを設定します。
+            client:
+                パブリックAPIクライアントを設定します。
+            max_workers:
+                読み込みのプロセス数を設定します。指定しない場合はCPUコア数。1の場合は呼び出し元のプロセスで読み込む。
+            download_workers:
+                ダウンロードのスレッド数を設定します。
+            engine:
+                CSVの解析エンジン('pyarrow'または'c')を設定します。指定しない場合はread_tradesと同じ。
+        """
+        self.history = TradeHistory(root, client)
+        self.max_workers = max_workers if max_workers is not None else os.cpu_count() or 1
+        self.download_workers = download_workers
+        self.engine = engine
+
+    def download(self, symbols: List[Symbol], start: date, end: date) -> Dict[Symbol, List[date]]:
+        """
+        未取得の日次ファイルを並列にダウンロードします。
+
+        Args:
+            symbols:
+                銘柄
+            start:
+                開始日
+            end:
+                終了日(この日を含まない)
+
+        Returns:
+            {銘柄: 日次ファイルが存在する日付}
+        """
+        jobs = [(symbol, start + timedelta(days=d)) for symbol in symbols for d in range((end - start).days)]
+        with ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix='gmocoin-download') as pool:
+            # 呼び出し元の期限(deadline)を引き継ぐ
+            found = list(pool.map(lambda job: copy_context().run(self.history.fetch_day, *job), jobs))
+        self.history.index.save()
+
+        days = {symbol: [] for symbol in symbols}
+        for (symbol, day), exists in zip(jobs, found):
+            if exists:
+                days[symbol].append(day)
+        return days
+
+    @log(logger)
+    def load(self, symbols: List[Symbol], start: date, end: date,
+             download: bool = True) -> Dict[Symbol, 'pd.DataFrame']:
+        """
+        複数銘柄の日次ファイルを読み込み、銘柄ごとに連結して返します。
+
+        Args:
+            symbols:
+                銘柄
+            start:
+                開始日
+            end:
+                終了日(この日を含まない)
+            download:
+                Trueの場合、未取得の日次ファイルをダウンロードする。Falseの場合は保存済みのファイルのみ読み込む。
+
+        Returns:
+            {銘柄: DataFrame}
+        """
+        import pandas as pd
+
+        if download:
+            days = self.download(symbols, start, end)
+        else:
+            days = {symbol: [d for d in self.history.days(symbol) if start <= d < end] for symbol in symbols}
+
+        jobs = [(symbol, day, self.history.daily_path(symbol, day)) for symbol in symbols for day in days[symbol]]
+        # 大きいファイルから実行して、最後に1プロセスだけが動き続けないようにする
+        order = sorted(range(len(jobs)), key=lambda i: -os.path.getsize(jobs[i][2]))
+        frames = [None] * len(jobs)
+        if self.max_workers <= 1 or len(jobs) <= 1:
+            for i in order:
+                frames[i] = _read_job(jobs[i][2], self.engine)
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+                futures = {i: pool.submit(_read_job, jobs[i][2], self.engine) for i in order}
+                for i, future in futures.items():
+                    frames[i] = future.result()
+
+        results = {}
+        for symbol in symbols:
+            parts = [frames[i] for i, job in enumerate(jobs) if job[0] == symbol]
+            results[symbol] = pd.concat(parts, ignore_index=True) if len(parts) > 0 else _empty()
+        return results
@@ -0,0 +1,193 @@
+#!python3
+import threading
+import time
+from typing import Callable, List
+
+from ..common.const import GMOConst
+from ..common.dto import Symbol
+from ..common.logging import get_logger
+from ..common.ratelimit import RateLimiter
+from .api import Client
+from .shared_book import SharedOrderBook
+from .snapshot import SnapshotKind, SnapshotRing, ticker_to_payload, orderbooks_slot_size, \
+    fit_orderbooks_payload
+
+
+logger = get_logger()
+
+
+class MarketDataPoller:
+    '''
+    パブリックAPIを定期的にポーリングし、最新の銘柄レート・板情報を共有メモリに公開するクラスです。
+    同一ホストの他プロセスはSnapshotReaderでHTTPリクエスト無しに参照できます。
+    スロットに収まらない板情報は、収まる段数までに絞って公開します。
+    '''
+
+    def __init__(self, symbols: List[Symbol], ring: SnapshotRing = None, client: Client = None,
+                 interval: float = 1.0, ticker: bool = True, orderbooks: bool = True,
+                 book_depth: int = None, max_levels: int = None,
+                 on_error: Callable[[SnapshotKind, Symbol, Exception], None] = None) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            symbols:
+                ポーリング対象の銘柄を設定します。
+            ring:
+                公開先のリングバッファを設定します。
+                指定しない場合は銘柄数とmax_levelsに合わせて作成する。
+            client:
+                パブリックAPIクライアントを設定します。
+                指定しない場合はGMOConst.API_RATE_LIMITのレートリミッター付きで作成する。
+            interval:
+                1巡あたりの最短間隔秒数を設定します。
+                レートリミッターにより、実際の間隔はこれより長くなる場合がある。
+            ticker:
+                銘柄レートをポーリングするかどうかを設定します。
+            orderbooks:
+                板情報をポーリングするかどうかを設定します。
+            book_depth:
+                指定した場合、板情報を銘柄ごとのSharedOrderBookにもこの段数で書き込む。
+            max_levels:
+                公開する板情報の片側の最大段数を設定します。指定しない場合はスロットに収まる段数まで公開する。
+            on_error:
+                ポーリング・公開の失敗時に(種別, 銘柄, 例外)で呼び出す関数を設定します。
+                銘柄レートを1リクエストで取得した場合の銘柄はNone。
+        """
+        self.symbols = list(symbols)
+        if ring is None:
+            slot_size = orderbooks_slot_size(max_levels) if max_levels is not None else 65536
+            ring = SnapshotRing.create(slot_count=max(16, len(self.symbols) * 4), slot_size=slot_size)
+        self.ring = ring
+        self.client = client if client is not None else Client(rate_limiter=RateLimiter(GMOConst.API_RATE_LIMIT))
+        self.interval = interval
+        self.ticker = ticker
+        self.orderbooks = orderbooks
+        self.max_levels = max_levels
+        self.on_error = on_error
+        self.books = {}
+        if orderbooks and book_depth is not None:
+            self.books = {s: SharedOrderBook.create(s, depth=book_depth) for s in self.symbols}
+        # (種別, 銘柄)ごとの失敗回数と、段数を絞って公開した回数
+        self.failures = {}
+        self.truncated = {}
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def name(self) -> str:
+        """
+        公開先の共有メモリ名を返します。
+        """
+        return self.ring.name
+
+    def poll_once(self) -> list:
+        """
+        全銘柄を1巡ポーリングして公開します。
+        個々のリクエスト・公開の失敗はon_errorに通知し、残りの銘柄のポーリングを続けます。
+
+        Returns:
+            失敗した[(種別, 銘柄, 例外), ...]
+        """
+        errors = []
+        if self.ticker:
+            try:
+                self._poll_ticker()
+            except Exception as err:
+                errors.append(self._fail(SnapshotKind.TICKER, None, err))
+
+        if self.orderbooks:
+            for symbol in self.symbols:
+                if self._stop.is_set():
+                    return errors
+                try:
+                    res = self.client.get_orderbooks(symbol)
+                    self._publish_orderbooks(res.data)
+                    if symbol in self.books:
+                        self.books[symbol].write(res.data)
+                except Exception as err:
+                    errors.append(self._fail(SnapshotKind.ORDERBOOKS, symbol, err))
+        return errors
+
+    def _publish_orderbooks(self, orderbooks) -> None:
+        """
+        板情報をスロットに収まる段数までに絞って公開します。
+        """
+        payload, levels = fit_orderbooks_payload(orderbooks, self.ring.capacity, self.max_levels)
+        if payload is None:
+            raise ValueError(f'orderbooks do not fit in a slot ({self.ring.slot_size} bytes)')
+        depth = max(len(orderbooks.asks), len(orderbooks.bids))
+        if levels < (depth if self.max_levels is None else min(depth, self.max_levels)):
+            self.truncated[orderbooks.symbol] = self.truncated.get(orderbooks.symbol, 0) + 1
+        self.ring.publish(SnapshotKind.ORDERBOOKS, orderbooks.symbol, payload)
+
+    def _fail(self, kind: SnapshotKind, symbol: Symbol, err: Exception) -> tuple:
+        """
+        失敗を記録し、on_errorに通知します。
+        """
+        name = 'ticker' if kind == SnapshotKind.TICKER else f'orderbooks ({symbol.value})'
+        logger.error(f'{name} polling failed: {err!r}')
+        self.failures[(kind, symbol)] = self.failures.get((kind, symbol), 0) + 1
+        self.last_error = err
+        if self.on_error is not None:
+            try:
+                self.on_error(kind, symbol, err)
+            except Exception as hook_err:
+                logger.error(f'poller error hook failed: {hook_err!r}')
+        return kind, symbol, err
+
+    def _poll_ticker(self) -> None:
+        """
+        銘柄レートをポーリングして公開します。
+        複数銘柄の場合は全銘柄分を1リクエストで取得する。
+        """
+        if len(self.symbols) == 1:
+            res = self.client.get_ticker(self.symbols[0])
+        else:
+            res = self.client.get_ticker()
+
+        for ticker in res.data:
+            if ticker.symbol in self.symbols:
+                self.ring.publish(SnapshotKind.TICKER, ticker.symbol, ticker_to_payload(ticker))
+
+    def run(self) -> None:
+        """
+        stopが呼ばれるまでポーリングを繰り返します。
+        """
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.poll_once()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        """
+        バックグラウンドスレッドでポーリングを開始します。
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='MarketDataPoller', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        ポーリングを停止します。
+
+        Args:
+            timeout:
+                スレッド終了を待つ最大秒数
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self) -> None:
+        """
+        ポーリングを停止し、共有メモリを閉じます。
+        """
+        self.stop()
+        self.ring.close()
+        for book in self.books.values():
+            book.close()
@@ -0,0 +1,183 @@
+#!python3
+import gzip
+import io
+import itertools
+import json
+import os
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from ..common.logging import get_logger
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = get_logger()
+
+
+def epoch_ns(timestamp) -> int:
+    """
+    datetime(タイムゾーン無しはUTC)をepochナノ秒に変換します。
+    """
+    import pandas as pd
+
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.value
+
+
+class TimeRangeIndex:
+    '''
+    gzip圧縮された約定履歴ファイルの時間範囲の索引クラスです。
+
+    ファイルごとに最小・最大の約定日時と、chunk_rows行ごとのチャンク(展開後のバイト位置・行数・最小/最大の約定日時)を記録します。
+    時間範囲を指定した読み込みでは、範囲と重ならないファイルは開かず、重なるチャンクの行だけを解析します。
+    gzipは途中から展開できないため、先頭から必要なチャンクまでは展開のみ行います(解析はしません)。
+    索引はファイルの更新日時・サイズが変わった場合に作り直します。
+    '''
+
+    def __init__(self, path: str = None, chunk_rows: int = 2000) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            path:
+                索引を保存するJSONファイルのパスを設定します。指定しない場合はメモリ上にのみ記録する。
+            chunk_rows:
+                1チャンクの行数を設定します。
+        """
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    def _key(self, path: str) -> str:
+        """
+        索引のキー(索引ファイルからの相対パス)を返します。
+        """
+        if self.path is None:
+            return os.path.abspath(path)
+        return os.path.relpath(os.path.abspath(path), os.path.dirname(os.path.abspath(self.path)))
+
+    def _scan(self, path: str) -> dict:
+        """
+        ファイルを先頭から読み込み、チャンクごとの位置と約定日時の範囲を記録します。
+        """
+        import pandas as pd
+
+        chunks = []
+        with gzip.open(path, 'rb') as f:
+            header = f.readline()
+            offset = len(header)
+            while True:
+                lines = list(itertools.islice(f, self.chunk_rows))
+                if len(lines) == 0:
+                    break
+                data = b''.join(lines)
+                column = pd.read_csv(io.BytesIO(header + data), usecols=['timestamp'])['timestamp']
+                timestamps = pd.to_datetime(column, utc=True, format='ISO8601')
+                chunks.append([offset, len(data), len(lines), timestamps.min().value, timestamps.max().value])
+                offset += len(data)
+
+        stat = os.stat(path)
+        return {'mtime': stat.st_mtime, 'size': stat.st_size, 'header': header.decode('utf-8'),
+                'rows': sum(c[2] for c in chunks),
+                'min': min((c[3] for c in chunks), default=None), 'max': max((c[4] for c in chunks), default=None),
+                'chunks': chunks}
+
+    def entry(self, path: str) -> dict:
+        """
+        ファイルの索引を返します。索引が無いか、ファイルが更新されている場合は作成します。
+
+        Returns:
+            {'mtime', 'size', 'header', 'rows', 'min', 'max',
+             'chunks': [[展開後のバイト位置, バイト数, 行数, 最小約定日時, 最大約定日時], ...]}。
+            約定日時はepochナノ秒(UTC)。
+        """
+        key = self._key(path)
+        stat = os.stat(path)
+        entry = self._entries.get(key)
+        if entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return entry
+        entry = self._scan(path)
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+        return entry
+
+    def span(self, path: str) -> Tuple[Optional[int], Optional[int]]:
+        """
+        ファイルの最小・最大の約定日時(epochナノ秒)を返します。
+        """
+        entry = self.entry(path)
+        return entry['min'], entry['max']
+
+    def read(self, path: str, windows: List[Tuple[datetime, datetime]], engine: str = None) -> 'pd.DataFrame':
+        """
+        ファイルからいずれかの時間範囲[開始, 終了)に含まれる約定を読み込みます。
+
+        Args:
+            path:
+                gzip圧縮された約定履歴ファイル
+            windows:
+                [(開始日時, 終了日時), ...]。タイムゾーン無しの日時はUTCとして扱う。
+            engine:
+                read_tradesと同じ
+
+        Returns:
+            DataFrame。該当する約定が無い場合はNone。
+        """
+        import numpy as np
+        from .history import parse_trades
+
+        bounds = [(epoch_ns(start), epoch_ns(end)) for start, end in windows]
+        entry = self.entry(path)
+        selected = [c for c in entry['chunks'] if any(c[3] < end and c[4] >= start for start, end in bounds)]
+        if len(selected) == 0:
+            return None
+
+        # 連続するチャンクはまとめて読み込む
+        ranges = []
+        for offset, size, *_ in selected:
+            if len(ranges) > 0 and ranges[-1][0] + ranges[-1][1] == offset:
+                ranges[-1][1] += size
+            else:
+                ranges.append([offset, size])
+        buffer = io.BytesIO()
+        buffer.write(entry['header'].encode('utf-8'))
+        with gzip.open(path, 'rb') as f:
+            for offset, size in ranges:
+                f.seek(offset)
+                buffer.write(f.read(size))
+        buffer.seek(0)
+
+        df = parse_trades(buffer, engine)
+        values = df['timestamp'].array.asi8
+        mask = np.zeros(len(values), dtype=bool)
+        for start, end in bounds:
+            mask |= (values >= start) & (values < end)
+        return df[mask].reset_index(drop=True)
+
+    def save(self) -> None:
+        """
+        索引をJSONファイルに保存します。pathを指定していない場合と、変更が無い場合は何もしない。
+        """
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(self.path + '.tmp', self.path)
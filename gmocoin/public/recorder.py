@@ -0,0 +1,369 @@
+#!python3
+import csv
+import gzip
+import itertools
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from pytz import utc
+
+from ..common.const import GMOConst
+from ..common.dto import Symbol
+from ..common.logging import get_logger
+from ..common.ratelimit import RateLimiter
+from .api import Client
+from .trades import TradeCursor
+
+
+logger = get_logger()
+
+
+# 種別ごとの列名
+COLUMNS = {
+    'ticker': ('received_at_us', 'timestamp_us', 'ask', 'bid', 'high', 'last', 'low', 'volume'),
+    'orderbooks': ('received_at_us', 'side', 'level', 'price', 'size'),
+    'trades': ('timestamp_us', 'side', 'price', 'size'),
+}
+
+
+def _to_us(timestamp: datetime) -> int:
+    """
+    datetimeをepochマイクロ秒に変換します。
+    """
+    return int(round(timestamp.timestamp() * 1000000))
+
+
+def default_format() -> str:
+    """
+    pyarrowがimportできる場合は'parquet'、できない場合は'csv'を返します。
+    """
+    try:
+        import pyarrow  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'csv'
+
+
+class PartitionWriter:
+    '''
+    1つの種別・銘柄の行をバッファし、時間ごとのパーティションに列指向ファイルとして書き出すクラスです。
+    ファイルは{root}/{kind}/symbol={symbol}/date={YYYY-MM-DD}/hour={HH}/part-{epochミリ秒}.{拡張子}に作成します。
+    '''
+
+    def __init__(self, root: str, kind: str, symbol: Symbol, max_rows: int = 50000, format: str = None) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            root:
+                出力先ディレクトリを設定します。
+            kind:
+                種別(ticker orderbooks trades)を設定します。
+            symbol:
+                銘柄を設定します。
+            max_rows:
+                バッファする最大行数を設定します。超えた場合はファイルに書き出す。
+            format:
+                'parquet'(zstd圧縮)または'csv'(gzip圧縮)を設定します。指定しない場合はdefault_format()。
+        """
+        self.root = root
+        self.kind = kind
+        self.symbol = symbol
+        self.columns = COLUMNS[kind]
+        self.max_rows = max_rows
+        self.format = format if format is not None else default_format()
+        self.rows = 0
+        self.files = 0
+        self.bytes = 0
+        self._buffer = []
+        self._partition = None
+
+    def append(self, rows: List[tuple], received_at: datetime) -> None:
+        """
+        行を追加します。受信日時のパーティションが変わった場合は先にファイルへ書き出します。
+
+        Args:
+            rows:
+                COLUMNSの順の値のタプル
+            received_at:
+                受信日時(UTC)。パーティションの決定に使用する。
+        """
+        partition = received_at.astimezone(utc).strftime('date=%Y-%m-%d/hour=%H')
+        if partition != self._partition:
+            self.flush()
+            self._partition = partition
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.max_rows:
+            self.flush()
+
+    def flush(self) -> str:
+        """
+        バッファした行をファイルに書き出します。
+
+        Returns:
+            作成したファイルパス。書き出す行が無い場合はNone。
+        """
+        if len(self._buffer) == 0:
+            return None
+        directory = os.path.join(self.root, self.kind, f'symbol={self.symbol.value}', self._partition)
+        os.makedirs(directory, exist_ok=True)
+        name = f'part-{int(time.time() * 1000)}-{self.files:05d}'
+
+        if self.format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            path = os.path.join(directory, name + '.parquet')
+            columns = list(zip(*self._buffer))
+            table = pa.table({c: list(v) for c, v in zip(self.columns, columns)})
+            pq.write_table(table, path, compression='zstd')
+        else:
+            path = os.path.join(directory, name + '.csv.gz')
+            with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(self.columns)
+                writer.writerows(self._buffer)
+
+        self.rows += len(self._buffer)
+        self.files += 1
+        self.bytes += os.path.getsize(path)
+        self._buffer = []
+        return path
+
+
+class RecorderStats:
+    """
+    記録処理の統計クラスです。
+    """
+    def __init__(self) -> None:
+        """
+        コンストラクタです。
+        """
+        self.started = time.monotonic()
+        self.requests = {}
+        self.errors = {}
+        # 銘柄ごとの約定履歴を遡りきれなかった回数
+        self.gaps = {}
+
+    def count(self, kind: str, error: bool = False) -> None:
+        """
+        リクエスト数を記録します。
+        """
+        self.requests[kind] = self.requests.get(kind, 0) + 1
+        if error:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+class MarketDataRecorder:
+    '''
+    パブリックAPIを定期的にポーリングし、銘柄レート・板情報・約定履歴をファイルに記録するクラスです。
+    メモリ使用量は種別・銘柄ごとのバッファ(max_rows行)で上限が決まります。
+    '''
+
+    def __init__(self, symbols: List[Symbol], root: str, client: Client = None, interval: float = 1.0,
+                 ticker: bool = True, orderbooks: bool = True, trades: bool = True, depth: int = 20,
+                 max_rows: int = 50000, flush_interval: float = 60.0, format: str = None,
+                 max_trade_pages: int = 10) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            symbols:
+                記録対象の銘柄を設定します。
+            root:
+                出力先ディレクトリを設定します。
+            client:
+                パブリックAPIクライアントを設定します。
+                指定しない場合はGMOConst.API_RATE_LIMITのレートリミッター付きで作成する。
+            interval:
+                1巡あたりの最短間隔秒数を設定します。
+            ticker:
+                銘柄レートを記録するかどうかを設定します。
+            orderbooks:
+                板情報を記録するかどうかを設定します。
+            trades:
+                約定履歴を記録するかどうかを設定します。
+            depth:
+                記録する板情報の段数を設定します。
+            max_rows:
+                種別・銘柄ごとにバッファする最大行数を設定します。
+            flush_interval:
+                バッファをファイルに書き出す最長の間隔秒数を設定します。
+            format:
+                'parquet'または'csv'を設定します。指定しない場合はpyarrowがあればparquet。
+            max_trade_pages:
+                1巡で遡る約定履歴の最大ページ数を設定します。遡りきれない場合は統計のgapsに記録する。
+        """
+        self.symbols = list(symbols)
+        self.client = client if client is not None else Client(rate_limiter=RateLimiter(GMOConst.API_RATE_LIMIT))
+        self.interval = interval
+        self.kinds = [k for k, enabled in (('ticker', ticker), ('orderbooks', orderbooks), ('trades', trades))
+                      if enabled]
+        self.depth = depth
+        self.flush_interval = flush_interval
+        self.max_trade_pages = max_trade_pages
+        self.stats = RecorderStats()
+        self.writers = {(k, s): PartitionWriter(root, k, s, max_rows=max_rows, format=format)
+                        for k in self.kinds for s in self.symbols}
+        self._cursors = {s: TradeCursor() for s in self.symbols}
+        self._flushed = time.monotonic()
+        self._stop = threading.Event()
+
+    def _request(self, kind: str, func, *args):
+        """
+        リクエストを送信し、統計を記録します。失敗はログ出力のみ行いNoneを返します。
+        """
+        try:
+            res = func(*args)
+        except Exception as err:
+            self.stats.count(kind, error=True)
+            logger.error(f'{kind} recording failed {[getattr(a, "value", a) for a in args]}: {err!r}')
+            return None
+        self.stats.count(kind)
+        return res
+
+    def _fetch_trades(self, symbol: Symbol, count: int = 100):
+        """
+        前回の取得位置より前の約定まで、get_tradesを新しいページから順に取得します。
+        取得中に新しい約定が発生してページがずれた分は除きます。
+
+        Returns:
+            約定履歴(新しい順)。リクエストに失敗した場合はNone。
+        """
+        cursor = self._cursors[symbol]
+        trades = []
+        for page in range(1, self.max_trade_pages + 1):
+            res = self._request('trades', self.client.get_trades, symbol, page, count)
+            if res is None:
+                return None
+            items = res.data.trades or []
+            # ページがずれた場合、前のページの末尾と同じ約定が先頭に含まれる
+            keys = [(t.timestamp, t.price, t.size, t.side) for t in items]
+            overlap = next((n for n in range(min(len(trades), len(items)), 0, -1)
+                            if [(t.timestamp, t.price, t.size, t.side) for t in trades[-n:]] == keys[:n]), 0)
+            trades.extend(items[overlap:])
+            if cursor.timestamp is None or any(t.timestamp < cursor.timestamp for t in items):
+                return trades
+            if len(items) < count:
+                # 最も古い約定まで取得した場合は、前回の取得位置の約定を含んでいれば欠落は無い
+                if any(t.timestamp <= cursor.timestamp for t in trades):
+                    return trades
+                break
+
+        self.stats.gaps[symbol] = self.stats.gaps.get(symbol, 0) + 1
+        logger.warning(f'trades of {symbol.value} since {cursor.timestamp} could not be fully recorded '
+                       f'within {self.max_trade_pages} pages')
+        return trades
+
+    def record_once(self) -> None:
+        """
+        全銘柄を1巡ポーリングして記録します。
+        """
+        if 'ticker' in self.kinds:
+            # 複数銘柄の場合は全銘柄分を1リクエストで取得する
+            res = self._request('ticker', *((self.client.get_ticker, self.symbols[0]) if len(self.symbols) == 1
+                                            else (self.client.get_ticker,)))
+            if res is not None:
+                received_at = datetime.now(utc)
+                for t in res.data:
+                    if (('ticker', t.symbol)) in self.writers:
+                        self.writers[('ticker', t.symbol)].append(
+                            [(_to_us(received_at), _to_us(t.timestamp), float(t.ask), float(t.bid), float(t.high),
+                              float(t.last), float(t.low), float(t.volume))], received_at)
+
+        for symbol in self.symbols:
+            if self._stop.is_set():
+                return
+            if 'orderbooks' in self.kinds:
+                res = self._request('orderbooks', self.client.get_orderbooks, symbol)
+                if res is not None:
+                    received_at = datetime.now(utc)
+                    received_us = _to_us(received_at)
+                    rows = [(received_us, 'ASK', i, float(o.price), float(o.size))
+                            for i, o in enumerate(res.data.asks[:self.depth])]
+                    rows += [(received_us, 'BID', i, float(o.price), float(o.size))
+                             for i, o in enumerate(res.data.bids[:self.depth])]
+                    self.writers[('orderbooks', symbol)].append(rows, received_at)
+            if 'trades' in self.kinds:
+                trades = self._fetch_trades(symbol)
+                if trades is not None:
+                    new = self._cursors[symbol].new_trades(trades)
+                    # 約定日時のパーティションに書き込む
+                    hour = lambda t: t.timestamp.astimezone(utc).strftime('%Y%m%d%H')
+                    for _, group in itertools.groupby(new, key=hour):
+                        group = list(group)
+                        self.writers[('trades', symbol)].append(
+                            [(_to_us(t.timestamp), t.side.value, float(t.price), float(t.size)) for t in group],
+                            group[0].timestamp)
+
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        全てのバッファをファイルに書き出します。
+        """
+        for writer in self.writers.values():
+            writer.flush()
+        self._flushed = time.monotonic()
+
+    def report(self) -> Dict[str, dict]:
+        """
+        種別ごとのリクエスト数・エラー数・記録行数・ファイル数・バイト数とリクエスト/秒を返します。
+
+        Returns:
+            {種別: {'requests', 'errors', 'rows', 'files', 'bytes', 'requests_per_sec', 'rows_per_sec'}}。
+            tradesには約定履歴を遡りきれなかった回数の合計'gaps'も含む。
+        """
+        elapsed = max(time.monotonic() - self.stats.started, 1e-9)
+        report = {}
+        for kind in self.kinds:
+            writers = [w for (k, _), w in self.writers.items() if k == kind]
+            requests = self.stats.requests.get(kind, 0)
+            rows = sum(w.rows for w in writers)
+            report[kind] = {'requests': requests, 'errors': self.stats.errors.get(kind, 0), 'rows': rows,
+                            'files': sum(w.files for w in writers), 'bytes': sum(w.bytes for w in writers),
+                            'requests_per_sec': requests / elapsed, 'rows_per_sec': rows / elapsed}
+        if 'trades' in report:
+            report['trades']['gaps'] = sum(self.stats.gaps.values())
+        return report
+
+    def run(self, duration: float = None, stats_interval: float = 60.0, on_stats=None) -> None:
+        """
+        stopが呼ばれるか、duration秒経過するまで記録を繰り返します。終了時にバッファを書き出します。
+
+        Args:
+            duration:
+                記録する秒数。指定しない場合はstopが呼ばれるまで。
+            stats_interval:
+                on_statsを呼び出す間隔秒数
+            on_stats:
+                reportの結果を引数に呼び出す関数。指定しない場合はログ出力する。
+        """
+        started = time.monotonic()
+        reported = started
+        try:
+            while not self._stop.is_set():
+                loop_started = time.monotonic()
+                if duration is not None and loop_started - started >= duration:
+                    break
+                self.record_once()
+                if loop_started - reported >= stats_interval:
+                    reported = loop_started
+                    report = self.report()
+                    if on_stats is not None:
+                        on_stats(report)
+                    else:
+                        logger.info(f'recorder stats: {report}')
+                self._stop.wait(max(0.0, self.interval - (time.monotonic() - loop_started)))
+        finally:
+            self.flush()
+
+    def stop(self) -> None:
+        """
+        記録を停止します。
+        """
+        self._stop.set()
@@ -0,0 +1,211 @@
+#!python3
+import struct
+import time
+from decimal import Decimal
+from multiprocessing.shared_memory import SharedMemory
+
+from ..common.dto import Symbol
+from ..common.shm import attach_shared_memory
+from .dto import GetOrderBooksData, OrderData
+
+
+# ヘッダー: マジック, 板の段数, 銘柄, シーケンス番号, 売り段数, 買い段数, 更新時刻(epoch秒)
+_HEADER = struct.Struct('<4sI16sQIId')
+_SEQ_OFFSET = 24
+_SEQ = struct.Struct('<Q')
+_BODY_OFFSET = _HEADER.size
+_MAGIC = b'GMOB'
+
+
+def _to_decimal(value: float) -> Decimal:
+    """
+    共有メモリ上のfloatをDecimalに変換します。
+    """
+    if value.is_integer():
+        return Decimal(int(value))
+    return Decimal(repr(value))
+
+
+class SharedOrderBook:
+    '''
+    銘柄ごとの板情報を固定レイアウトで共有メモリに配置するクラスです。
+    書込みは1プロセス(フィーダー)のみ、読込みは複数プロセスからロック無しで行えます。
+    シーケンス番号が奇数の間は書込み中を示し、読込み側は前後のシーケンス番号が一致するまで読み直します。
+
+    レイアウト:
+        ヘッダー
+        売り注文 depth段 × (価格, 数量) float64
+        買い注文 depth段 × (価格, 数量) float64
+    '''
+
+    def __init__(self, shm: SharedMemory, owner: bool) -> None:
+        """
+        コンストラクタです。create/attachを使用してください。
+
+        Args:
+            shm:
+                共有メモリを設定します。
+            owner:
+                共有メモリを作成したプロセスかどうかを設定します。
+        """
+        magic, depth, symbol, _, _, _, _ = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f'Not a shared order book ({shm.name})')
+        self._shm = shm
+        self._owner = owner
+        self.depth = depth
+        self.symbol = Symbol(symbol.rstrip(b'\0').decode('ascii'))
+        self._levels = struct.Struct(f'<{depth * 2}d')
+        self._bids_offset = _BODY_OFFSET + self._levels.size
+
+    @staticmethod
+    def default_name(symbol: Symbol) -> str:
+        """
+        銘柄ごとの既定の共有メモリ名を返します。
+        """
+        return f'gmocoin_book_{symbol.value}'
+
+    @classmethod
+    def create(cls, symbol: Symbol, depth: int = 100, name: str = None) -> 'SharedOrderBook':
+        """
+        書込み用に共有メモリを作成します。
+
+        Args:
+            symbol:
+                銘柄
+            depth:
+                保持する板の段数。これを超える段は切り捨てる。
+            name:
+                共有メモリ名。指定しない場合はdefault_nameを使用する。
+
+        Returns:
+            SharedOrderBook
+        """
+        name = name if name is not None else cls.default_name(symbol)
+        shm = SharedMemory(name=name, create=True, size=_BODY_OFFSET + depth * 2 * 2 * 8)
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, depth, symbol.value.encode('ascii'), 0, 0, 0, 0.0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, symbol: Symbol, name: str = None) -> 'SharedOrderBook':
+        """
+        読込み用に既存の共有メモリに接続します。
+
+        Args:
+            symbol:
+                銘柄
+            name:
+                共有メモリ名。指定しない場合はdefault_nameを使用する。
+
+        Returns:
+            SharedOrderBook
+        """
+        book = cls(attach_shared_memory(name if name is not None else cls.default_name(symbol)), owner=False)
+        if book.symbol != symbol:
+            book.close()
+            raise ValueError(f'Symbol mismatch ({book.symbol.value} != {symbol.value})')
+        return book
+
+    @property
+    def name(self) -> str:
+        """
+        共有メモリ名を返します。
+        """
+        return self._shm.name
+
+    @property
+    def seq(self) -> int:
+        """
+        現在のシーケンス番号を返します。更新の有無の確認に使用できます。
+        """
+        return _SEQ.unpack_from(self._shm.buf, _SEQ_OFFSET)[0]
+
+    def close(self) -> None:
+        """
+        共有メモリを閉じます。作成したプロセスの場合は削除も行います。
+        """
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def _pack_levels(self, orders) -> list:
+        """
+        板情報を(価格, 数量)が交互に並んだfloatのリストに変換します。
+        """
+        levels = [0.0] * (self.depth * 2)
+        for i, o in enumerate(orders[:self.depth]):
+            levels[i * 2] = float(o.price)
+            levels[i * 2 + 1] = float(o.size)
+        return levels
+
+    def write(self, orderbooks: GetOrderBooksData) -> int:
+        """
+        板情報を書き込みます。
+
+        Args:
+            orderbooks:
+                get_orderbooksで取得した板情報
+
+        Returns:
+            書込み後のシーケンス番号
+        """
+        if orderbooks.symbol != self.symbol:
+            raise ValueError(f'Symbol mismatch ({orderbooks.symbol.value} != {self.symbol.value})')
+
+        # 変換は書込み中の時間を短くするため、シーケンス番号の更新前に行う
+        asks = self._pack_levels(orderbooks.asks)
+        bids = self._pack_levels(orderbooks.bids)
+        n_asks = min(len(orderbooks.asks), self.depth)
+        n_bids = min(len(orderbooks.bids), self.depth)
+
+        buf = self._shm.buf
+        seq = self.seq
+        _SEQ.pack_into(buf, _SEQ_OFFSET, seq + 1)
+        _HEADER.pack_into(buf, 0, _MAGIC, self.depth, self.symbol.value.encode('ascii'),
+                          seq + 1, n_asks, n_bids, time.time())
+        self._levels.pack_into(buf, _BODY_OFFSET, *asks)
+        self._levels.pack_into(buf, self._bids_offset, *bids)
+        _SEQ.pack_into(buf, _SEQ_OFFSET, seq + 2)
+        return seq + 2
+
+    def read_levels(self, spin: int = 10000):
+        """
+        板情報をfloatのまま読み込みます。
+
+        Args:
+            spin:
+                書込み中だった場合に読み直す最大回数
+
+        Returns:
+            (シーケンス番号, 更新時刻, 売り[(価格, 数量)], 買い[(価格, 数量)])
+            書込み中が続いて読み込めなかった場合はNone。
+        """
+        buf = self._shm.buf
+        for _ in range(spin):
+            _, _, _, seq, n_asks, n_bids, updated_at = _HEADER.unpack_from(buf, 0)
+            if seq % 2 == 1:
+                continue
+            asks = self._levels.unpack_from(buf, _BODY_OFFSET)
+            bids = self._levels.unpack_from(buf, self._bids_offset)
+            if self.seq != seq:
+                continue
+            return (seq, updated_at,
+                    list(zip(asks[0:n_asks * 2:2], asks[1:n_asks * 2:2])),
+                    list(zip(bids[0:n_bids * 2:2], bids[1:n_bids * 2:2])))
+        return None
+
+    def read(self) -> GetOrderBooksData:
+        """
+        板情報をGetOrderBooksDataとして読み込みます。
+        まだ一度も書き込まれていない場合はNoneを返します。
+
+        Returns:
+            GetOrderBooksData
+        """
+        levels = self.read_levels()
+        if levels is None or levels[0] == 0:
+            return None
+        _, _, asks, bids = levels
+        return GetOrderBooksData(asks=[OrderData(_to_decimal(p), _to_decimal(s)) for p, s in asks],
+                                 bids=[OrderData(_to_decimal(p), _to_decimal(s)) for p, s in bids],
+                                 symbol=self.symbol)
@@ -0,0 +1,344 @@
+#!python3
+import struct
+import time
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from multiprocessing.shared_memory import SharedMemory
+
+from ..common import json_backend
+from ..common.shm import attach_shared_memory
+from ..common.dto import Symbol
+from .dto import GetTickerData, GetOrderBooksData, OrderData
+
+
+class SnapshotKind(Enum):
+    """
+    スナップショット種別を示します。
+    """
+    TICKER = 1
+    ORDERBOOKS = 2
+
+
+# ヘッダー: マジック, スロット数, スロットサイズ, 書込み回数
+_HEADER = struct.Struct('<4sIIQ')
+# スロットヘッダー: シーケンス番号, 種別, 銘柄, ペイロード長, 公開時刻(epoch秒)
+_SLOT_HEADER = struct.Struct('<QB16sId')
+_SEQ = struct.Struct('<Q')
+_MAGIC = b'GMOS'
+# 書込み途中のスロットを読み直す回数
+_READ_RETRY = 8
+# 板情報のペイロードの1段あたりの見積もりバイト数(価格・数量の文字列とJSONの区切り)
+_LEVEL_BYTES = 64
+
+
+class SnapshotRing:
+    '''
+    最新のスナップショットを共有メモリ上のリングバッファで公開するクラスです。
+    書込みは1プロセスのみ、読込みは複数プロセスからロック無しで行えます。
+    各スロットはシーケンス番号(奇数: 書込み中)で整合性を確認します。
+    '''
+
+    def __init__(self, shm: SharedMemory, owner: bool) -> None:
+        """
+        コンストラクタです。create/attachを使用してください。
+
+        Args:
+            shm:
+                共有メモリを設定します。
+            owner:
+                共有メモリを作成したプロセスかどうかを設定します。
+        """
+        magic, slot_count, slot_size, _ = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f'Not a snapshot ring ({shm.name})')
+        self._shm = shm
+        self._owner = owner
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+
+    @classmethod
+    def create(cls, name: str = None, slot_count: int = 64, slot_size: int = 65536) -> 'SnapshotRing':
+        """
+        リングバッファを作成します。
+
+        Args:
+            name:
+                共有メモリ名。指定しない場合は自動で採番する。
+            slot_count:
+                スロット数。公開する銘柄数 × 種別数より大きくすること。
+            slot_size:
+                1スロットのバイト数(ヘッダー込み)
+
+        Returns:
+            SnapshotRing
+        """
+        if slot_size <= _SLOT_HEADER.size:
+            raise ValueError(f'slot_size is too small ({slot_size})')
+        shm = SharedMemory(name=name, create=True, size=_HEADER.size + slot_count * slot_size)
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, slot_count, slot_size, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SnapshotRing':
+        """
+        既存のリングバッファに接続します。
+
+        Args:
+            name:
+                共有メモリ名
+
+        Returns:
+            SnapshotRing
+        """
+        return cls(attach_shared_memory(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        """
+        共有メモリ名を返します。
+        """
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        """
+        1スロットに書き込めるペイロードの最大バイト数を返します。
+        """
+        return self.slot_size - _SLOT_HEADER.size
+
+    def close(self) -> None:
+        """
+        共有メモリを閉じます。作成したプロセスの場合は削除も行います。
+        """
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def _write_count(self) -> int:
+        """
+        これまでの書込み回数を返します。
+        """
+        return _HEADER.unpack_from(self._shm.buf, 0)[3]
+
+    def _slot_offset(self, index: int) -> int:
+        """
+        スロットの先頭位置を返します。
+        """
+        return _HEADER.size + index * self.slot_size
+
+    def publish(self, kind: SnapshotKind, symbol: Symbol, payload: bytes) -> None:
+        """
+        スナップショットを書き込みます。
+
+        Args:
+            kind:
+                スナップショット種別
+            symbol:
+                銘柄
+            payload:
+                エンコード済みのスナップショット
+        """
+        if len(payload) > self.capacity:
+            raise ValueError(f'payload is too large ({len(payload)} bytes)')
+
+        buf = self._shm.buf
+        write_count = self._write_count()
+        offset = self._slot_offset(write_count % self.slot_count)
+        seq = _SEQ.unpack_from(buf, offset)[0]
+
+        # 書込み中を示す奇数のシーケンス番号を設定してから書き込む
+        _SEQ.pack_into(buf, offset, seq + 1)
+        _SLOT_HEADER.pack_into(buf, offset, seq + 1, kind.value, symbol.value.encode('ascii'),
+                               len(payload), time.time())
+        start = offset + _SLOT_HEADER.size
+        buf[start:start + len(payload)] = payload
+        _SEQ.pack_into(buf, offset, seq + 2)
+
+        _HEADER.pack_into(buf, 0, _MAGIC, self.slot_count, self.slot_size, write_count + 1)
+
+    def latest(self, kind: SnapshotKind, symbol: Symbol):
+        """
+        指定した種別・銘柄の最新スナップショットを読み込みます。
+
+        Args:
+            kind:
+                スナップショット種別
+            symbol:
+                銘柄
+
+        Returns:
+            (公開時刻(epoch秒), ペイロード)。存在しない場合はNone。
+        """
+        buf = self._shm.buf
+        symbol_bytes = symbol.value.encode('ascii')
+        write_count = self._write_count()
+
+        for i in range(min(write_count, self.slot_count)):
+            offset = self._slot_offset((write_count - 1 - i) % self.slot_count)
+            for _ in range(_READ_RETRY):
+                seq, slot_kind, slot_symbol, length, published_at = _SLOT_HEADER.unpack_from(buf, offset)
+                if seq % 2 == 1:
+                    continue
+                if slot_kind != kind.value or slot_symbol.rstrip(b'\0') != symbol_bytes:
+                    break
+                start = offset + _SLOT_HEADER.size
+                payload = bytes(buf[start:start + length])
+                if _SEQ.unpack_from(buf, offset)[0] == seq:
+                    return published_at, payload
+        return None
+
+
+def ticker_to_payload(ticker: GetTickerData) -> bytes:
+    """
+    GetTickerDataをスナップショットのペイロードに変換します。
+    """
+    return json_backend.dumps({
+        'symbol': ticker.symbol.value,
+        'timestamp': ticker.timestamp.isoformat(),
+        'ask': str(ticker.ask),
+        'bid': str(ticker.bid),
+        'high': str(ticker.high),
+        'last': str(ticker.last),
+        'low': str(ticker.low),
+        'volume': str(ticker.volume),
+    }).encode('utf-8')
+
+
+def payload_to_ticker(payload: bytes) -> GetTickerData:
+    """
+    スナップショットのペイロードをGetTickerDataに変換します。
+    """
+    d = json_backend.loads(payload)
+    return GetTickerData(symbol=Symbol(d['symbol']), timestamp=datetime.fromisoformat(d['timestamp']),
+                         volume=Decimal(d['volume']), ask=Decimal(d['ask']), bid=Decimal(d['bid']),
+                         high=Decimal(d['high']), last=Decimal(d['last']), low=Decimal(d['low']))
+
+
+def orderbooks_slot_size(levels: int) -> int:
+    """
+    片側levels段の板情報を書き込めるスロットのバイト数(ヘッダー込み)の目安を返します。
+    """
+    return _SLOT_HEADER.size + 256 + 2 * levels * _LEVEL_BYTES
+
+
+def orderbooks_to_payload(orderbooks: GetOrderBooksData, max_levels: int = None) -> bytes:
+    """
+    GetOrderBooksDataをスナップショットのペイロードに変換します。
+
+    Args:
+        orderbooks:
+            板情報
+        max_levels:
+            片側の最大段数。指定しない場合は全段。
+    """
+    return json_backend.dumps({
+        'symbol': orderbooks.symbol.value,
+        'asks': [[str(o.price), str(o.size)] for o in orderbooks.asks[:max_levels]],
+        'bids': [[str(o.price), str(o.size)] for o in orderbooks.bids[:max_levels]],
+    }).encode('utf-8')
+
+
+def fit_orderbooks_payload(orderbooks: GetOrderBooksData, capacity: int, max_levels: int = None):
+    """
+    板情報をcapacityバイトに収まる段数までに絞ってペイロードに変換します。
+
+    Args:
+        orderbooks:
+            板情報
+        capacity:
+            ペイロードの最大バイト数(SnapshotRing.capacity)
+        max_levels:
+            片側の最大段数。指定しない場合は全段。
+
+    Returns:
+        (ペイロード, 片側の段数)。最良気配のみでも収まらない場合は(None, 0)。
+    """
+    levels = max(len(orderbooks.asks), len(orderbooks.bids))
+    if max_levels is not None:
+        levels = min(levels, max_levels)
+    payload = orderbooks_to_payload(orderbooks, levels)
+    while len(payload) > capacity:
+        if levels <= 1:
+            return None, 0
+        # 1段あたりのバイト数から収まる段数を見積もり、少なくとも1段は減らす
+        levels = max(1, min(levels - 1, levels * capacity // len(payload)))
+        payload = orderbooks_to_payload(orderbooks, levels)
+    return payload, levels
+
+
+def payload_to_orderbooks(payload: bytes) -> GetOrderBooksData:
+    """
+    スナップショットのペイロードをGetOrderBooksDataに変換します。
+    """
+    d = json_backend.loads(payload)
+    return GetOrderBooksData(asks=[OrderData(Decimal(p), Decimal(s)) for p, s in d['asks']],
+                             bids=[OrderData(Decimal(p), Decimal(s)) for p, s in d['bids']],
+                             symbol=Symbol(d['symbol']))
+
+
+class SnapshotReader:
+    '''
+    MarketDataPollerが公開したスナップショットを読み込むクラスです。
+    HTTPリクエストを行わずに最新の銘柄レート・板情報を取得できます。
+    '''
+
+    def __init__(self, name: str) -> None:
+        """
+        コンストラクタです。
+
+        Args:
+            name:
+                共有メモリ名を設定します。
+        """
+        self._ring = SnapshotRing.attach(name)
+
+    def close(self) -> None:
+        """
+        共有メモリを閉じます。
+        """
+        self._ring.close()
+
+    def get_ticker(self, symbol: Symbol, max_age: float = None) -> GetTickerData:
+        """
+        指定した銘柄の最新レートを取得します。
+
+        Args:
+            symbol:
+                銘柄
+            max_age:
+                許容する経過秒数。超えている場合はNoneを返す。
+
+        Returns:
+            GetTickerData
+        """
+        snapshot = self._latest(SnapshotKind.TICKER, symbol, max_age)
+        return None if snapshot is None else payload_to_ticker(snapshot)
+
+    def get_orderbooks(self, symbol: Symbol, max_age: float = None) -> GetOrderBooksData:
+        """
+        指定した銘柄の板情報を取得します。
+
+        Args:
+            symbol:
+                銘柄
+            max_age:
+                許容する経過秒数。超えている場合はNoneを返す。
+
+        Returns:
+            GetOrderBooksData
+        """
+        snapshot = self._latest(SnapshotKind.ORDERBOOKS, symbol, max_age)
+        return None if snapshot is None else payload_to_orderbooks(snapshot)
+
+    def _latest(self, kind: SnapshotKind, symbol: Symbol, max_age: float) -> bytes:
+        """
+        経過秒数を確認し、最新スナップショットのペイロードを返します。
+        """
+        latest = self._ring.latest(kind, symbol)
+        if latest is None:
+            return None
+        published_at, payload = latest
+        if max_age is not None and time.time() - published_at > max_age:
+            return None
+        return payload
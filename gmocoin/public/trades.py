@@ -0,0 +1,63 @@
+#!python3
+from collections import Counter
+from typing import List
+
+from .dto import Trade
+
+
+def _key(trade: Trade) -> tuple:
+    """
+    同時刻の約定を区別するキーを返します。
+    """
+    return trade.price, trade.size, trade.side
+
+
+class TradeCursor:
+    '''
+    get_tradesの結果から未取得の約定履歴だけを取り出すクラスです。
+    最終取得時刻と、その時刻の約定の件数を記録して同時刻の約定の重複を除きます。
+    同じ内容の約定が同時刻に複数ある場合も、件数が増えた分は新しい約定として返します。
+    '''
+
+    def __init__(self) -> None:
+        """
+        コンストラクタです。
+        """
+        self.timestamp = None
+        self._keys = Counter()
+
+    def new_trades(self, trades: List[Trade]) -> List[Trade]:
+        """
+        未取得の約定履歴を古い順に返し、取得済みとして記録します。
+        最終取得時刻の約定は全件含まれている必要があります(最終取得時刻より前の約定まで取得すること)。
+
+        Args:
+            trades:
+                get_tradesで取得した約定履歴(新しい順)
+
+        Returns:
+            List[Trade]
+        """
+        ordered = sorted(trades, key=lambda t: t.timestamp)
+        if self.timestamp is None:
+            new = ordered
+        else:
+            current = Counter(_key(t) for t in ordered if t.timestamp == self.timestamp)
+            extra = {k: n - self._keys[k] for k, n in current.items() if n > self._keys[k]}
+            new = []
+            for t in ordered:
+                if t.timestamp < self.timestamp:
+                    continue
+                if t.timestamp == self.timestamp:
+                    if extra.get(_key(t), 0) <= 0:
+                        continue
+                    extra[_key(t)] -= 1
+                new.append(t)
+        if len(new) == 0:
+            return new
+
+        last = new[-1].timestamp
+        counts = Counter(_key(t) for t in ordered if t.timestamp == last)
+        self._keys = counts if last != self.timestamp else self._keys | counts
+        self.timestamp = last
+        return new
@@ -0,0 +1,55 @@
+#!python3
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from gmocoin.common.dto import Symbol
+from gmocoin.public.analytics import BookStack
+from gmocoin.public.dto import GetOrderBooksData, OrderData
+
+
+def _book(asks, bids):
+    return GetOrderBooksData(asks=[OrderData(price=Decimal(p), size=Decimal(s)) for p, s in asks],
+                             bids=[OrderData(price=Decimal(p), size=Decimal(s)) for p, s in bids], symbol=Symbol.BTC)
+
+
+@pytest.fixture
+def stack():
+    return BookStack.from_snapshots([
+        _book([('101', '1'), ('102', '2'), ('105', '3')], [('99', '3'), ('98', '1')]),
+        _book([('100.5', '2')], [('100', '2'), ('99', '2'), ('90', '5')]),
+    ], depth=3)
+
+
+def test_top_of_book_features(stack):
+    np.testing.assert_allclose(stack.mid(), [100, 100.25])
+    np.testing.assert_allclose(stack.spread(), [2, 0.5])
+    # 買い板が厚いほど最良売り気配に近づく
+    np.testing.assert_allclose(stack.microprice(), [(101 * 3 + 99 * 1) / 4, 100.25])
+    np.testing.assert_allclose(stack.imbalance(levels=2), [(4 - 3) / 7, (4 - 2) / 6])
+
+
+def test_slope_and_liquidity(stack):
+    ask_slope, bid_slope = stack.slope(levels=3)
+    x, y = np.array([1, 2, 5]), np.array([1, 3, 6])
+    assert ask_slope[0] == pytest.approx((x * y).sum() / (x * x).sum())
+    x, y = np.array([1, 2]), np.array([3, 4])
+    assert bid_slope[0] == pytest.approx((x * y).sum() / (x * x).sum())
+
+    ask, bid = stack.liquidity_at_distance([100, 250])
+    np.testing.assert_allclose(ask, [[1, 3], [2, 2]])
+    np.testing.assert_allclose(bid, [[3, 4], [2, 4]])
+    assert set(stack.features(bps=[100])) >= {'microprice', 'ask_liquidity_100bps', 'bid_slope'}
+
+
+def test_from_records_matches_snapshots(stack):
+    rows = []
+    for t, (asks, bids) in enumerate(zip(stack.asks, stack.bids)):
+        for side, book in (('ASK', asks), ('BID', bids)):
+            rows += [(t, side, i, p, s) for i, (p, s) in enumerate(book) if not np.isnan(p)]
+    times, sides, levels, prices, sizes = map(np.array, zip(*rows))
+    unique, records = BookStack.from_records(times, sides, levels, prices, sizes, depth=3)
+    assert unique.tolist() == [0, 1]
+    np.testing.assert_array_equal(records.asks, stack.asks)
+    np.testing.assert_array_equal(records.bids, stack.bids)
@@ -0,0 +1,87 @@
+#!python3
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+from pytz import utc
+
+from gmocoin.common.dto import Symbol, SalesSide, ExecutionType, OrderStatus, TimeInForce
+from gmocoin.common.exception import GmoCoinException
+from gmocoin.private.backtest import Backtester
+from gmocoin.private.simulator import SimulatedClient
+
+
+START = datetime(2021, 3, 1, tzinfo=utc)
+
+
+def _trades(prices, symbol='BTC_JPY', step=10):
+    return pd.DataFrame({'symbol': symbol, 'side': 'BUY', 'size': 0.01, 'price': prices,
+                         'timestamp': [(START + timedelta(seconds=i * step)).strftime('%Y-%m-%d %H:%M:%S.%f')
+                                       for i in range(len(prices))]})
+
+
+def test_limit_round_trip():
+    # 60秒ごとに6件ずつ約定がある
+    prices = [100, 100, 100, 100, 100, 100,
+              100, 99.5, 99, 98, 99, 100,
+              101, 102, 103, 101, 100, 100]
+    calls = []
+
+    def strategy(client, now):
+        calls.append(now)
+        if len(calls) == 1:
+            client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS, size='1', price='99')
+        elif len(calls) == 2:
+            assert client.get_position_summary(Symbol.BTC_JPY).data.position_summarys[0].sum_position_quantity == 1
+            client.close_bulk_order(Symbol.BTC_JPY, SalesSide.SELL, ExecutionType.LIMIT, TimeInForce.FAS,
+                                    size='1', price='102')
+
+    result = Backtester(strategy, interval=60.0, maker_fee='0.001').run(_trades(prices))
+    assert len(calls) == 3
+    assert [(e.side, e.price) for e in result.executions] == [(SalesSide.BUY, Decimal(99)),
+                                                               (SalesSide.SELL, Decimal(102))]
+    # 指値を超えた最初の約定日時で約定する
+    assert result.executions[0].timestamp == START + timedelta(seconds=90)
+    assert result.executions[1].loss_gain == 3
+    assert result.fee == Decimal('0.201')
+    assert result.realized_pnl == Decimal('2.799')
+    assert result.unrealized_pnl == 0
+    assert len(result.to_frame()) == 2
+
+
+def test_time_in_force():
+    client = SimulatedClient()
+    sok = client.order(Symbol.BTC, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.SOK, size='1', price='101').data
+    fak = client.order(Symbol.BTC, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAK, size='1', price='99').data
+    fas = client.order(Symbol.BTC, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS, size='1', price='101').data
+    stop = client.order(Symbol.BTC, SalesSide.SELL, ExecutionType.STOP, TimeInForce.FAK, size='1', price='95').data
+    executions = client.on_trade(Symbol.BTC, Decimal(100), START)
+
+    assert client._orders[sok].status == OrderStatus.CANCELED
+    assert client._orders[fak].status == OrderStatus.EXPIRED
+    # 発注時に約定可能な指値は約定価格でテイカー約定する
+    assert [(e.order_id, e.price) for e in executions] == [(fas, Decimal(100))]
+    assert client.get_active_orders(Symbol.BTC).data.active_orders[0].order_id == stop
+
+    client.on_trade(Symbol.BTC, Decimal(94), START)
+    assert client._orders[stop].status == OrderStatus.EXECUTED
+    assert client.tracker.net_size(Symbol.BTC) == 0
+
+
+def test_order_errors():
+    client = SimulatedClient()
+    with pytest.raises(GmoCoinException) as e:
+        client.order(Symbol.ETH_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.SOK, size='1', price='1')
+    assert e.value.messageg.messages[0].message_code == 'ERR-5106'
+    with pytest.raises(GmoCoinException):
+        client.close_order(Symbol.BTC_JPY, SalesSide.SELL, ExecutionType.MARKET, TimeInForce.FAK,
+                           position_id=1, position_size='1')
+
+    order_id = client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS,
+                            size='1', price='99').data
+    client.change_order(order_id, price='98')
+    client.cancel_order(order_id)
+    with pytest.raises(GmoCoinException) as e:
+        client.cancel_order(order_id)
+    assert e.value.messageg.messages[0].message_code == 'ERR-5122'
@@ -0,0 +1,134 @@
+#!python3
+import json
+
+import pytest
+from requests import Response
+
+from gmocoin.common.circuit import CircuitBreaker, CircuitState
+from gmocoin.common.dto import Symbol
+from gmocoin.common.exception import GmoCoinException, CircuitOpenException
+from gmocoin.public import api
+from gmocoin.public.api import Client
+
+
+def _response(status_code: int, body: dict) -> Response:
+    res = Response()
+    res.status_code = status_code
+    res._content = json.dumps(body).encode()
+    return res
+
+
+MAINTENANCE = {'status': 5, 'messages': [{'message_code': 'ERR-5201', 'message_string': 'MAINTENANCE'}]}
+ORDERBOOKS = {'status': 0, 'data': {'asks': [], 'bids': [], 'symbol': 'BTC_JPY'},
+              'responsetime': '2021-03-01T00:00:00.000Z'}
+
+
+class _Server:
+
+    def __init__(self):
+        self.responses = []
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = _Server()
+    monkeypatch.setattr(api.requests, 'get', server.get)
+    return server
+
+
+def test_trips_on_consecutive_failures(server):
+    changes = []
+    probes = []
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60.0, probe=lambda: probes.append(1) or True,
+                             on_state_change=lambda g, old, new: changes.append((g, old, new)))
+    client = Client(circuit_breaker=breaker)
+
+    server.responses = [_response(503, {}), _response(503, {})]
+    for _ in range(2):
+        with pytest.raises(GmoCoinException):
+            client.get_orderbooks(Symbol.BTC_JPY)
+    assert breaker.state('public') is CircuitState.OPEN
+
+    # OPEN中はリクエストを送信しない
+    with pytest.raises(CircuitOpenException):
+        client.get_orderbooks(Symbol.BTC_JPY)
+    assert server.calls == 2
+
+    # 待ち時間経過後はプローブ成功でCLOSEDに戻る
+    breaker.recovery_timeout = 0.0
+    server.responses = [_response(200, ORDERBOOKS)]
+    assert client.get_orderbooks(Symbol.BTC_JPY).data.symbol is Symbol.BTC_JPY
+    assert probes == [1]
+    assert [new for _, _, new in changes] == [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED]
+
+
+def test_trips_on_maintenance(server):
+    breaker = CircuitBreaker(recovery_timeout=60.0, probe=lambda: False)
+    client = Client(circuit_breaker=breaker)
+
+    server.responses = [_response(200, MAINTENANCE)]
+    with pytest.raises(GmoCoinException):
+        client.get_orderbooks(Symbol.BTC_JPY)
+    assert breaker.state('public') is CircuitState.OPEN
+
+    with pytest.raises(CircuitOpenException):
+        client.get_ticker()
+
+    breaker.recovery_timeout = 0.0
+    with pytest.raises(CircuitOpenException):
+        client.get_ticker()
+    assert breaker.state('public') is CircuitState.OPEN
+    assert server.calls == 1
+
+
+def test_probe_request_without_result_reopens(server):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.0, probe=None)
+    client = Client(circuit_breaker=breaker)
+
+    server.responses = [_response(503, {}), _response(400, {}), _response(200, ORDERBOOKS)]
+    with pytest.raises(GmoCoinException):
+        client.get_orderbooks(Symbol.BTC_JPY)
+    # HALF_OPENの試行が4xxで終わった場合はOPENに戻し、次の試行を許可する
+    with pytest.raises(GmoCoinException):
+        client.get_orderbooks(Symbol.BTC_JPY)
+    assert breaker.state('public') is CircuitState.OPEN
+    assert client.get_orderbooks(Symbol.BTC_JPY).data.symbol is Symbol.BTC_JPY
+    assert breaker.state('public') is CircuitState.CLOSED
+
+
+def test_maintenance_opens_unused_groups(server):
+    breaker = CircuitBreaker(recovery_timeout=60.0, probe=lambda: False)
+    client = Client(circuit_breaker=breaker)
+
+    server.responses = [_response(200, MAINTENANCE)]
+    with pytest.raises(GmoCoinException):
+        client.get_orderbooks(Symbol.BTC_JPY)
+    # まだ使用していない注文系のグループもOPENになる
+    assert breaker.state('order') is CircuitState.OPEN
+    with pytest.raises(CircuitOpenException):
+        breaker.before_request('order')
+
+
+def test_default_probe_uses_client_transport():
+    class _Transport:
+        def __init__(self):
+            self.urls = []
+
+        def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+            self.urls.append((url, timeout))
+            body = {'status': 0, 'data': {'status': 'OPEN'}, 'responsetime': '2021-03-01T00:00:00.000Z'} \
+                if url.endswith('status') else ORDERBOOKS
+            return _response(200, body)
+
+    transport = _Transport()
+    breaker = CircuitBreaker(recovery_timeout=0.0, probe_timeout=3.0)
+    breaker.trip('public')
+    Client(circuit_breaker=breaker, transport=transport).get_orderbooks(Symbol.BTC_JPY)
+    assert transport.urls[0][0].endswith('status')
+    assert 0 < transport.urls[0][1] <= 3.0
+    assert breaker.state('public') is CircuitState.CLOSED
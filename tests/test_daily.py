@@ -0,0 +1,97 @@
+#!python3
+from datetime import date, timedelta
+
+from requests import Response
+
+from gmocoin.common.dto import Symbol
+from gmocoin.public.api import Client
+from gmocoin.public.daily import DailyFileIndex, daily_url
+from gmocoin.public.history import TradeHistory
+
+
+class _Server:
+
+    def __init__(self, present, head=True):
+        self.present = set(present)
+        self.head = head
+        self.requests = []
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        self.requests.append((method, url, dict(headers or {})))
+        res = Response()
+        res._content = b''
+        if method == 'HEAD' and not self.head:
+            res.status_code = 405
+        elif url not in self.present:
+            res.status_code = 404
+        elif (headers or {}).get('If-None-Match') == '"v1"':
+            res.status_code = 304
+        else:
+            res.status_code = 206 if 'Range' in (headers or {}) else 200
+            res.headers['ETag'] = '"v1"'
+            res.headers['Last-Modified'] = 'Tue, 02 Mar 2021 00:00:00 GMT'
+            res._content = b'' if method == 'HEAD' else b'\x1f\x8b' * (1 if 'Range' in (headers or {}) else 1000)
+        return res
+
+
+def _days(n):
+    return [date(2021, 1, 1) + timedelta(days=d) for d in range(n)]
+
+
+def test_scan_uses_head_and_remembers_missing(tmp_path):
+    days = _days(30)
+    present = [daily_url(Symbol.BTC, d) for d in days if d.weekday() < 5]
+    server = _Server(present)
+    client = Client(transport=server)
+    index = DailyFileIndex(str(tmp_path / 'index.json'))
+    found = [d for d in days if index.exists(daily_url(Symbol.BTC, d), d, client._request)]
+    index.save()
+
+    assert found == [d for d in days if d.weekday() < 5]
+    assert {m for m, _, _ in server.requests} == {'HEAD'}
+    assert len(server.requests) == 30
+
+    # 記録を保存したファイルから読み込んだ場合は再確認しない
+    server.requests = []
+    index = DailyFileIndex(str(tmp_path / 'index.json'))
+    assert [d for d in days if index.exists(daily_url(Symbol.BTC, d), d, client._request)] == found
+    assert server.requests == []
+
+
+def test_recent_missing_day_is_rechecked():
+    today = date.today()
+    url = daily_url(Symbol.BTC, today)
+    server = _Server([])
+    client = Client(transport=server)
+    index = DailyFileIndex()
+    assert not index.exists(url, today, client._request)
+    assert not index.is_missing(url)
+
+    server.present.add(url)
+    assert index.exists(url, today, client._request)
+    assert len(server.requests) == 2
+
+
+def test_head_not_allowed_falls_back_to_range():
+    day = date(2021, 1, 4)
+    url = daily_url(Symbol.BTC, day)
+    server = _Server([url], head=False)
+    assert DailyFileIndex().exists(url, day, Client(transport=server)._request)
+    assert server.requests[-1] == ('GET', url, {'Range': 'bytes=0-0'})
+
+
+def test_fetch_day_revalidates_with_etag(tmp_path):
+    day = date(2021, 1, 4)
+    url = daily_url(Symbol.BTC, day)
+    server = _Server([url])
+    history = TradeHistory(str(tmp_path), Client(transport=server))
+    assert history.fetch_day(Symbol.BTC, day)
+    assert history.fetch_day(Symbol.BTC, day, refresh=True)
+    assert server.requests[-1][2] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Tue, 02 Mar 2021 00:00:00 GMT'}
+
+    # 存在しないことが確定した日は取得しない
+    missing = date(2021, 1, 2)
+    assert not history.fetch_day(Symbol.BTC, missing)
+    server.requests = []
+    assert not history.fetch_day(Symbol.BTC, missing)
+    assert server.requests == []
@@ -0,0 +1,127 @@
+#!python3
+import json
+import time
+
+import pytest
+from requests import Response
+
+from gmocoin.common.deadline import deadline, current_deadline, request_timeout
+from gmocoin.common.dto import Symbol
+from gmocoin.common.exception import GmoCoinTimeoutException
+from gmocoin.public import api
+from gmocoin.public.api import Client
+
+
+def _response(body: dict) -> Response:
+    res = Response()
+    res.status_code = 200
+    res._content = json.dumps(body).encode()
+    return res
+
+
+BUSY = {'status': 4, 'messages': [{'message_code': 'ERR-5003', 'message_string': 'Requests are too many.'}]}
+ORDERBOOKS = {'status': 0, 'data': {'asks': [], 'bids': [], 'symbol': 'BTC_JPY'},
+              'responsetime': '2021-03-01T00:00:00.000Z'}
+
+
+def test_deadline_nesting():
+    assert current_deadline() is None
+    assert request_timeout() is None
+    with deadline(10.0) as outer:
+        # 外側より遅い期限は無視する
+        with deadline(60.0) as inner:
+            assert inner is outer
+        with deadline(1.0) as inner:
+            assert inner is not outer
+            assert request_timeout() <= 1.0
+        assert current_deadline() is outer
+    assert current_deadline() is None
+
+
+def test_expired_deadline():
+    with deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(GmoCoinTimeoutException):
+            request_timeout()
+
+
+def test_timeout_passed_to_requests(monkeypatch):
+    timeouts = []
+
+    def get(url, **kwargs):
+        timeouts.append(kwargs.get('timeout'))
+        return _response(ORDERBOOKS)
+
+    monkeypatch.setattr(api.requests, 'get', get)
+    Client().get_orderbooks(Symbol.BTC_JPY)
+    Client(timeout=5.0).get_orderbooks(Symbol.BTC_JPY)
+    Client().get_orderbooks(Symbol.BTC_JPY, timeout=2.0)
+    assert timeouts[0] is None
+    assert 0 < timeouts[1] <= 5.0
+    assert 0 < timeouts[2] <= 2.0
+
+
+def test_retry_bounded_by_timeout(monkeypatch):
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append(url)
+        return _response(BUSY)
+
+    monkeypatch.setattr(api.requests, 'get', get)
+    started = time.monotonic()
+    with pytest.raises(GmoCoinTimeoutException):
+        Client().get_orderbooks(Symbol.BTC_JPY, timeout=1.2)
+    # リトライ間隔0.5秒で期限内に収まる回数のみ送信する
+    assert time.monotonic() - started < 1.2
+    assert 1 <= len(calls) <= 3
+
+
+def test_historical_data_bounded_by_timeout():
+    class _Archive:
+        def __init__(self):
+            self.timeouts = []
+
+        def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+            self.timeouts.append(timeout)
+            time.sleep(0.05)
+            res = Response()
+            res.status_code = 404
+            res._content = b''
+            return res
+
+    archive = _Archive()
+    with pytest.raises(GmoCoinTimeoutException):
+        Client(transport=archive).get_historical_data(Symbol.BTC, 10, timeout=0.12)
+    assert all(0 < t <= 0.12 for t in archive.timeouts)
+    assert len(archive.timeouts) < 10
+
+    archive.timeouts = []
+    with pytest.raises(ValueError):
+        # 存在するファイルが無い場合はpd.concatがValueErrorを送出する
+        Client(timeout=5.0, transport=archive).get_historical_data(Symbol.BTC, 1)
+    assert 0 < archive.timeouts[0] <= 5.0
+
+
+def test_streamed_download_bounded_by_deadline(monkeypatch):
+    class _Raw:
+        def read(self, size=-1):
+            time.sleep(0.03)
+            return b'x' * 10
+
+        def close(self):
+            pass
+
+    def get(url, stream=False, timeout=None):
+        res = Response()
+        res.status_code = 200
+        res.raw = _Raw()
+        return res
+
+    monkeypatch.setattr(api.requests, 'get', get)
+    # ソケットの読込みごとのタイムアウトではなく、読み込み全体に期限を適用する
+    with deadline(0.1):
+        f = Client()._open('https://api.coin.z.com/data/trades/BTC/2021/03/20210301_BTC.csv.gz')
+        with pytest.raises(GmoCoinTimeoutException):
+            for _ in range(20):
+                f.read(10)
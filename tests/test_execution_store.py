@@ -0,0 +1,90 @@
+#!python3
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from pytz import utc
+
+from gmocoin.common.dto import Symbol, SalesSide, SettleType
+from gmocoin.private.dto import LatestExecution, GetLatestExecutionsData, GetLatestExecutionsRes
+from gmocoin.private.execution_store import ExecutionSyncStore
+
+
+BASE_TIME = datetime(2021, 3, 1, 0, 0, tzinfo=utc)
+
+
+def _execution(execution_id: int, order_id: int) -> LatestExecution:
+    return LatestExecution(execution_id=execution_id, order_id=order_id, symbol=Symbol.BTC_JPY,
+                           side=SalesSide.BUY, settle_type=SettleType.OPEN, size=Decimal('0.01'),
+                           price=Decimal('5000000'), loss_gain=Decimal('0'), fee=Decimal('-1'),
+                           timestamp=BASE_TIME + timedelta(minutes=execution_id))
+
+
+class _StubClient:
+    """
+    約定ID降順でページングするget_latest_executionsのスタブです。
+    """
+
+    def __init__(self, executions):
+        self.executions = sorted(executions, key=lambda e: -e.execution_id)
+        self.pages = []
+
+    def get_latest_executions(self, symbol, page=1, count=100):
+        self.pages.append(page)
+        items = self.executions[(page - 1) * count:page * count]
+        return GetLatestExecutionsRes(status=0, responsetime=BASE_TIME,
+                                      data=GetLatestExecutionsData(latest_executions=items or None))
+
+
+def test_sync_fetches_only_new_executions(tmp_path):
+    path = str(tmp_path / 'executions.db')
+    store = ExecutionSyncStore(path)
+    client = _StubClient([_execution(i, 100 + i // 3) for i in range(1, 8)])
+
+    new = store.sync(client, Symbol.BTC_JPY, count=3)['executions']
+    assert [e.execution_id for e in new] == list(range(1, 8))
+    assert client.pages == [1, 2, 3]
+    assert store.last_execution_id(Symbol.BTC_JPY) == 7
+    store.close()
+
+    # 永続化された最大約定ID以降のみ取得する
+    store = ExecutionSyncStore(path)
+    client = _StubClient([_execution(i, 100 + i // 3) for i in range(1, 10)])
+    result = store.sync(client, Symbol.BTC_JPY, count=3)
+    assert [e.execution_id for e in result['executions']] == [8, 9]
+    assert result['gap'] is None
+    assert client.pages == [1]
+
+    assert store.sync(client, Symbol.BTC_JPY, count=3) == {'executions': [], 'gap': None}
+    store.close()
+
+
+def test_sync_reports_gap():
+    store = ExecutionSyncStore(':memory:')
+    store.sync(_StubClient([_execution(i, 100) for i in range(1, 4)]), Symbol.BTC_JPY, count=3)
+
+    # 取得できる期間を過ぎて前回の約定IDまで遡れない場合は、隙間を返す
+    client = _StubClient([_execution(i, 100) for i in range(10, 15)])
+    result = store.sync(client, Symbol.BTC_JPY, count=3)
+    assert [e.execution_id for e in result['executions']] == [10, 11, 12, 13, 14]
+    assert result['gap'] == (BASE_TIME + timedelta(minutes=3), BASE_TIME + timedelta(minutes=10))
+    assert client.pages == [1, 2]
+    store.close()
+
+
+def test_queries():
+    store = ExecutionSyncStore(':memory:')
+    executions = [_execution(i, 100 + i // 3) for i in range(1, 8)]
+    assert len(store.add(Symbol.BTC_JPY, executions)) == 7
+    assert store.add(Symbol.BTC_JPY, executions[:2]) == []
+
+    by_order = store.get_by_order_id(101)
+    assert [e.execution_id for e in by_order] == [3, 4, 5]
+    assert by_order[0].price == Decimal('5000000')
+    assert by_order[0].side is SalesSide.BUY
+    assert by_order[0].timestamp == BASE_TIME + timedelta(minutes=3)
+
+    in_range = store.get_by_time_range(Symbol.BTC_JPY, BASE_TIME + timedelta(minutes=2),
+                                       BASE_TIME + timedelta(minutes=5))
+    assert [e.execution_id for e in in_range] == [2, 3, 4]
+    assert store.get_by_time_range(Symbol.ETH_JPY, BASE_TIME, BASE_TIME + timedelta(days=1)) == []
+    store.close()
@@ -0,0 +1,54 @@
+#!python3
+import itertools
+import time
+
+from gmocoin.common.ratelimit import RateLimiter
+from gmocoin.public.hedge import HedgePolicy
+
+
+def test_fast_response_is_not_hedged():
+    policy = HedgePolicy(initial_delay=0.5)
+    try:
+        assert policy.get(lambda: 'first') == 'first'
+        assert policy.stats.requests == 1
+        assert policy.stats.hedged == 0
+    finally:
+        policy.close()
+
+
+def test_slow_response_is_hedged():
+    delays = itertools.chain([0.5], itertools.repeat(0.0))
+    counter = itertools.count()
+
+    def send():
+        n = next(counter)
+        time.sleep(next(delays))
+        return n
+
+    limiter = RateLimiter(rate=100, burst=10)
+    policy = HedgePolicy(initial_delay=0.05)
+    try:
+        started = time.monotonic()
+        assert policy.get(send, limiter) == 1
+        assert time.monotonic() - started < 0.4
+        assert policy.stats.hedged == 1
+        assert policy.stats.hedge_wins == 1
+        assert policy.stats.win_rate == 1.0
+        # ヘッジリクエスト分のトークンを消費している
+        assert limiter.try_acquire(10) > 0
+    finally:
+        policy.close()
+
+
+def test_delay_uses_percentile():
+    policy = HedgePolicy(percentile=90, min_samples=10, min_delay=0.0, max_delay=10.0)
+    try:
+        for latency in range(1, 11):
+            policy._record(latency / 10)
+        assert policy.delay() == 0.9
+        policy.percentile = 50
+        assert policy.delay() == 0.5
+        policy.percentile = 100
+        assert policy.delay() == 1.0
+    finally:
+        policy.close()
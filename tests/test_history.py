@@ -0,0 +1,157 @@
+#!python3
+import gzip
+import json
+import os
+from datetime import date
+
+import pandas as pd
+from requests import Response
+
+from gmocoin.common.dto import Symbol
+from gmocoin.public.api import Client
+from gmocoin.public.history import TradeHistory, daily_url, read_trades
+from gmocoin.public.range_index import TimeRangeIndex
+
+
+RESPONSE_TIME = '2021-03-03T00:00:00.000Z'
+
+
+def _daily(rows):
+    lines = ['symbol,side,size,price,timestamp'] + [f'BTC,{s},{z},{p},{t}' for s, z, p, t in rows]
+    return gzip.compress('\n'.join(lines).encode())
+
+
+class _Archive:
+
+    def __init__(self):
+        self.files = {
+            daily_url(Symbol.BTC, date(2021, 3, 1)): _daily([('BUY', '0.1', '100', '2021-03-01 00:00:00.000'),
+                                                             ('SELL', '0.1', '101', '2021-03-01 23:59:59.000'),
+                                                             ('SELL', '0.1', '101', '2021-03-01 23:59:59.000')]),
+        }
+        # 新しい順
+        self.trades = [('BUY', '0.2', '104', '2021-03-02T12:00:00.000Z'),
+                       ('BUY', '0.2', '103', '2021-03-02T00:00:00.000Z'),
+                       ('SELL', '0.1', '101', '2021-03-01T23:59:59.000Z'),
+                       ('SELL', '0.1', '101', '2021-03-01T23:59:59.000Z'),
+                       ('SELL', '0.1', '101', '2021-03-01T23:59:59.000Z'),
+                       ('BUY', '0.1', '102', '2021-03-01T23:00:00.000Z')]
+        self.urls = []
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        self.urls.append(url)
+        res = Response()
+        if 'public/v1/trades' in url:
+            query = dict(q.split('=') for q in url.split('?')[1].split('&'))
+            page, count = int(query['page']), int(query['count'])
+            items = self.trades[(page - 1) * count:page * count]
+            data = {'pagination': {'currentPage': page, 'count': len(items)},
+                    'list': [{'price': p, 'side': s, 'size': z, 'timestamp': t} for s, z, p, t in items]}
+            res.status_code = 200
+            res._content = json.dumps({'status': 0, 'data': data, 'responsetime': RESPONSE_TIME}).encode()
+        elif url in self.files:
+            res.status_code = 200
+            res._content = self.files[url]
+        else:
+            res.status_code = 404
+            res._content = b''
+        return res
+
+
+def test_backfill_stitches_daily_and_recent(tmp_path):
+    archive = _Archive()
+    history = TradeHistory(str(tmp_path), Client(transport=archive), page_size=2)
+    stats = history.backfill(Symbol.BTC, date(2021, 3, 1), until=date(2021, 3, 3))
+    assert stats['downloaded'] == 1
+    assert stats['missing'] == [date(2021, 3, 2)]
+    assert stats['gap'] is None
+    # 同時刻の3件のうち2件は日次ファイルに含まれる
+    assert stats['recent'] == 3
+
+    df = history.load(Symbol.BTC)
+    assert df['price'].tolist() == [100, 101, 101, 101, 103, 104]
+    assert df['timestamp'].is_monotonic_increasing
+
+    # 取得済みの日次ファイルと約定は再取得しない
+    archive.urls = []
+    archive.trades.insert(0, ('SELL', '0.3', '105', '2021-03-02T13:00:00.000Z'))
+    stats = history.backfill(Symbol.BTC, date(2021, 3, 1), until=date(2021, 3, 2))
+    assert stats['downloaded'] == 0
+    assert stats['recent'] == 1
+    assert all('data/trades' not in url for url in archive.urls)
+    assert history.load(Symbol.BTC)['price'].tolist()[-2:] == [104, 105]
+    assert len(history.load(Symbol.BTC, end=date(2021, 3, 2))) == 3
+
+
+def test_backfill_reports_gap(tmp_path):
+    archive = _Archive()
+    archive.trades = archive.trades[:2]
+    history = TradeHistory(str(tmp_path), Client(transport=archive), page_size=2)
+    stats = history.backfill(Symbol.BTC, date(2021, 3, 1), until=date(2021, 3, 2))
+    assert stats['gap'] == (pd.Timestamp('2021-03-01 23:59:59', tz='UTC'), pd.Timestamp('2021-03-02', tz='UTC'))
+
+
+def test_read_trades_schema(tmp_path):
+    path = tmp_path / 'day.csv.gz'
+    path.write_bytes(_daily([('SELL', '0.1', '101', '2021-03-01 00:00:01.500'),
+                             ('BUY', '0.2', '100', '2021-03-01 00:00:00.000')]))
+    for source in (str(path), open(path, 'rb')):
+        df = read_trades(source, engine='c')
+        assert str(df['symbol'].dtype) == 'category'
+        assert df['side'].cat.categories.tolist() == ['BUY', 'SELL']
+        assert df['price'].dtype == 'float64'
+        assert str(df['timestamp'].dtype) == 'datetime64[ns, UTC]'
+        assert df['price'].tolist() == [100, 101]
+
+
+def test_get_historical_data_streams_typed_frames():
+    archive = _Archive()
+    archive.files[daily_url(Symbol.BTC, date(2021, 3, 2))] = _daily([('BUY', '0.5', '103', '2021-03-02 00:00:00.000')])
+    df = Client(transport=archive).get_historical_data(Symbol.BTC, 3, base_date=date(2021, 3, 3))
+    assert len(df) == 4
+    assert str(df['side'].dtype) == 'category'
+    assert [m for m in archive.urls if 'data/trades' in m].count(daily_url(Symbol.BTC, date(2021, 2, 28))) == 1
+
+
+def _write_days(history, days, rows_per_day):
+    for d in range(days):
+        day = date(2021, 3, 1 + d)
+        rows = [('BUY' if i % 2 else 'SELL', '0.1', str(100 + i), f'{day} {i * 86400 // rows_per_day // 3600:02}:'
+                 f'{i * 86400 // rows_per_day // 60 % 60:02}:{i * 86400 // rows_per_day % 60:02}.000')
+                for i in range(rows_per_day)]
+        path = history.daily_path(Symbol.BTC, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(_daily(rows))
+
+
+def test_query_reads_only_matching_chunks(tmp_path):
+    history = TradeHistory(str(tmp_path), Client(transport=_Archive()),
+                           range_index=TimeRangeIndex(str(tmp_path / 'range_index.json'), chunk_rows=100))
+    _write_days(history, 3, 1440)
+    windows = [(pd.Timestamp(f'2021-03-0{d} 10:00', tz='UTC'), pd.Timestamp(f'2021-03-0{d} 10:05', tz='UTC'))
+               for d in (1, 2, 3)]
+
+    df = history.query(Symbol.BTC, windows)
+    full = history.load(Symbol.BTC)
+    mask = False
+    for start, end in windows:
+        mask |= (full['timestamp'] >= start) & (full['timestamp'] < end)
+    pd.testing.assert_frame_equal(df, full[mask].reset_index(drop=True))
+    assert len(df) == 15
+
+    # 保存した索引を再利用し、ファイルを解析し直さない
+    index = TimeRangeIndex(str(tmp_path / 'range_index.json'), chunk_rows=100)
+    index._scan = None
+    history.range_index = index
+    assert len(history.query(Symbol.BTC, windows[:1])) == 5
+    assert len(history.query(Symbol.BTC, [(pd.Timestamp('2021-04-01', tz='UTC'),
+                                           pd.Timestamp('2021-04-02', tz='UTC'))])) == 0
+
+
+def test_query_includes_recent_trades(tmp_path):
+    history = TradeHistory(str(tmp_path), Client(transport=_Archive()), page_size=2)
+    history.backfill(Symbol.BTC, date(2021, 3, 1), until=date(2021, 3, 2))
+    df = history.query(Symbol.BTC, [(pd.Timestamp('2021-03-01 23:00', tz='UTC'),
+                                     pd.Timestamp('2021-03-02 06:00', tz='UTC'))])
+    assert df['price'].tolist() == [101, 101, 101, 103]
@@ -0,0 +1,33 @@
+#!python3
+import subprocess
+import sys
+
+import pytest
+
+
+# 起動時にimportしないモジュール
+HEAVY_MODULES = ('pandas', 'numpy')
+
+
+def _importtime(module: str) -> dict:
+    """
+    python -X importtimeでモジュールをimportし、{モジュール名: 累積時間(us)}を返します。
+    """
+    ret = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                         capture_output=True, text=True, check=True)
+    times = {}
+    for line in ret.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize('module', ['gmocoin.public.api', 'gmocoin.private.api'])
+def test_heavy_modules_are_lazy(module):
+    times = _importtime(module)
+    assert module in times
+    loaded = [m for m in times if m.split('.')[0] in HEAVY_MODULES]
+    assert loaded == []
+    print(f'{module}: {times[module] / 1000:.1f}ms')
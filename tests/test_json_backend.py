@@ -0,0 +1,37 @@
+#!python3
+import json
+
+import pytest
+from requests import Response
+
+from gmocoin.common import json_backend
+
+
+@pytest.fixture(params=json_backend.available_backends())
+def backend(request):
+    yield json_backend.set_backend(request.param)
+    json_backend.set_backend()
+
+
+def test_roundtrip(backend):
+    body = {'symbol': 'BTC_JPY', 'side': 'BUY', 'size': '0.01', 'price': '5000000'}
+    encoded = json_backend.dumps(body)
+
+    assert type(encoded) is str
+    assert json.loads(encoded) == body
+    assert json_backend.loads(encoded.encode('utf-8')) == body
+
+
+def test_response_json_decodes_once(backend):
+    res = Response()
+    res.status_code = 200
+    res._content = b'{"status":0,"data":{"status":"OPEN"},"responsetime":"2021-03-01T12:34:56.789Z"}'
+
+    first = json_backend.response_json(res)
+    assert first['data']['status'] == 'OPEN'
+    assert json_backend.response_json(res) is first
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        json_backend.set_backend('unknown')
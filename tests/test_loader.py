@@ -0,0 +1,53 @@
+#!python3
+import gzip
+from datetime import date, timedelta
+
+from requests import Response
+
+from gmocoin.common.dto import Symbol
+from gmocoin.public.api import Client
+from gmocoin.public.daily import daily_url
+from gmocoin.public.loader import HistoryLoader
+
+
+def _daily(symbol, day, rows):
+    lines = ['symbol,side,size,price,timestamp'] + \
+        [f'{symbol.value},BUY,0.1,{100 + i},{day} 00:00:{i:02}.000' for i in range(rows)]
+    return gzip.compress('\n'.join(lines).encode())
+
+
+class _Archive:
+
+    def __init__(self, symbols, days):
+        start = date(2021, 3, 1)
+        self.files = {daily_url(s, start + timedelta(days=d)): _daily(s, start + timedelta(days=d), 10 + d)
+                      for s in symbols for d in range(days) if d != 2}
+        self.gets = 0
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        self.gets += 1
+        res = Response()
+        res.status_code = 200 if url in self.files else 404
+        res._content = self.files.get(url, b'')
+        return res
+
+
+def test_load_many_symbols_in_processes(tmp_path):
+    symbols = [Symbol.BTC, Symbol.ETH, Symbol.XRP_JPY]
+    archive = _Archive(symbols, 5)
+    loader = HistoryLoader(str(tmp_path), Client(transport=archive), max_workers=2)
+    frames = loader.load(symbols, date(2021, 3, 1), date(2021, 3, 6))
+
+    assert list(frames) == symbols
+    for symbol in symbols:
+        df = frames[symbol]
+        assert len(df) == 10 + 11 + 13 + 14
+        assert df['symbol'].unique().tolist() == [symbol.value]
+        assert df['timestamp'].is_monotonic_increasing
+
+    # 保存済みのファイルはダウンロードせず、1プロセスで読み込んでも同じ結果となる
+    archive.gets = 0
+    sequential = HistoryLoader(str(tmp_path), Client(transport=archive), max_workers=1)
+    for symbol, df in sequential.load(symbols, date(2021, 3, 1), date(2021, 3, 6), download=False).items():
+        assert df.equals(frames[symbol])
+    assert archive.gets == 0
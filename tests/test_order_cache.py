@@ -0,0 +1,158 @@
+#!python3
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from pytz import utc
+from requests import Response
+
+from gmocoin.common.dto import Symbol, SalesSide, OrderType, ExecutionType, SettleType, OrderStatus, TimeInForce
+from gmocoin.private import api
+from gmocoin.private.api import Client
+from gmocoin.private.dto import ActiveOrder, LatestExecution, GetActiveOrdersData, GetActiveOrdersRes
+from gmocoin.private.order_cache import OrderCache
+
+
+def _response(data=None) -> Response:
+    body = {'status': 0, 'responsetime': '2021-03-01T00:00:00.000Z'}
+    if data is not None:
+        body['data'] = data
+    res = Response()
+    res.status_code = 200
+    res._content = json.dumps(body).encode()
+    return res
+
+
+@pytest.fixture
+def client(monkeypatch):
+    order_ids = iter(range(1001, 2000))
+
+    def post(url, headers=None, data=None, **kwargs):
+        if url.endswith('/v1/order') or url.endswith('/v1/closeBulkOrder'):
+            return _response(next(order_ids))
+        return _response()
+
+    monkeypatch.setattr(api.requests, 'post', post)
+    return Client(api_key='key', secret_key='secret', order_cache=OrderCache())
+
+
+def _execution(execution_id: int, order_id: int, size: str, timestamp: datetime = None) -> LatestExecution:
+    return LatestExecution(execution_id=execution_id, order_id=order_id, symbol=Symbol.BTC_JPY,
+                           side=SalesSide.BUY, settle_type=SettleType.OPEN, size=Decimal(size),
+                           price=Decimal('5000000'), loss_gain=Decimal(0), fee=Decimal(0),
+                           timestamp=timestamp or datetime.now(utc))
+
+
+def test_order_change_cancel(client):
+    cache = client.order_cache
+    order_id = client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS,
+                            size='0.02', price='5000000').data
+    other_id = client.order(Symbol.BTC_JPY, SalesSide.SELL, ExecutionType.LIMIT, TimeInForce.FAS,
+                            size='0.01', price='5100000').data
+
+    assert cache.is_active(order_id)
+    assert cache.get(order_id).price == Decimal('5000000')
+    assert cache.get_by_root_order_id(order_id)[0].order_id == order_id
+    assert cache.open_exposure(Symbol.BTC_JPY) == {SalesSide.BUY: Decimal('0.02'), SalesSide.SELL: Decimal('0.01')}
+
+    client.change_order(order_id, price='4990000')
+    assert cache.get(order_id).price == Decimal('4990000')
+
+    client.cancel_order(other_id)
+    assert cache.get(other_id).status is OrderStatus.CANCELLING
+    cache.reconcile(_StubClient([cache.get(order_id)]), Symbol.BTC_JPY)
+    assert not cache.is_active(other_id)
+    assert cache.get(other_id).status is OrderStatus.CANCELED
+    assert [o.order_id for o in cache.get_active_orders(Symbol.BTC_JPY)] == [order_id]
+
+    cache.apply_executions([_execution(1, order_id, '0.01')])
+    cache.apply_executions([_execution(1, order_id, '0.01')])
+    assert cache.open_exposure(Symbol.BTC_JPY)[SalesSide.BUY] == Decimal('0.01')
+
+    cache.apply_executions([_execution(2, order_id, '0.01')])
+    assert cache.get(order_id).status is OrderStatus.EXECUTED
+    assert cache.get_active_orders(Symbol.BTC_JPY) == []
+
+
+class _StubClient:
+
+    def __init__(self, orders, responsetime=None, on_fetch=None):
+        self.orders = orders
+        self.responsetime = responsetime
+        self.on_fetch = on_fetch
+
+    def get_active_orders(self, symbol, page=1, count=100):
+        if self.on_fetch is not None:
+            self.on_fetch()
+        items = self.orders[(page - 1) * count:page * count]
+        return GetActiveOrdersRes(status=0, responsetime=self.responsetime or datetime.now(utc),
+                                  data=GetActiveOrdersData(active_orders=items or None))
+
+
+def _active_order(order_id: int) -> ActiveOrder:
+    return ActiveOrder(root_order_id=order_id, order_id=order_id, symbol=Symbol.ETH_JPY, side=SalesSide.SELL,
+                       order_type=OrderType.NORMAL, execution_type=ExecutionType.LIMIT,
+                       settle_type=SettleType.OPEN, size=Decimal('1'), executed_size=Decimal('0.25'),
+                       price=Decimal('200000'), losscut_price=Decimal(0), status=OrderStatus.ORDERED,
+                       time_in_force=TimeInForce.FAS, timestamp=datetime.now(utc))
+
+
+def test_reconcile():
+    cache = OrderCache(reconcile_interval=3600)
+    cache.on_order(type('Res', (), {'data': 1}), Symbol.ETH_JPY, SalesSide.BUY, ExecutionType.LIMIT,
+                   TimeInForce.FAS, size='1', price='190000')
+    client = _StubClient([_active_order(i) for i in range(10, 15)])
+
+    assert cache.maybe_reconcile(client, [Symbol.ETH_JPY]) == [Symbol.ETH_JPY]
+    assert not cache.is_active(1)
+    assert [o.order_id for o in cache.get_active_orders(Symbol.ETH_JPY)] == [10, 11, 12, 13, 14]
+    assert cache.open_exposure(Symbol.ETH_JPY)[SalesSide.SELL] == Decimal('3.75')
+
+    assert cache.maybe_reconcile(client, [Symbol.ETH_JPY]) == []
+
+
+def test_reconcile_does_not_double_count_executions():
+    cache = OrderCache()
+    responsetime = datetime(2021, 3, 1, 0, 0, 10, tzinfo=utc)
+    cache.reconcile(_StubClient([_active_order(10)], responsetime=responsetime), Symbol.ETH_JPY)
+
+    # 取得時点の約定数量(0.25)に含まれる約定は反映しない
+    cache.apply_executions([_execution(1, 10, '0.25', datetime(2021, 3, 1, 0, 0, 5, tzinfo=utc)),
+                            _execution(2, 10, '0.5', datetime(2021, 3, 1, 0, 0, 20, tzinfo=utc))])
+    assert cache.get(10).executed_size == Decimal('0.75')
+    assert cache.is_active(10)
+
+
+def test_reconcile_keeps_orders_placed_during_fetch():
+    cache = OrderCache()
+    placed = lambda: cache.on_order(type('Res', (), {'data': 1}), Symbol.ETH_JPY, SalesSide.BUY,
+                                    ExecutionType.LIMIT, TimeInForce.FAS, size='1', price='190000')
+    cache.reconcile(_StubClient([_active_order(10)], on_fetch=placed), Symbol.ETH_JPY)
+    assert cache.is_active(1)
+    assert [o.order_id for o in cache.get_active_orders(Symbol.ETH_JPY)] == [1, 10]
+
+    # 次回の取得結果にも無い場合は取消とみなす
+    cache.reconcile(_StubClient([_active_order(10)]), Symbol.ETH_JPY)
+    assert cache.get(1).status is OrderStatus.CANCELED
+
+
+def test_executions_after_cancel_request(client):
+    cache = client.order_cache
+    order_id = client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS,
+                            size='0.02', price='5000000').data
+    client.cancel_order(order_id)
+    # 取消が反映される前の約定も反映する
+    assert cache.is_active(order_id)
+    cache.apply_executions([_execution(1, order_id, '0.02')])
+    assert cache.get(order_id).executed_size == Decimal('0.02')
+    assert cache.get(order_id).status is OrderStatus.EXECUTED
+
+    # 一部約定後に取消が確定した注文はreconcileでCANCELEDにする
+    other_id = client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS,
+                            size='0.02', price='5000000').data
+    client.cancel_order(other_id)
+    cache.apply_executions([_execution(2, other_id, '0.01')])
+    cache.reconcile(_StubClient([]), Symbol.BTC_JPY)
+    assert cache.get(other_id).executed_size == Decimal('0.01')
+    assert cache.get(other_id).status is OrderStatus.CANCELED
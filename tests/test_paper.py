@@ -0,0 +1,104 @@
+#!python3
+import json
+from decimal import Decimal
+
+import pytest
+from requests import Response
+
+from gmocoin.common.dto import Symbol, AssetSymbol, SalesSide, ExecutionType, OrderStatus, TimeInForce
+from gmocoin.common.exception import GmoCoinException
+from gmocoin.private.paper import PaperClient
+from gmocoin.public.api import Client
+
+
+RESPONSE_TIME = '2021-03-01T00:00:00.000Z'
+
+
+class _Market:
+
+    def __init__(self):
+        self.asks = [('101', '0.5'), ('102', '1')]
+        self.bids = [('100', '0.5'), ('99', '1')]
+        self.trades = []
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        if 'orderbooks' in url:
+            data = {'asks': [{'price': p, 'size': s} for p, s in self.asks],
+                    'bids': [{'price': p, 'size': s} for p, s in self.bids], 'symbol': 'BTC'}
+        else:
+            data = {'pagination': {'currentPage': 1, 'count': len(self.trades)},
+                    'list': [{'price': p, 'side': 'SELL', 'size': '0.1', 'timestamp': t}
+                             for p, t in reversed(self.trades)]}
+        res = Response()
+        res.status_code = 200
+        res._content = json.dumps({'status': 0, 'data': data, 'responsetime': RESPONSE_TIME}).encode()
+        return res
+
+
+@pytest.fixture
+def market():
+    return _Market()
+
+
+def test_market_order_walks_book(market):
+    client = PaperClient(Client(transport=market), jpy='1000')
+    order_id = client.order(Symbol.BTC, SalesSide.BUY, ExecutionType.MARKET, TimeInForce.FAK, size='1').data
+    execution = client.get_latest_executions(Symbol.BTC).data.latest_executions[0]
+    assert execution.order_id == order_id
+    assert execution.price == Decimal('101.5')
+    assets = {a.symbol: a.amount for a in client.get_assets().data}
+    assert assets[AssetSymbol.JPY] == Decimal('898.5')
+    assert assets[AssetSymbol.BTC] == 1
+
+    with pytest.raises(GmoCoinException) as e:
+        client.order(Symbol.BTC, SalesSide.SELL, ExecutionType.LIMIT, TimeInForce.FAS, size='2', price='100')
+    assert e.value.messageg.messages[0].message_code == 'ERR-208'
+
+
+def test_resting_limit_fills_on_trades(market):
+    client = PaperClient(Client(transport=market))
+    order_id = client.order(Symbol.BTC, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS,
+                            size='0.1', price='98').data
+    assert client.get_active_orders(Symbol.BTC).data.active_orders[0].order_id == order_id
+
+    market.trades = [('99', '2021-03-01T00:00:01.000Z')]
+    assert client.poll() == []
+    market.trades.append(('97', '2021-03-01T00:00:02.000Z'))
+    executions = client.poll()
+    assert [(e.order_id, e.price) for e in executions] == [(order_id, Decimal(98))]
+    # 取得済みの約定履歴は再度判定しない
+    assert client.poll([Symbol.BTC]) == []
+
+
+def test_trades_before_order_do_not_fill(market):
+    client = PaperClient(Client(transport=market), assets={AssetSymbol.BTC: '1'})
+    # 発注前の約定は注文の価格を超えていても判定しない
+    market.trades = [('95', '2021-03-01T00:00:01.000Z'), ('96', '2021-03-01T00:00:02.000Z')]
+    order_id = client.order(Symbol.BTC, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS,
+                            size='0.1', price='98').data
+    stop_id = client.order(Symbol.BTC, SalesSide.SELL, ExecutionType.STOP, TimeInForce.FAK,
+                           size='0.1', price='97').data
+    assert client.poll() == []
+    assert {o.order_id for o in client.get_active_orders(Symbol.BTC).data.active_orders} == {order_id, stop_id}
+
+    market.trades.append(('97', '2021-03-01T00:00:03.000Z'))
+    assert {e.order_id for e in client.poll()} == {order_id, stop_id}
+
+
+def test_leverage_margin(market):
+    client = PaperClient(Client(transport=market), jpy='100', leverage=2)
+    with pytest.raises(GmoCoinException) as e:
+        client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.MARKET, TimeInForce.FAK, size='3')
+    assert e.value.messageg.messages[0].message_code == 'ERR-201'
+
+    client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.MARKET, TimeInForce.FAK, size='0.5')
+    margin = client.get_margin().data
+    assert margin.margin == Decimal('25.25')
+    position_id = client.open_positions(Symbol.BTC_JPY)[0].position_id
+    sok = client.close_order(Symbol.BTC_JPY, SalesSide.SELL, ExecutionType.LIMIT, TimeInForce.SOK,
+                             position_id=position_id, position_size='0.5', price='100').data
+    assert client._orders[sok].status == OrderStatus.CANCELED
+    client.close_order(Symbol.BTC_JPY, SalesSide.SELL, ExecutionType.MARKET, TimeInForce.FAK,
+                       position_id=position_id, position_size='0.5')
+    assert client.open_positions(Symbol.BTC_JPY) == []
+    assert client.get_margin().data.actual_profit_loss == Decimal('99.5')
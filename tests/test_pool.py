@@ -0,0 +1,120 @@
+#!python3
+import json
+import threading
+from decimal import Decimal
+
+import pytest
+from requests import Response
+
+from gmocoin.common.deadline import deadline
+from gmocoin.common.dto import Symbol, AssetSymbol, SalesSide, MarginCallStatus
+from gmocoin.common.exception import GmoCoinException
+from gmocoin.private.pool import ClientPool
+
+
+RESPONSE_TIME = '2021-03-01T00:00:00.000Z'
+
+ACCOUNTS = {
+    'key-a': {'jpy': '1000', 'margin': '100', 'status': 'NORMAL', 'position': ('5000000', '0.1')},
+    'key-b': {'jpy': '3000', 'margin': '300', 'status': 'MARGIN_CALL', 'position': ('5100000', '0.3')},
+}
+
+
+class _Server:
+
+    def __init__(self):
+        self.keys = []
+        self.timeouts = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        key = headers['API-KEY']
+        with self.lock:
+            self.keys.append(key)
+            self.timeouts.append(timeout)
+        if key == 'broken':
+            res = Response()
+            res.status_code = 503
+            res._content = b'{}'
+            return res
+        account = ACCOUNTS[key]
+        if url.endswith('/assets'):
+            data = [{'amount': account['jpy'], 'available': account['jpy'], 'conversionRate': '1', 'symbol': 'JPY'}]
+        elif url.endswith('/margin'):
+            data = {'actualProfitLoss': account['jpy'], 'availableAmount': account['jpy'],
+                    'margin': account['margin'], 'marginCallStatus': account['status'],
+                    'marginRatio': '0', 'profitLoss': '0'}
+        else:
+            price, size = account['position']
+            data = {'list': [{'averagePositionRate': price, 'positionLossGain': '10', 'side': 'BUY',
+                              'sumOrderQuantity': '0', 'sumPositionQuantity': size, 'symbol': 'BTC_JPY'}]}
+        res = Response()
+        res.status_code = 200
+        res._content = json.dumps({'status': 0, 'data': data, 'responsetime': RESPONSE_TIME}).encode()
+        return res
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool():
+    server = _Server()
+    pool = ClientPool({'a': ('key-a', 'secret'), 'b': ('key-b', 'secret')}, transport=server)
+    yield pool
+    pool.close()
+
+
+def test_routes_and_aggregates(pool):
+    assert pool['a']._api_key == 'key-a'
+    assert pool['a']._rate_limiter is not pool['b']._rate_limiter
+    assert pool['a'].transport is pool['b'].transport
+
+    assets = pool.get_assets()
+    assert set(assets) == {'a', 'b'}
+    assert pool.total_assets() == {AssetSymbol.JPY: Decimal(4000)}
+
+    margin = pool.total_margin()
+    assert margin.margin == 400
+    assert margin.margin_ratio == 1000
+    assert margin.margin_call_status == MarginCallStatus.MARGIN_CALL
+
+    summary, = pool.total_position_summary(Symbol.BTC_JPY)
+    assert summary.side == SalesSide.BUY
+    assert summary.sum_position_quantity == Decimal('0.4')
+    assert summary.average_position_rate == Decimal('5075000')
+    assert summary.position_loss_gain == 20
+
+    assert set(pool.get_margin(accounts=['b'])) == {'b'}
+
+
+def test_fan_out_errors():
+    pool = ClientPool({'a': ('key-a', 'secret'), 'x': ('broken', 'secret')}, transport=_Server())
+    with pytest.raises(GmoCoinException):
+        pool.get_assets()
+    results = pool.fan_out('get_assets', return_exceptions=True)
+    assert isinstance(results['x'], GmoCoinException)
+    assert results['a'].data[0].amount == 1000
+    pool.close()
+
+
+def test_fan_out_keeps_deadline(pool):
+    with deadline(3.0):
+        pool.get_assets()
+    # 呼び出し元の期限がワーカースレッドにも適用される
+    assert len(pool.transport.timeouts) == 2
+    assert all(t is not None and 0 < t <= 3.0 for t in pool.transport.timeouts)
+
+
+def test_close_keeps_shared_transport():
+    server = _Server()
+    ClientPool({'a': ('key-a', 'secret')}, transport=server).close()
+    # 呼び出し元が指定したトランスポートは閉じない
+    assert not server.closed
+
+    pool = ClientPool({'a': ('key-a', 'secret')})
+    closed = []
+    pool.transport.close = lambda: closed.append(1)
+    pool.close()
+    assert closed == [1]
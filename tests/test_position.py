@@ -0,0 +1,101 @@
+#!python3
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from pytz import utc
+
+from gmocoin.common.dto import Symbol, SalesSide, SettleType
+from gmocoin.public.dto import GetTickerData
+from gmocoin.private.dto import LatestExecution, PositionSummary, GetPositionSummaryData, GetPositionSummaryRes
+from gmocoin.private.position import PositionTracker
+
+
+def _execution(execution_id, symbol, side, settle_type, size, price, loss_gain='0', fee='0', timestamp=None):
+    return LatestExecution(execution_id=execution_id, order_id=execution_id, symbol=symbol, side=side,
+                           settle_type=settle_type, size=Decimal(size), price=Decimal(price),
+                           loss_gain=Decimal(loss_gain), fee=Decimal(fee), timestamp=timestamp or datetime.now(utc))
+
+
+def _ticker(symbol, bid, ask):
+    return GetTickerData(symbol=symbol, timestamp=datetime.now(utc), volume=Decimal(0), ask=Decimal(ask),
+                         bid=Decimal(bid), high=Decimal(ask), last=Decimal(bid), low=Decimal(bid))
+
+
+def test_leverage_positions():
+    tracker = PositionTracker()
+    tracker.apply_executions([
+        _execution(1, Symbol.BTC_JPY, SalesSide.BUY, SettleType.OPEN, '0.01', '5000000', fee='5'),
+        _execution(2, Symbol.BTC_JPY, SalesSide.BUY, SettleType.OPEN, '0.03', '5100000', fee='15'),
+        _execution(3, Symbol.BTC_JPY, SalesSide.SELL, SettleType.OPEN, '0.01', '5200000'),
+    ])
+    # 反映済みの約定は無視する
+    tracker.apply_executions([_execution(2, Symbol.BTC_JPY, SalesSide.BUY, SettleType.OPEN, '0.03', '5100000')])
+
+    long = tracker.get_position(Symbol.BTC_JPY, SalesSide.BUY)
+    assert long.size == Decimal('0.04')
+    assert long.average_price == Decimal('5075000')
+    assert tracker.net_size(Symbol.BTC_JPY) == Decimal('0.03')
+
+    tracker.update_ticker(_ticker(Symbol.BTC_JPY, '5175000', '5180000'))
+    # 買: (5175000 - 5075000) * 0.04 = 4000, 売: (5200000 - 5180000) * 0.01 = 200
+    assert tracker.unrealized_pnl(Symbol.BTC_JPY) == Decimal('4200')
+
+    # 売りの決済約定は買建玉を減らす
+    tracker.apply_executions([
+        _execution(4, Symbol.BTC_JPY, SalesSide.SELL, SettleType.CLOSE, '0.02', '5175000', loss_gain='2000'),
+    ])
+    assert long.size == Decimal('0.02')
+    assert long.average_price == Decimal('5075000')
+    assert tracker.realized_pnl(Symbol.BTC_JPY) == Decimal('1980')
+
+
+def test_spot_position():
+    tracker = PositionTracker()
+    tracker.apply_executions([
+        _execution(1, Symbol.BTC, SalesSide.BUY, SettleType.OPEN, '0.02', '5000000'),
+        _execution(2, Symbol.BTC, SalesSide.SELL, SettleType.OPEN, '0.01', '5100000'),
+    ])
+    assert tracker.net_size(Symbol.BTC) == Decimal('0.01')
+    assert tracker.realized_pnl(Symbol.BTC) == Decimal('1000')
+
+
+class _StubClient:
+
+    def __init__(self, side=SalesSide.SELL, size='1.5', price='200000', responsetime=None):
+        self.side = side
+        self.size = size
+        self.price = price
+        self.responsetime = responsetime
+
+    def get_position_summary(self, symbol):
+        summary = PositionSummary(average_position_rate=Decimal(self.price), position_loss_gain=Decimal(0),
+                                  side=self.side, sum_order_quantity=Decimal(0),
+                                  sum_position_quantity=Decimal(self.size), symbol=symbol)
+        return GetPositionSummaryRes(status=0, responsetime=self.responsetime or datetime.now(utc),
+                                     data=GetPositionSummaryData([summary]))
+
+
+def test_reconcile():
+    tracker = PositionTracker(reconcile_interval=3600)
+    tracker.apply_executions([_execution(1, Symbol.ETH_JPY, SalesSide.BUY, SettleType.OPEN, '1', '190000')])
+
+    assert tracker.maybe_reconcile(_StubClient(), [Symbol.ETH_JPY, Symbol.ETH]) == [Symbol.ETH_JPY]
+    assert tracker.net_size(Symbol.ETH_JPY) == Decimal('-1.5')
+    assert tracker.get_position(Symbol.ETH_JPY, SalesSide.SELL).average_price == Decimal('200000')
+    assert tracker.maybe_reconcile(_StubClient(), [Symbol.ETH_JPY]) == []
+
+
+def test_reconcile_skips_counted_executions():
+    now = datetime.now(utc)
+    tracker = PositionTracker()
+    tracker.apply_executions([_execution(1, Symbol.BTC_JPY, SalesSide.BUY, SettleType.OPEN, '0.01', '5000000',
+                                         timestamp=now - timedelta(seconds=2))])
+    # 約定2を含む建玉で突き合わせた後に約定2を受け取っても二重に反映しない
+    tracker.reconcile(_StubClient(SalesSide.BUY, '0.02', '5000000', responsetime=now), Symbol.BTC_JPY)
+    tracker.apply_executions([
+        _execution(2, Symbol.BTC_JPY, SalesSide.BUY, SettleType.OPEN, '0.01', '5000000',
+                   timestamp=now - timedelta(seconds=1)),
+        _execution(3, Symbol.BTC_JPY, SalesSide.BUY, SettleType.OPEN, '0.01', '5000000',
+                   timestamp=now + timedelta(seconds=1)),
+    ])
+    assert tracker.net_size(Symbol.BTC_JPY) == Decimal('0.03')
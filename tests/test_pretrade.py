@@ -0,0 +1,66 @@
+#!python3
+import json
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from requests import Response
+
+from gmocoin.common.dto import Symbol, SalesSide, ExecutionType, TimeInForce
+from gmocoin.common.exception import PreTradeRejectedException
+from gmocoin.private.api import Client
+from gmocoin.private.paper import _vwap
+from gmocoin.private.pretrade import SlippageGuard
+from gmocoin.public.analytics import estimate_impact
+from gmocoin.public.dto import GetOrderBooksData, OrderData
+
+
+BOOK = GetOrderBooksData(asks=[OrderData(price=Decimal(p), size=Decimal(s))
+                               for p, s in (('100', '0.5'), ('101', '1'), ('105', '2'))],
+                         bids=[OrderData(price=Decimal(p), size=Decimal(s))
+                               for p, s in (('99', '1'), ('98', '1'))], symbol=Symbol.BTC_JPY)
+
+
+class _Transport:
+
+    def __init__(self):
+        self.posts = []
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        self.posts.append(json.loads(data))
+        res = Response()
+        res.status_code = 200
+        res._content = json.dumps({'status': 0, 'data': '1', 'responsetime': '2021-03-01T00:00:00.000Z'}).encode()
+        return res
+
+
+def test_estimate_matches_book_walk():
+    sizes = [0.1, 0.5, 1.2, 3.5, 4]
+    estimate = estimate_impact(BOOK, SalesSide.BUY, sizes)
+    for i, size in enumerate(sizes[:4]):
+        expected = _vwap(BOOK.asks, Decimal(str(size)))
+        assert estimate.average_price[i] == pytest.approx(float(expected))
+    assert estimate.levels.tolist() == [1, 1, 2, 3, 3]
+    assert estimate.fully_filled.tolist() == [True, True, True, True, False]
+    assert estimate.filled[-1] == 3.5
+    assert estimate.slippage_bps[2] == pytest.approx((100 * 0.5 + 101 * 0.7) / 1.2 / 100 * 10000 - 10000)
+
+    sell = estimate_impact(BOOK, SalesSide.SELL, [1.5])
+    assert sell.average_price[0] == pytest.approx((99 + 98 * 0.5) / 1.5)
+    assert sell.slippage_bps[0] > 0
+    assert np.isnan(estimate_impact(np.empty((0, 2)), SalesSide.BUY, [1]).average_price[0])
+
+
+def test_slippage_guard_rejects_before_sending():
+    transport = _Transport()
+    client = Client('key', 'secret', transport=transport,
+                    pre_trade_checks=[SlippageGuard(lambda symbol: BOOK, max_slippage_bps=50)])
+
+    client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.MARKET, TimeInForce.FAK, size='0.5')
+    with pytest.raises(PreTradeRejectedException):
+        client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.MARKET, TimeInForce.FAK, size='3')
+    with pytest.raises(PreTradeRejectedException):
+        client.close_bulk_order(Symbol.BTC_JPY, SalesSide.SELL, ExecutionType.MARKET, TimeInForce.FAK, size='5')
+    # 指値注文は確認しない
+    client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS, size='3', price='90')
+    assert [p['size'] for p in transport.posts] == ['0.5', '3']
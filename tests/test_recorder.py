@@ -0,0 +1,150 @@
+#!python3
+import csv
+import glob
+import gzip
+import json
+import os
+
+import pytest
+from requests import Response
+
+from gmocoin.cli import main
+from gmocoin.common.dto import Symbol
+from gmocoin.public import recorder as recorder_module
+from gmocoin.public.api import Client
+from gmocoin.public.recorder import MarketDataRecorder
+
+
+RESPONSE_TIME = '2021-03-01T00:00:00.000Z'
+
+
+class _Market:
+
+    def __init__(self):
+        self.trades = [('100', '2021-03-01T00:00:01.000Z')]
+        self.urls = []
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        self.urls.append(url)
+        if 'ticker' in url:
+            data = [{'ask': '101', 'bid': '100', 'high': '110', 'last': '100', 'low': '90', 'symbol': s,
+                     'timestamp': RESPONSE_TIME, 'volume': '10'} for s in ('BTC', 'ETH', 'XRP')]
+        elif 'orderbooks' in url:
+            data = {'asks': [{'price': str(101 + i), 'size': '1'} for i in range(5)],
+                    'bids': [{'price': str(100 - i), 'size': '1'} for i in range(5)], 'symbol': 'BTC'}
+        else:
+            query = dict(q.split('=') for q in url.split('?')[1].split('&'))
+            page, count = int(query.get('page', 1)), int(query.get('count', 100))
+            items = list(reversed(self.trades))[(page - 1) * count:page * count]
+            data = {'pagination': {'currentPage': page, 'count': len(items)},
+                    'list': [{'price': p, 'side': 'BUY', 'size': '0.1', 'timestamp': t} for p, t in items]}
+        res = Response()
+        res.status_code = 200
+        res._content = json.dumps({'status': 0, 'data': data, 'responsetime': RESPONSE_TIME}).encode()
+        return res
+
+
+def _read(root, kind, symbol):
+    rows = []
+    for path in sorted(glob.glob(os.path.join(root, kind, f'symbol={symbol}', 'date=*', 'hour=*', '*.csv.gz'))):
+        with gzip.open(path, 'rt', newline='') as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+def test_record_partitions_and_dedup(tmp_path):
+    market = _Market()
+    recorder = MarketDataRecorder([Symbol.BTC, Symbol.ETH], str(tmp_path), client=Client(transport=market),
+                                  depth=3, format='csv')
+    recorder.record_once()
+    market.trades.append(('101', '2021-03-01T00:00:02.000Z'))
+    recorder.record_once()
+    recorder.flush()
+
+    # 複数銘柄の銘柄レートは1リクエストで取得する
+    assert sum('ticker' in url for url in market.urls) == 2
+    assert [r['last'] for r in _read(str(tmp_path), 'ticker', 'BTC')] == ['100.0', '100.0']
+    assert _read(str(tmp_path), 'ticker', 'XRP') == []
+    books = _read(str(tmp_path), 'orderbooks', 'ETH')
+    assert len(books) == 12
+    assert [(r['side'], r['level']) for r in books[:4]] == [('ASK', '0'), ('ASK', '1'), ('ASK', '2'), ('BID', '0')]
+    assert [r['price'] for r in _read(str(tmp_path), 'trades', 'BTC')] == ['100.0', '101.0']
+
+    report = recorder.report()
+    assert report['trades']['rows'] == 4
+    assert report['orderbooks']['requests'] == 4
+    assert report['ticker']['errors'] == 0
+
+
+def test_trades_are_paged_and_partitioned_by_timestamp(tmp_path):
+    market = _Market()
+    market.trades = [('100', '2021-03-01T00:59:59.000Z')]
+    recorder = MarketDataRecorder([Symbol.BTC], str(tmp_path), client=Client(transport=market),
+                                  ticker=False, orderbooks=False, format='csv', max_trade_pages=3)
+    recorder.record_once()
+
+    # 同時刻の同じ内容の約定も件数分記録する
+    market.trades += [('101', '2021-03-01T00:59:59.500Z')] * 2
+    market.trades += [(str(200 + i), f'2021-03-01T01:00:{i // 10:02}.{i % 10}00Z') for i in range(200)]
+    recorder.record_once()
+    market.trades += [('101', '2021-03-01T01:01:00.000Z')] * 2
+    recorder.record_once()
+    market.trades.append(('101', '2021-03-01T01:01:00.000Z'))
+    recorder.record_once()
+    recorder.flush()
+
+    rows = _read(str(tmp_path), 'trades', 'BTC')
+    assert [r['price'] for r in rows] == ['100.0', '101.0', '101.0'] + [f'{200 + i}.0' for i in range(200)] + \
+        ['101.0'] * 3
+    hours = sorted(os.path.basename(os.path.dirname(p)) for p in glob.glob(
+        os.path.join(str(tmp_path), 'trades', 'symbol=BTC', 'date=*', 'hour=*', '*.csv.gz')))
+    assert hours[0] == 'hour=00' and hours[-1] == 'hour=01'
+    assert len(_read_hour(str(tmp_path), '00')) == 3
+    assert recorder.stats.gaps == {}
+
+    # 最大ページ数で遡りきれない場合は欠落として記録する
+    market.trades += [(str(500 + i), f'2021-03-01T02:00:00.{i:03}Z') for i in range(350)]
+    recorder.record_once()
+    assert recorder.stats.gaps == {Symbol.BTC: 1}
+    assert recorder.report()['trades']['gaps'] == 1
+
+
+def _read_hour(root, hour):
+    rows = []
+    for path in glob.glob(os.path.join(root, 'trades', 'symbol=BTC', 'date=*', f'hour={hour}', '*.csv.gz')):
+        with gzip.open(path, 'rt', newline='') as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+def test_buffer_is_bounded(tmp_path):
+    recorder = MarketDataRecorder([Symbol.BTC], str(tmp_path), client=Client(transport=_Market()),
+                                  ticker=False, trades=False, depth=5, max_rows=10, format='csv')
+    recorder.record_once()
+    writer = recorder.writers[('orderbooks', Symbol.BTC)]
+    assert writer.files == 1
+    assert len(writer._buffer) == 0
+
+
+def test_cli_requires_symbols():
+    with pytest.raises(SystemExit) as e:
+        main(['record', '--out', 'x'])
+    assert e.value.code == 2
+
+
+def test_cli_passes_max_trade_pages(monkeypatch, tmp_path):
+    options = {}
+
+    class _Recorder:
+        def __init__(self, symbols, out, **kwargs):
+            options.update(kwargs)
+
+        def run(self, **kwargs):
+            pass
+
+        def report(self):
+            return {}
+
+    monkeypatch.setattr(recorder_module, 'MarketDataRecorder', _Recorder)
+    assert main(['record', '--symbols', 'BTC', '--out', str(tmp_path), '--max-trade-pages', '30']) == 0
+    assert options['max_trade_pages'] == 30
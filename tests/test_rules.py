@@ -0,0 +1,63 @@
+#!python3
+import json
+
+import pytest
+from requests import Response
+
+from gmocoin.common.dto import Symbol, SalesSide, ExecutionType, TimeInForce
+from gmocoin.common.exception import PreTradeRejectedException
+from gmocoin.private.api import Client
+from gmocoin.private.rules import OrderValidator, SymbolRule
+
+
+class _Transport:
+
+    def __init__(self):
+        self.posts = []
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        self.posts.append(json.loads(data))
+        res = Response()
+        res.status_code = 200
+        res._content = json.dumps({'status': 0, 'data': '1', 'responsetime': '2021-03-01T00:00:00.000Z'}).encode()
+        return res
+
+
+def test_validator_rounds_before_sending():
+    transport = _Transport()
+    client = Client('key', 'secret', transport=transport, validate_orders=True)
+
+    client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS, size='0.019', price='5000000.7')
+    client.order(Symbol.XRP, SalesSide.SELL, ExecutionType.LIMIT, TimeInForce.SOK, size='12.5', price='50.1234')
+    client.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.STOP, TimeInForce.FAK, size='0.01', price='5000000.2')
+    client.close_order(Symbol.ETH_JPY, SalesSide.SELL, ExecutionType.MARKET, TimeInForce.FAK,
+                       position_id=1, position_size='0.25')
+    assert [(p['size'], p.get('price')) for p in transport.posts[:3]] == \
+        [('0.01', '5000000'), ('12', '50.124'), ('0.01', '5000001')]
+    assert transport.posts[3]['settlePosition'][0]['size'] == '0.2'
+
+
+@pytest.mark.parametrize('method, args', [
+    ('order', (Symbol.BTC, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS, '0.00005', '5000000')),
+    ('order', (Symbol.BTC, SalesSide.BUY, ExecutionType.MARKET, TimeInForce.FAS, '0.01')),
+    ('order', (Symbol.ETH_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.SOK, '0.1', '300000')),
+    ('order', (Symbol.XRP, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS, '10')),
+    ('close_bulk_order', (Symbol.BTC, SalesSide.SELL, ExecutionType.MARKET, TimeInForce.FAK, '0.01')),
+])
+def test_validator_rejects_locally(method, args):
+    transport = _Transport()
+    client = Client('key', 'secret', transport=transport, validate_orders=True)
+    with pytest.raises(PreTradeRejectedException):
+        getattr(client, method)(*args)
+    assert transport.posts == []
+
+
+def test_validator_strict_and_overridden_rules():
+    validator = OrderValidator({Symbol.BTC: SymbolRule('0.001', '0.001', '10', max_size='5')}, round_values=False)
+    arguments = {'symbol': Symbol.BTC, 'side': SalesSide.BUY, 'execution_type': ExecutionType.LIMIT,
+                 'time_in_force': TimeInForce.FAS, 'size': '0.002', 'price': '5000000'}
+    validator('order', arguments)
+    assert (arguments['size'], arguments['price']) == ('0.002', '5000000')
+    for key, value in (('price', '5000001'), ('size', '0.0025'), ('size', '6')):
+        with pytest.raises(PreTradeRejectedException):
+            validator('order', dict(arguments, **{key: value}))
@@ -0,0 +1,68 @@
+#!python3
+import pytest
+
+from gmocoin.common.ratelimit import RateLimiter
+from gmocoin.common.scheduler import PollJob, PollScheduler
+
+
+def test_budget_goes_to_high_priority_jobs():
+    runs = []
+    high = PollJob('orderbooks', lambda: runs.append('high'), freshness=0.05, priority=10)
+    low = PollJob('executions', lambda: runs.append('low'), freshness=0.05, priority=1)
+    scheduler = PollScheduler([high, low], rate_limiter=RateLimiter(20, burst=1))
+    assert scheduler.demand() == 40
+
+    scheduler.run(duration=1.0)
+    # 上限(20/秒)を超えて送信しない
+    assert len(runs) <= 22
+    assert high.runs > 3 * low.runs
+    assert low.runs >= 1
+    assert scheduler.report()['executions']['max_age'] > 0.05
+
+
+def test_fresh_jobs_do_not_spend_budget():
+    ticker = PollJob('ticker', lambda: None, freshness=0.2)
+    scheduler = PollScheduler([ticker], rate_limiter=RateLimiter(100))
+    scheduler.run(duration=0.5)
+    assert 2 <= ticker.runs <= 4
+
+
+def test_errors_do_not_stop_other_jobs():
+    errors, results = [], []
+
+    def fail():
+        raise RuntimeError('boom')
+
+    scheduler = PollScheduler(rate_limiter=RateLimiter(100))
+    scheduler.add(PollJob('orders', fail, freshness=0.1, on_error=errors.append))
+    scheduler.add(PollJob('ticker', lambda: 1, freshness=0.1, on_result=results.append))
+    scheduler.start()
+    scheduler._stop.wait(0.25)
+    scheduler.stop()
+    assert len(errors) >= 2 and len(results) >= 2
+    assert scheduler.report()['orders']['errors'] == len(errors)
+
+    scheduler.remove('orders')
+    assert [job.name for job in scheduler.jobs] == ['ticker']
+
+
+def test_rejects_jobs_over_burst():
+    with pytest.raises(ValueError):
+        PollScheduler([PollJob('trades', lambda: None, freshness=1.0, cost=7)])
+    scheduler = PollScheduler(rate_limiter=RateLimiter(6))
+    with pytest.raises(ValueError):
+        scheduler.add(PollJob('trades', lambda: None, freshness=1.0, cost=7))
+    assert scheduler.jobs == []
+
+
+def test_result_handler_errors_are_isolated():
+    def broken(result):
+        raise RuntimeError('boom')
+
+    scheduler = PollScheduler([PollJob('ticker', lambda: 1, freshness=0.05, on_result=broken)],
+                              rate_limiter=RateLimiter(100))
+    scheduler.start()
+    scheduler._stop.wait(0.2)
+    assert scheduler._thread.is_alive()
+    scheduler.stop()
+    assert scheduler.report()['ticker']['errors'] >= 2
@@ -0,0 +1,31 @@
+#!python3
+from concurrent.futures import ThreadPoolExecutor
+
+from gmocoin.common.annotation import get_schema
+from gmocoin.public.dto import GetTradesResSchema
+
+
+def _trades(seed: int) -> dict:
+    return {'status': 0, 'responsetime': '2021-03-01T00:00:00.000Z',
+            'data': {'pagination': {'currentPage': 1, 'count': 20},
+                     'list': [{'price': str(5000000 + seed * 100 + i), 'side': 'BUY', 'size': '0.01',
+                               'timestamp': '2021-03-01T00:00:00.000Z'} for i in range(20)]}}
+
+
+def test_schema_is_cached():
+    schema = get_schema(GetTradesResSchema)
+    assert get_schema(GetTradesResSchema) is schema
+    # Nestedのスキーマも生成済み
+    assert schema.fields['data'].schema.fields['trades'].schema is not None
+
+
+def test_concurrent_load():
+    payloads = [_trades(seed) for seed in range(8)]
+    expected = [[t.price for t in GetTradesResSchema().load(p).data.trades] for p in payloads]
+
+    def load(i):
+        return [t.price for t in get_schema(GetTradesResSchema).load(payloads[i % 8]).data.trades]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(load, range(64)))
+    assert all(r == expected[i % 8] for i, r in enumerate(results))
@@ -0,0 +1,74 @@
+#!python3
+import multiprocessing
+from decimal import Decimal
+
+import pytest
+
+from gmocoin.common.dto import Symbol
+from gmocoin.public.dto import GetOrderBooksData, OrderData
+from gmocoin.public.shared_book import SharedOrderBook
+
+
+def _book(symbol: Symbol, mid: int, depth: int) -> GetOrderBooksData:
+    return GetOrderBooksData(asks=[OrderData(Decimal(mid + i + 1), Decimal('0.0123')) for i in range(depth)],
+                             bids=[OrderData(Decimal(mid - i - 1), Decimal('1.5')) for i in range(depth)],
+                             symbol=symbol)
+
+
+def test_write_and_read():
+    writer = SharedOrderBook.create(Symbol.BTC_JPY, depth=5, name='gmocoin_test_book_rw')
+    reader = SharedOrderBook.attach(Symbol.BTC_JPY, name='gmocoin_test_book_rw')
+    try:
+        assert reader.read() is None
+
+        seq = writer.write(_book(Symbol.BTC_JPY, 5000000, 8))
+        assert reader.seq == seq
+
+        book = reader.read()
+        assert len(book.asks) == 5
+        assert len(book.bids) == 5
+        assert book.asks[0].price == Decimal('5000001')
+        assert book.asks[0].size == Decimal('0.0123')
+        assert book.bids[-1].price == Decimal('4999995')
+
+        writer.write(_book(Symbol.BTC_JPY, 5000100, 2))
+        _, _, asks, bids = reader.read_levels()
+        assert asks == [(5000101.0, 0.0123), (5000102.0, 0.0123)]
+        assert len(bids) == 2
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_symbol_mismatch():
+    writer = SharedOrderBook.create(Symbol.ETH_JPY, depth=2, name='gmocoin_test_book_mismatch')
+    try:
+        with pytest.raises(ValueError):
+            writer.write(_book(Symbol.BTC_JPY, 100, 1))
+        with pytest.raises(ValueError):
+            SharedOrderBook.attach(Symbol.BTC_JPY, name='gmocoin_test_book_mismatch')
+    finally:
+        writer.close()
+
+
+def _read_in_child(queue):
+    reader = SharedOrderBook.attach(Symbol.XRP_JPY, name='gmocoin_test_book_mp')
+    book = reader.read()
+    queue.put((str(book.asks[0].price), str(book.bids[0].size)))
+    reader.close()
+
+
+def test_read_from_other_process():
+    writer = SharedOrderBook.create(Symbol.XRP_JPY, depth=3, name='gmocoin_test_book_mp')
+    try:
+        writer.write(GetOrderBooksData(asks=[OrderData(Decimal('50.123'), Decimal('10'))],
+                                       bids=[OrderData(Decimal('50.1'), Decimal('2.5'))],
+                                       symbol=Symbol.XRP_JPY))
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        process = ctx.Process(target=_read_in_child, args=(queue,))
+        process.start()
+        assert queue.get(timeout=30) == ('50.123', '2.5')
+        process.join()
+    finally:
+        writer.close()
@@ -0,0 +1,138 @@
+#!python3
+from datetime import datetime
+from decimal import Decimal
+
+from pytz import timezone
+
+from gmocoin.common.dto import Symbol
+from gmocoin.public.dto import GetTickerData, GetOrderBooksData, OrderData
+from gmocoin.public.snapshot import SnapshotKind, SnapshotRing, SnapshotReader, \
+    ticker_to_payload, orderbooks_to_payload
+
+
+def _ticker(symbol: Symbol, last: str) -> GetTickerData:
+    return GetTickerData(symbol=symbol, timestamp=datetime(2021, 3, 1, 12, 0, tzinfo=timezone('UTC')),
+                         volume=Decimal('12.5'), ask=Decimal(last) + 1, bid=Decimal(last) - 1,
+                         high=Decimal(last) + 100, last=Decimal(last), low=Decimal(last) - 100)
+
+
+def test_publish_and_read_latest():
+    ring = SnapshotRing.create(slot_count=4, slot_size=4096)
+    reader = SnapshotReader(ring.name)
+    try:
+        assert reader.get_ticker(Symbol.BTC_JPY) is None
+
+        ring.publish(SnapshotKind.TICKER, Symbol.BTC_JPY, ticker_to_payload(_ticker(Symbol.BTC_JPY, '5000000')))
+        ring.publish(SnapshotKind.TICKER, Symbol.ETH_JPY, ticker_to_payload(_ticker(Symbol.ETH_JPY, '200000')))
+        ring.publish(SnapshotKind.TICKER, Symbol.BTC_JPY, ticker_to_payload(_ticker(Symbol.BTC_JPY, '5000100')))
+
+        ticker = reader.get_ticker(Symbol.BTC_JPY)
+        assert ticker.last == Decimal('5000100')
+        assert ticker.symbol is Symbol.BTC_JPY
+        assert reader.get_ticker(Symbol.ETH_JPY).last == Decimal('200000')
+
+        book = GetOrderBooksData(asks=[OrderData(Decimal('5000100'), Decimal('0.01'))],
+                                 bids=[OrderData(Decimal('4999900'), Decimal('0.5'))],
+                                 symbol=Symbol.BTC_JPY)
+        ring.publish(SnapshotKind.ORDERBOOKS, Symbol.BTC_JPY, orderbooks_to_payload(book))
+        read = reader.get_orderbooks(Symbol.BTC_JPY)
+        assert read.asks[0].price == Decimal('5000100')
+        assert read.bids[0].size == Decimal('0.5')
+        assert reader.get_orderbooks(Symbol.BTC_JPY, max_age=-1) is None
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_old_slots_are_overwritten():
+    ring = SnapshotRing.create(slot_count=2, slot_size=4096)
+    try:
+        ring.publish(SnapshotKind.TICKER, Symbol.BTC, b'{}')
+        ring.publish(SnapshotKind.TICKER, Symbol.ETH, b'{}')
+        ring.publish(SnapshotKind.TICKER, Symbol.XRP, b'{}')
+
+        assert ring.latest(SnapshotKind.TICKER, Symbol.BTC) is None
+        assert ring.latest(SnapshotKind.TICKER, Symbol.XRP) is not None
+    finally:
+        ring.close()
+
+
+class _StubClient:
+
+    def __init__(self):
+        self.calls = []
+
+    def get_ticker(self, symbol: Symbol = None):
+        self.calls.append(('ticker', symbol))
+        return type('Res', (), {'data': [_ticker(Symbol.BTC_JPY, '5000000'), _ticker(Symbol.ETH_JPY, '200000')]})
+
+    def get_orderbooks(self, symbol: Symbol):
+        self.calls.append(('orderbooks', symbol))
+        book = GetOrderBooksData(asks=[OrderData(Decimal('5000100'), Decimal('0.01'))], bids=[], symbol=symbol)
+        return type('Res', (), {'data': book})
+
+
+def test_poller_publishes_snapshots():
+    from gmocoin.public.poller import MarketDataPoller
+
+    client = _StubClient()
+    poller = MarketDataPoller([Symbol.BTC_JPY, Symbol.XRP_JPY], client=client)
+    reader = SnapshotReader(poller.name)
+    try:
+        poller.poll_once()
+
+        # 複数銘柄のレートは1リクエストで取得する
+        assert client.calls == [('ticker', None), ('orderbooks', Symbol.BTC_JPY), ('orderbooks', Symbol.XRP_JPY)]
+        assert reader.get_ticker(Symbol.BTC_JPY).last == Decimal('5000000')
+        assert reader.get_ticker(Symbol.ETH_JPY) is None
+        assert reader.get_orderbooks(Symbol.XRP_JPY).symbol is Symbol.XRP_JPY
+    finally:
+        reader.close()
+        poller.close()
+
+
+class _DeepBookClient(_StubClient):
+
+    def get_orderbooks(self, symbol: Symbol):
+        levels = [OrderData(Decimal(5000000 + i), Decimal('0.0001')) for i in range(2000)]
+        return type('Res', (), {'data': GetOrderBooksData(asks=levels, bids=levels, symbol=symbol)})
+
+
+def test_poller_fits_deep_books_and_reports_errors():
+    from gmocoin.public.poller import MarketDataPoller
+
+    errors = []
+    ring = SnapshotRing.create(slot_count=16, slot_size=8192)
+    poller = MarketDataPoller([Symbol.BTC_JPY], ring=ring, client=_DeepBookClient(), ticker=False,
+                              on_error=lambda *e: errors.append(e))
+    reader = SnapshotReader(poller.name)
+    try:
+        # スロットに収まらない板は段数を絞って公開する
+        assert poller.poll_once() == []
+        book = reader.get_orderbooks(Symbol.BTC_JPY)
+        assert 0 < len(book.asks) < 2000
+        assert book.asks[0].price == Decimal('5000000')
+        assert poller.truncated == {Symbol.BTC_JPY: 1}
+
+        poller.client.get_orderbooks = lambda symbol: 1 / 0
+        failed = poller.poll_once()
+        assert [(k, s) for k, s, _ in failed] == [(SnapshotKind.ORDERBOOKS, Symbol.BTC_JPY)]
+        assert isinstance(errors[0][2], ZeroDivisionError)
+        assert poller.failures == {(SnapshotKind.ORDERBOOKS, Symbol.BTC_JPY): 1}
+    finally:
+        reader.close()
+        poller.close()
+
+    # max_levelsを指定した場合はその段数が収まるスロットで作成する
+    wide = [OrderData(Decimal('9999999.999'), Decimal('9999.9999'))] * 1000
+    poller = MarketDataPoller([Symbol.BTC_JPY], client=_DeepBookClient(), ticker=False, max_levels=1000)
+    reader = SnapshotReader(poller.name)
+    try:
+        assert poller.ring.capacity >= len(orderbooks_to_payload(
+            GetOrderBooksData(asks=wide, bids=wide, symbol=Symbol.BTC_JPY)))
+        assert poller.poll_once() == []
+        assert len(reader.get_orderbooks(Symbol.BTC_JPY).asks) == 1000
+        assert poller.truncated == {}
+    finally:
+        reader.close()
+        poller.close()
@@ -0,0 +1,104 @@
+#!python3
+import gzip
+import json
+from datetime import date
+
+import pytest
+from requests import Response
+
+from gmocoin.common.dto import Symbol, SalesSide, ExecutionType, TimeInForce
+from gmocoin.common.exception import ReplayMissException
+from gmocoin.common.transport import RecordingTransport, ReplayTransport, iter_records, replay_paced
+from gmocoin.private.api import Client as PrivateClient
+from gmocoin.public.api import Client
+from gmocoin.public.daily import daily_url
+
+
+ORDERBOOKS = {'status': 0, 'data': {'asks': [{'price': '5000100', 'size': '0.1'}],
+                                    'bids': [{'price': '5000000', 'size': '0.2'}], 'symbol': 'BTC_JPY'},
+              'responsetime': '2021-03-01T00:00:00.000Z'}
+ACTIVE_ORDERS = {'status': 0, 'data': {'pagination': {'currentPage': 1, 'count': 0}, 'list': []},
+                 'responsetime': '2021-03-01T00:00:00.000Z'}
+ORDER = {'status': 0, 'data': 1001, 'responsetime': '2021-03-01T00:00:00.000Z'}
+
+
+class _FakeTransport:
+
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        self.calls.append((method, url, params, data))
+        if method == 'POST':
+            body = ORDER
+        elif url.endswith('activeOrders'):
+            body = ACTIVE_ORDERS
+        else:
+            body = ORDERBOOKS
+        res = Response()
+        res.status_code = 200
+        res._content = json.dumps(body).encode()
+        return res
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / 'traffic.jsonl.gz')
+    recorder = RecordingTransport(path, transport=_FakeTransport())
+    client = Client(transport=recorder)
+    private = PrivateClient(api_key='key', secret_key='secret', transport=recorder)
+    recorded = client.get_orderbooks(Symbol.BTC_JPY)
+    private.get_active_orders(Symbol.BTC_JPY)
+    private.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS, size='0.01', price='5000000')
+    recorder.close()
+
+    records = list(iter_records(path))
+    assert [r['method'] for r in records] == ['GET', 'GET', 'POST']
+    assert records[1]['params'] == {'symbol': 'BTC_JPY', 'page': '1', 'count': '100'}
+    # APIキーと署名は記録しない
+    assert records[2]['headers']['API-KEY'] == '***'
+    assert records[2]['headers']['API-SIGN'] == '***'
+    assert 'key' not in json.dumps(records[2]['headers'])
+
+    replay = ReplayTransport(path)
+    replayed = Client(transport=replay).get_orderbooks(Symbol.BTC_JPY)
+    assert [(a.price, a.size) for a in replayed.data.asks] == [(a.price, a.size) for a in recorded.data.asks]
+    order = PrivateClient(api_key='other', secret_key='other', transport=replay)
+    assert order.order(Symbol.BTC_JPY, SalesSide.BUY, ExecutionType.LIMIT, TimeInForce.FAS,
+                       size='0.01', price='5000000').data == 1001
+    with pytest.raises(ReplayMissException):
+        Client(transport=replay).get_orderbooks(Symbol.BTC_JPY)
+
+    assert len(list(replay_paced(path, speed=1000.0))) == 3
+
+
+class _ArchiveTransport:
+
+    def __init__(self, files):
+        self.files = files
+
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        res = Response()
+        res.status_code = 200 if url in self.files else 404
+        res._content = b'' if method == 'HEAD' or url not in self.files else self.files[url]
+        if url in self.files:
+            res.headers.update({'Content-Type': 'application/octet-stream', 'ETag': '"v1"'})
+        return res
+
+
+def test_record_and_replay_binary_files(tmp_path):
+    day = date(2021, 3, 1)
+    body = gzip.compress(b'symbol,side,size,price,timestamp\nBTC,BUY,0.1,100,2021-03-01 00:00:00.000\n')
+    path = str(tmp_path / 'traffic.jsonl.gz')
+    recorder = RecordingTransport(path, transport=_ArchiveTransport({daily_url(Symbol.BTC, day): body}))
+    recorded = Client(transport=recorder).get_historical_data(Symbol.BTC, 1, base_date=date(2021, 3, 2))
+    recorder.close()
+
+    records = list(iter_records(path))
+    assert 'content_base64' in records[-1]
+    assert records[0]['response_headers']['ETag'] == '"v1"'
+
+    # gzipのファイルと検証子(ETag)をそのまま再現する
+    client = Client(transport=ReplayTransport(path))
+    replayed = client.get_historical_data(Symbol.BTC, 1, base_date=date(2021, 3, 2))
+    assert replayed['price'].tolist() == recorded['price'].tolist() == [100]
+    assert client.daily_index.validators(daily_url(Symbol.BTC, day)) == {'If-None-Match': '"v1"'}